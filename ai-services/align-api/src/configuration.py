@@ -1,3 +1,4 @@
+import os
 from dataclasses import dataclass
 
 
@@ -13,3 +14,10 @@ class Data:
     wav_path: str = "data/english.wav"
     srt_path: str = "data/english.srt"
     language: str = "en"
+
+
+@dataclass(order=True)
+class MediaCachePath:
+    # Share the folder with speech-api to download a video once
+    folder = os.getenv("MEDIA_CACHE_DIR", "media_cache")
+    max_bytes = int(os.getenv("MEDIA_CACHE_MAX_BYTES", 20 * 1024**3))
@@ -1,4 +1,4 @@
-from configuration import ModelPath
+from configuration import ModelPath, MediaCachePath
 from wav2vec2.utils import Wav2vec2
 from rich.console import Console
 from rich.traceback import install
@@ -6,9 +6,10 @@ from fastapi import FastAPI, status, HTTPException
 from pydantic import BaseModel
 import numpy as np
 import torch
-from utils import filter_text, wav_from_buffer, SubtitleJson
+from utils import filter_text, SubtitleJson
 from typing import Optional
-from pytube import YouTube
+from pydub import AudioSegment
+from media_cache import MediaCache
 import re
 from tqdm import tqdm
 import string
@@ -17,6 +18,7 @@ install()
 console = Console()
 
 app = FastAPI()
+media_cache = MediaCache(MediaCachePath.folder, MediaCachePath.max_bytes)
 
 
 class AlignData(BaseModel):
@@ -72,18 +74,15 @@ def align_json(align_data: ExtendedAudioAlign) -> dict:
         )
     try:
         console.log(f"Fetching audio from {align_data.url}")
-        selected_video = YouTube(align_data.url)
-        audio = selected_video.streams.filter(
-            only_audio=True, file_extension="mp4"
-        ).first()
+        with media_cache.use(align_data.url, "wav16k") as wav_path:
+            console.log("Reading 16 kHz audio")
+            wav = AudioSegment.from_wav(wav_path)
     except:
         raise HTTPException(
             status_code=status.HTTP_408_REQUEST_TIMEOUT,
             detail="audio stream not available for current youtube video at the moment",
         )
 
-    console.log("Extracting bytes from audio")
-    wav = wav_from_buffer(audio)
     console.log(f"Duration of audio is {wav.duration_seconds} seconds")
     srt_json = align_data.srt["payload"]
 
@@ -5,3 +5,6 @@ import os
 storage_account_key = ""
 connection_string = ""
 container_name = ""
+# Shared with speech-api and align-api to download a video once
+media_cache_dir = os.getenv("MEDIA_CACHE_DIR", "media_cache")
+media_cache_max_bytes = int(os.getenv("MEDIA_CACHE_MAX_BYTES", 20 * 1024**3))
@@ -1,8 +1,7 @@
 import os
-from yt_dlp import YoutubeDL
 from yt_dlp.utils import DownloadError
 from yt_dlp.extractor import get_info_extractor
-from moviepy.editor import VideoFileClip, AudioFileClip, concatenate_audioclips
+from moviepy.editor import AudioFileClip, concatenate_audioclips
 from spleeter.separator import Separator
 import shutil
 from moviepy.video.io.ffmpeg_tools import ffmpeg_extract_subclip
@@ -11,7 +10,10 @@ from config import (
     storage_account_key,
     connection_string,
     container_name,
+    media_cache_dir,
+    media_cache_max_bytes,
 )
+from media_cache import MediaCache
 import urllib.parse
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -21,35 +23,29 @@ from pydub import AudioSegment
 
 app = FastAPI()
 export_type = "flac"
+media_cache = MediaCache(media_cache_dir, media_cache_max_bytes)
 
 
 def utils_add_bg_music(file_path, video_link):
     file_name = file_path.replace(".flac", "")
-    ydl = YoutubeDL({"format": "best*[acodec!=none]"})
-    with YoutubeDL(
-        {"format": "best*[acodec!=none]", "outtmpl": "{}.%(ext)s".format(file_name)}
-    ) as ydl:
-        ydl.download([video_link])
-
-    video = VideoFileClip(file_name + ".mp4")
-    audio = video.audio
-
-    audio_file = file_name + ".wav"
-    audio.write_audiofile(audio_file)
-    audio = AudioFileClip(audio_file)
-    count = 1
-    duration_of_clip = 60  # in seconds, duration of final audio clip
-    src_duration = math.ceil(
-        audio.duration
-    )  # in seconds, the duration of the original audio
-    audio_file_paths_bg = []
-
-    for i in range(0, src_duration, duration_of_clip):
-        ffmpeg_extract_subclip(
-            audio_file, i, i + 60, targetname=f"{file_name}_{count}.wav"
-        )
-        audio_file_paths_bg.append(f"{file_name}_{count}.wav")
-        count += 1
+    # Only read, the cached file is shared with the other requests, and held
+    # until it is split so it isn't evicted meanwhile
+    with media_cache.use(video_link, "wav") as audio_file:
+        audio = AudioFileClip(audio_file)
+        count = 1
+        duration_of_clip = 60  # in seconds, duration of final audio clip
+        src_duration = math.ceil(
+            audio.duration
+        )  # in seconds, the duration of the original audio
+        audio_file_paths_bg = []
+
+        for i in range(0, src_duration, duration_of_clip):
+            ffmpeg_extract_subclip(
+                audio_file, i, i + 60, targetname=f"{file_name}_{count}.wav"
+            )
+            audio_file_paths_bg.append(f"{file_name}_{count}.wav")
+            count += 1
+        audio.close()
 
     separator = Separator(
         "spleeter:2stems"
@@ -64,7 +60,7 @@ def utils_add_bg_music(file_path, video_link):
         bg_music.append(temp_file_path + "/accompaniment.wav")
 
     final_paths = []
-    concatenated_bg_audios = audio_file.replace(".wav", "_bg_final.wav")
+    concatenated_bg_audios = file_name + "_bg_final.wav"
     clips = [AudioFileClip(c) for c in bg_music]
     final_clip_1 = concatenate_audioclips(clips)
     final_clip_1.write_audiofile(concatenated_bg_audios)
@@ -95,7 +91,6 @@ def utils_add_bg_music(file_path, video_link):
                 file_path.split("/")[-1].replace(".flac", ".wav"),
             )
         )
-        os.remove(file_path.replace(".flac", "") + ".mp4")
     except OSError as e:
         print("Error: %s - %s." % (e.filename, e.strerror))
     return file_path.replace(".wav", "_final.wav")
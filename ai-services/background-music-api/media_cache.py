@@ -0,0 +1,235 @@
+"""
+Content addressed cache of downloaded and decoded video audio.
+
+Transcription, alignment, voice over integration and background music each
+used to download the audio of a video and convert it themselves. MediaCache
+keeps every format of a video in one file, named by the hash of the video id
+and the format, so the services pointing MEDIA_CACHE_DIR to the same volume
+download a video once. Requests for a file being downloaded wait for that
+download instead of starting another one, across threads and processes, and
+the least recently used files are removed above max_bytes. Files opened
+through MediaCache.use are never removed while they are in use.
+
+The backend and the AI services are built separately, so this module is
+copied in each of them: backend/utils, speech-api, align-api/src and
+background-music-api. The copies must stay identical, which the
+check-media-cache-copies job of the linters workflow enforces.
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import re
+import shutil
+import subprocess
+import time
+import uuid
+from contextlib import contextmanager
+from yt_dlp import YoutubeDL
+
+YOUTUBE_ID_PATTERN = re.compile(
+    r"(?:youtube\.com/(?:watch\?(?:.*&)?v=|embed/|shorts/|live/)|youtu\.be/)"
+    r"([A-Za-z0-9_-]{11})"
+)
+
+# Formats downloaded with yt-dlp, by yt-dlp format selector and extension.
+DOWNLOADED_FORMATS = {
+    "video": ("best[ext=mp4]/best", "mp4"),
+    "audio": ("bestaudio[ext=m4a]/bestaudio", "m4a"),
+}
+
+# Formats converted by ffmpeg from the audio, by ffmpeg arguments and
+# extension.
+CONVERTED_FORMATS = {
+    "wav": ([], "wav"),
+    "wav16k": (["-ar", "16000", "-ac", "1", "-sample_fmt", "s16"], "wav"),
+}
+
+LOCKS_FOLDER = "locks"
+TEMPORARY_MARKER = ".tmp-"
+# Temporary files of downloads that didn't finish are removed after a day.
+TEMPORARY_FILE_TTL = 24 * 60 * 60
+# Files used this recently are not evicted, for callers of get that don't
+# hold them with use.
+RECENTLY_USED_SECONDS = 10 * 60
+
+
+def get_video_key(url):
+    """
+    Returns the YouTube video id of a url, so the links of a video share
+    their files, or the url itself for other hosts.
+    """
+    match = YOUTUBE_ID_PATTERN.search(url)
+    if match:
+        return "youtube:" + match.group(1)
+    return url.strip()
+
+
+def get_extension(media_format):
+    if media_format in DOWNLOADED_FORMATS:
+        return DOWNLOADED_FORMATS[media_format][1]
+    return CONVERTED_FORMATS[media_format][1]
+
+
+class MediaCache:
+    """
+    Files of media_format for video urls in folder, up to max_bytes in total,
+    0 meaning no limit. Formats are "video", "audio" (the original audio
+    stream), "wav" and "wav16k" (16 kHz mono 16 bit PCM). The returned paths
+    are shared, so callers that modify or remove the file work on a copy, and
+    callers that read it for a while hold it with use.
+    """
+
+    def __init__(self, folder, max_bytes=0):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(folder, LOCKS_FOLDER), exist_ok=True)
+
+    def get_name(self, url, media_format):
+        digest = hashlib.sha256(
+            (get_video_key(url) + "\n" + media_format).encode("utf-8")
+        ).hexdigest()
+        return "{}.{}".format(digest, get_extension(media_format))
+
+    def get_lock_path(self, name):
+        return os.path.join(self.folder, LOCKS_FOLDER, name + ".lock")
+
+    def get_use_lock_path(self, name):
+        return os.path.join(self.folder, LOCKS_FOLDER, name + ".use")
+
+    @contextmanager
+    def lock(self, name):
+        with open(self.get_lock_path(name), "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @contextmanager
+    def use(self, url, media_format):
+        """
+        Yields the path of the file of media_format for url like get, with a
+        shared lock that keeps evict from removing it until the block ends.
+        """
+        name = self.get_name(url, media_format)
+        with open(self.get_use_lock_path(name), "w") as f:
+            fcntl.flock(f, fcntl.LOCK_SH)
+            try:
+                yield self.get(url, media_format)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def get(self, url, media_format):
+        """
+        Returns the path of the file of media_format for url, downloading or
+        converting it if it isn't cached.
+        """
+        name = self.get_name(url, media_format)
+        path = os.path.join(self.folder, name)
+        while True:
+            if not os.path.exists(path):
+                with self.lock(name):
+                    # Another request may have created it while this one waited.
+                    if not os.path.exists(path):
+                        self.create(url, media_format, path)
+                self.evict(keep=path)
+            try:
+                # The modification time orders files for eviction.
+                os.utime(path)
+                return path
+            except FileNotFoundError:
+                # Evicted by another process in the meantime.
+                continue
+
+    def create(self, url, media_format, path):
+        temporary_path = "{}{}{}".format(path, TEMPORARY_MARKER, uuid.uuid4().hex)
+        start = time.time()
+        try:
+            if media_format in DOWNLOADED_FORMATS:
+                self.download(url, media_format, temporary_path)
+            else:
+                with self.use(url, "audio") as audio_path:
+                    self.convert(
+                        audio_path, CONVERTED_FORMATS[media_format][0], temporary_path
+                    )
+            # Readers never see a partial file.
+            os.replace(temporary_path, path)
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+        logging.info(
+            "Cached %s of %s in %.1f s", media_format, url, time.time() - start
+        )
+
+    def download(self, url, media_format, path):
+        selector, _ = DOWNLOADED_FORMATS[media_format]
+        with YoutubeDL(
+            {"format": selector, "outtmpl": path, "quiet": True, "noplaylist": True}
+        ) as ydl:
+            ydl.download([url])
+
+    def convert(self, source_path, arguments, path):
+        subprocess.run(
+            ["ffmpeg", "-y", "-i", source_path]
+            + arguments
+            + ["-f", "wav", "-hide_banner", "-loglevel", "error", path],
+            check=True,
+        )
+
+    def evict(self, keep=None):
+        """
+        Removes the least recently used files until the cache fits in
+        max_bytes, except keep, files in use and files used in the last
+        RECENTLY_USED_SECONDS.
+        """
+        if not self.max_bytes:
+            return
+        with self.lock("evict"):
+            files = []
+            for entry in os.scandir(self.folder):
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if TEMPORARY_MARKER in entry.name:
+                    if stat.st_mtime < time.time() - TEMPORARY_FILE_TTL:
+                        os.remove(entry.path)
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+            total_size = sum(size for _, size, _ in files)
+            recently_used = time.time() - RECENTLY_USED_SECONDS
+            for mtime, size, path in sorted(files):
+                if total_size <= self.max_bytes:
+                    break
+                if path == keep or mtime > recently_used:
+                    continue
+                if self.remove_unused(path):
+                    total_size -= size
+                    logging.info("Evicted %s from media cache", path)
+
+    def remove_unused(self, path):
+        """
+        Removes the file at path unless a caller holds it with use.
+        """
+        with open(self.get_use_lock_path(os.path.basename(path)), "w") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return True
+
+    def copy(self, url, media_format, path):
+        """
+        Copies the file of media_format for url to path, for callers that
+        modify or remove it.
+        """
+        with self.use(url, media_format) as cached_path:
+            shutil.copyfile(cached_path, path)
+        return path
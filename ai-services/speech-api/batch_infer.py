@@ -0,0 +1,117 @@
+"""
+Batched inference of VAD chunks for the IndicWav2Vec and NeMo models.
+
+process_audio used to run every ~10 s chunk through the model on its own.
+BatchInferenceEngine sorts the chunks of a request by length, pads them into
+batches of similar lengths and runs one forward pass per batch, then hands
+every hypothesis back in the order of the chunks.
+"""
+
+import numpy as np
+import torch
+
+
+def pcm_to_float_array(pcm):
+    """
+    Converts 16 bit mono PCM bytes to the float array the models take.
+    """
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float64)
+    return (samples / np.iinfo(np.int16).max).astype(np.float32)
+
+
+def get_model_device(model):
+    return next(model.parameters()).device
+
+
+def pad_batch(arrays, device):
+    """
+    Returns the arrays zero padded into one (batch, samples) tensor, the
+    padding mask (True on padding) and the lengths of the arrays.
+    """
+    lengths = [len(array) for array in arrays]
+    source = torch.zeros(len(arrays), max(lengths))
+    padding_mask = torch.ones(len(arrays), max(lengths), dtype=torch.bool)
+    for index, array in enumerate(arrays):
+        source[index, : len(array)] = torch.from_numpy(array).float()
+        padding_mask[index, : len(array)] = False
+    return (
+        source.to(device),
+        padding_mask.to(device),
+        torch.tensor(lengths, dtype=torch.long).to(device),
+    )
+
+
+def infer_w2v(model_entry, arrays):
+    _, model, (generator, dictionary) = model_entry
+    source, padding_mask, _ = pad_batch(arrays, get_model_device(model))
+    with torch.no_grad():
+        net_output = model(source=source, padding_mask=padding_mask)
+        if hasattr(model, "get_logits"):
+            emissions = model.get_logits(net_output)
+        else:
+            emissions = model.get_normalized_probs(net_output, log_probs=True)
+    emissions = emissions.transpose(0, 1).float().cpu().contiguous()
+
+    # Frames of the padding are left out of the decoding of every chunk.
+    if net_output.get("padding_mask") is not None:
+        frame_lengths = (~net_output["padding_mask"]).sum(dim=1).tolist()
+    else:
+        frame_lengths = [emissions.size(1)] * len(arrays)
+
+    texts = []
+    for index, frame_length in enumerate(frame_lengths):
+        hypo = generator.decode(
+            emissions[index : index + 1, :frame_length].contiguous()
+        )
+        hyp_pieces = dictionary.string(hypo[0][0]["tokens"].int().cpu())
+        texts.append(hyp_pieces.replace(" ", "").replace("|", " ").strip())
+    return texts
+
+
+def infer_nemo(model_entry, arrays):
+    _, asr, _ = model_entry
+    signal, _, lengths = pad_batch(arrays, get_model_device(asr))
+    with torch.no_grad():
+        logits, logits_len, _ = asr.forward(
+            input_signal=signal, input_signal_length=lengths
+        )
+        hypotheses, _ = asr.decoding.ctc_decoder_predictions_tensor(
+            logits,
+            decoder_lengths=logits_len,
+            return_hypotheses=True,
+        )
+    return [hypothesis.text for hypothesis in hypotheses]
+
+
+INFER_FUNCTIONS = {
+    "IndicWav2Vec": infer_w2v,
+    "IndicTinyASR": infer_nemo,
+}
+
+
+class BatchInferenceEngine:
+    """
+    Transcribes lists of chunks with the model of a language, batch_size
+    chunks of similar lengths per forward pass. The models stay on the
+    device they were loaded on, so a model loaded on the CPU runs on the CPU.
+    """
+
+    def __init__(self, name2model_dict, batch_size=16):
+        self.name2model_dict = name2model_dict
+        self.batch_size = batch_size
+
+    def transcribe(self, arrays, lang):
+        model_entry = self.name2model_dict[lang]
+        infer = INFER_FUNCTIONS[model_entry[0]]
+        texts = [""] * len(arrays)
+        # Sorting by length keeps the padding of every batch small.
+        order = sorted(
+            (index for index in range(len(arrays)) if len(arrays[index]) > 0),
+            key=lambda index: len(arrays[index]),
+        )
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start : start + self.batch_size]
+            batch_texts = infer(model_entry, [arrays[index] for index in batch])
+            for index, text in zip(batch, batch_texts):
+                texts[index] = text
+        return texts
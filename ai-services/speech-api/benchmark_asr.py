@@ -0,0 +1,65 @@
+"""
+Throughput benchmark of the batched recognizer used by process_audio.
+
+Runs VAD over a 16 kHz mono wav file the way process_audio does, then
+transcribes its chunks with every given batch size and prints the audio
+seconds transcribed per wall second. Run with ASR_DEVICE=cpu to measure the
+CPU mode.
+
+    python benchmark_asr.py audio.wav --language hi --batch-sizes 1 8 16
+"""
+
+import argparse
+import time
+import webrtcvad
+
+from vad import read_wave, frame_generator, vad_collector
+from main import asr_engine, split_vad_segment, pcm_to_float_array
+
+
+def get_chunks(wav_path, vad_level, chunk_size):
+    audio, sample_rate = read_wave(wav_path)
+    vad = webrtcvad.Vad(vad_level)
+    frames = frame_generator(30, audio, sample_rate)
+    chunks = []
+    for segment, (start_frame, end_frame) in vad_collector(
+        sample_rate, 30, 300, vad, frames
+    ):
+        arr = pcm_to_float_array(segment)
+        chunks.extend(
+            chunk
+            for _, _, chunk in split_vad_segment(
+                arr, start_frame, end_frame, chunk_size
+            )
+        )
+    return chunks
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("wav_path")
+    parser.add_argument("--language", default="hi")
+    parser.add_argument("--vad-level", type=int, default=3)
+    parser.add_argument("--chunk-size", type=float, default=10)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 16])
+    args = parser.parse_args()
+
+    chunks = get_chunks(args.wav_path, args.vad_level, args.chunk_size)
+    audio_seconds = sum(len(chunk) for chunk in chunks) / 16000
+    print(f"{len(chunks)} chunks, {audio_seconds:.1f} s of speech")
+
+    # The first forward pass includes CUDA initialization.
+    asr_engine.transcribe(chunks[:1], args.language)
+    for batch_size in args.batch_sizes:
+        asr_engine.batch_size = batch_size
+        start = time.perf_counter()
+        asr_engine.transcribe(chunks, args.language)
+        elapsed = time.perf_counter() - start
+        print(
+            f"batch size {batch_size}: {elapsed:.1f} s, "
+            f"{audio_seconds / elapsed:.1f} audio seconds per second"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Transcription jobs run by a bounded pool of worker threads.
+
+/transcribe used to download and transcribe the audio on the event loop, so
+one long video held up every other request. Requests are now queued as jobs
+and run by ASR_JOB_WORKERS threads, each in its own temporary folder. Once
+ASR_MAX_QUEUED_JOBS jobs are waiting, new ones are refused with QueueFull
+until the workers catch up. Jobs and their results are kept in memory for
+ASR_JOB_RESULT_TTL seconds after they finish, so they are only visible to
+the process that queued them.
+"""
+
+import queue
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import Future
+
+QUEUED = "QUEUED"
+RUNNING = "RUNNING"
+SUCCESS = "SUCCESS"
+FAILED = "FAILED"
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, request):
+        self.id = uuid.uuid4().hex
+        self.request = request
+        self.status = QUEUED
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.future = Future()
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "result": self.future.result() if self.status == SUCCESS else None,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class JobQueue:
+    """
+    Queue of jobs run by worker threads calling run(request). The result of
+    run is the result of the job, an exception fails the job.
+    """
+
+    def __init__(self, run, workers=1, max_queued=16, result_ttl=3600):
+        self.run = run
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self.queue = queue.Queue(maxsize=max_queued)
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.threads = []
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self.work, name=f"asr-worker-{index}", daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, request):
+        """
+        Queues a job and returns it, raises QueueFull when the queue is full.
+        """
+        self.remove_expired_jobs()
+        job = Job(request)
+        with self.lock:
+            self.jobs[job.id] = job
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            with self.lock:
+                del self.jobs[job.id]
+            raise QueueFull()
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def work(self):
+        while True:
+            job = self.queue.get()
+            job.status = RUNNING
+            job.started = time.time()
+            print(f"Running job {job.id}")
+            try:
+                result = self.run(job.request)
+            except Exception as e:
+                traceback.print_exc()
+                job.error = str(e)
+                job.status = FAILED
+                job.future.set_exception(e)
+            else:
+                job.status = SUCCESS
+                job.future.set_result(result)
+            job.finished = time.time()
+            print(f"Job {job.id} {job.status} in {job.finished - job.started:.1f} s")
+            self.queue.task_done()
+
+    def remove_expired_jobs(self):
+        expiry = time.time() - self.result_ttl
+        with self.lock:
+            for job_id in [
+                job_id
+                for job_id, job in self.jobs.items()
+                if job.finished is not None and job.finished < expiry
+            ]:
+                del self.jobs[job_id]
+
+    def status(self):
+        with self.lock:
+            jobs = list(self.jobs.values())
+        return {
+            "workers": self.workers,
+            "max_queued": self.queue.maxsize,
+            "queued": sum(job.status == QUEUED for job in jobs),
+            "running": sum(job.status == RUNNING for job in jobs),
+        }
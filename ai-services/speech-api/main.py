@@ -1,51 +1,69 @@
 from typing import Optional
-import math
+import asyncio
 import json
 import time
 import os
 import shutil
 import sys
-import io
 from multiprocessing import Process
 import string
 import logging
+import tempfile
 
 logging.basicConfig()
 logging.getLogger().setLevel(logging.DEBUG)
 import gdown
-from pathlib import Path
 import subprocess
 
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from starlette.responses import RedirectResponse
 
 import webvtt
-from pydub import AudioSegment
 import webrtcvad
-from yt_dlp import YoutubeDL
 
 import numpy as np
-import torch
-from omegaconf import OmegaConf
 import urllib
 from transformers import AutoTokenizer, AutoModelForTokenClassification
 from punctuate import RestorePuncts
 
-from support import load_model, W2lKenLMDecoder, W2lViterbiDecoder, load_data
-from vad import frame_generator, vad_collector
+from support import load_data
+from batch_infer import BatchInferenceEngine, pcm_to_float_array
+from jobs import JobQueue, QueueFull
+from media_cache import MediaCache
+from model_registry import ModelRegistry
+from vad import frame_generator, wave_frame_generator, vad_collector
 from youtube import get_yt_video_and_subs
 
 from tqdm import tqdm
-import whisper
-import nemo.collections.asr as nemo_asr
-
 
 MEDIA_FOLDER = "media/"
 CONFIG_PATH = "config.json"
-DEVICE = "cuda"
+# "cuda" keeps the devices of config.json, "cpu" or e.g. "cuda:0" moves every
+# model there
+DEVICE = os.getenv("ASR_DEVICE", "cuda")
+# Least recently used languages are unloaded above this, 0 for no limit
+ASR_MEMORY_BUDGET_GB = float(os.getenv("ASR_MEMORY_BUDGET_GB", 0))
+# Comma separated languages loaded at startup, the others on first request
+ASR_PRELOAD_LANGUAGES = os.getenv("ASR_PRELOAD_LANGUAGES", "")
+# Number of VAD chunks transcribed per forward pass
+ASR_BATCH_SIZE = int(os.getenv("ASR_BATCH_SIZE", 16))
+# Number of VAD chunks collected before they are transcribed
+ASR_STREAM_WINDOW = int(os.getenv("ASR_STREAM_WINDOW", 4 * ASR_BATCH_SIZE))
+# Number of transcriptions run at the same time
+ASR_JOB_WORKERS = int(os.getenv("ASR_JOB_WORKERS", 1))
+# Transcriptions waiting for a worker before new ones are refused with a 503
+ASR_MAX_QUEUED_JOBS = int(os.getenv("ASR_MAX_QUEUED_JOBS", 16))
+# Seconds the result of a finished job can be read from /jobs/{job_id}
+ASR_JOB_RESULT_TTL = int(os.getenv("ASR_JOB_RESULT_TTL", 24 * 3600))
+# Retry-After of the 503 sent when the queue is full
+ASR_RETRY_AFTER = int(os.getenv("ASR_RETRY_AFTER", 60))
+# Downloaded and converted audio, shared with the other services through the
+# same folder
+MEDIA_CACHE_DIR = os.getenv("MEDIA_CACHE_DIR", os.path.join(MEDIA_FOLDER, "cache"))
+MEDIA_CACHE_MAX_BYTES = int(os.getenv("MEDIA_CACHE_MAX_BYTES", 20 * 1024**3))
 
 print("Modules imported")
 
@@ -54,6 +72,7 @@ print("Modules imported")
 
 
 os.makedirs(MEDIA_FOLDER, exist_ok=True)
+media_cache = MediaCache(MEDIA_CACHE_DIR, MEDIA_CACHE_MAX_BYTES)
 
 app = FastAPI(debug=True)
 
@@ -70,8 +89,6 @@ with open(CONFIG_PATH, "r") as j:
 
 print("Config loaded.")
 
-TOKEN_OFFSET = 100
-
 # # Load punctuation model
 # rpunct = RestorePuncts()
 # print("Punctuation model loaded.")
@@ -85,50 +102,10 @@ TOKEN_OFFSET = 100
 # print(outputs)
 # # breakpoint()
 
-print("Loading models from config..")
-name2model_dict = dict()
-for k, m in config.items():
-    if m["model_type"] == "IndicWav2Vec":
-        if eval(m["lm_usage"]):
-            lmarg = OmegaConf.create(m["lm_details"])
-            lmarg.unk_weight = -math.inf
-            device = m["device"]
-            model, dictionary = load_model(m["model_path"])
-            if DEVICE != "cpu" and torch.cuda.is_available():
-                model.to(device)
-            print("Loading LM..")
-            generator = W2lKenLMDecoder(lmarg, dictionary)
-        else:
-            lmarg = OmegaConf.create({"nbest": 1})
-            model, dictionary = load_model(m["model_path"])
-            device = m["device"]
-            if DEVICE != "cpu" and torch.cuda.is_available():
-                model.to(device)
-            generator = W2lViterbiDecoder(lmarg, dictionary)
-        name2model_dict[k] = [m["model_type"], model, (generator, dictionary)]
-
-    elif m["model_type"] == "IndicTinyASR":
-        model = nemo_asr.models.EncDecCTCModel.restore_from(
-            restore_path=m["model_path"]
-        )
-        model.freeze()
-        # model.decoder.freeze()
-        print(list(model.decoder.vocabulary), m["lm_path"])
-        vocab = model.decoder.vocabulary
-        vocab = [chr(idx + TOKEN_OFFSET) for idx in range(len(vocab))]
-        beam_search = nemo_asr.modules.BeamSearchDecoderWithLM(
-            vocab=vocab,
-            beam_width=128,
-            alpha=0.7,
-            beta=-0.5,  # TODO: Change the values
-            lm_path=m["lm_path"],
-            num_cpus=max(os.cpu_count(), 1),
-            input_tensor=False,
-        )
-        name2model_dict[k] = (m["model_type"], model, beam_search)
-
-
-en_model = whisper.load_model("medium.en").to("cuda:3")
+config["en"] = {"model_type": "Whisper", "model_name": "medium.en", "device": "cuda:3"}
+model_registry = ModelRegistry(
+    config, memory_budget=int(ASR_MEMORY_BUDGET_GB * 1024**3), device=DEVICE
+)
 
 
 def softmax(logits):
@@ -136,102 +113,84 @@ def softmax(logits):
     return e / e.sum(axis=-1).reshape([logits.shape[0], 1])
 
 
-def align_nemo(fp_arr, DEVICE, lang, restore_punct=True):
-    _, asr, beam_search = name2model_dict[lang]
-    ids_to_text_func = asr.tokenizer.ids_to_text
-    feature = torch.from_numpy(fp_arr).float()
-    lengths = torch.Tensor([len(feature)])
-    # model = name2model_dict['hi']
-    if DEVICE != "cpu" and torch.cuda.is_available():
-        feature = feature.cuda()
-        lengths = lengths.cuda()
-        asr = asr.cuda()
-    asr.freeze()
-    # model.decoder.freeze()
-    with torch.no_grad():
-        logits, logits_len, greedy_predictions = asr.forward(
-            input_signal=feature.unsqueeze(0).cuda(), input_signal_length=lengths
-        )
-        current_hypotheses, all_hyp = asr.decoding.ctc_decoder_predictions_tensor(
-            logits,
-            decoder_lengths=logits_len,
-            return_hypotheses=True,
-        )
-        text = current_hypotheses[0].text
-    return text
-
-
-def align_w2v(fp_arr, DEVICE, lang, restore_punct=True):
-    _, model, (generator, dictionary) = name2model_dict[lang]
-    DEVICE = next(model.parameters()).device
-
-    feature = torch.from_numpy(fp_arr).float()
-    if DEVICE != "cpu" and torch.cuda.is_available():
-        feature = feature.to(DEVICE)
-    sample = {"net_input": {"source": None, "padding_mask": None}}
-    sample["net_input"]["source"] = feature.unsqueeze(0)
-    if DEVICE != "cpu" and torch.cuda.is_available():
-        sample["net_input"]["padding_mask"] = (
-            torch.BoolTensor(sample["net_input"]["source"].size(1))
-            .fill_(False)
-            .unsqueeze(0)
-            .to(DEVICE)
-        )
-    else:
-        sample["net_input"]["padding_mask"] = (
-            torch.BoolTensor(sample["net_input"]["source"].size(1))
-            .fill_(False)
-            .unsqueeze(0)
-        )
-
-    with torch.no_grad():
-        hypo = generator.generate([model], sample, prefix_tokens=None)
-    hyp_pieces = dictionary.string(hypo[0][0]["tokens"].int().cpu())
-    tr = hyp_pieces.replace(" ", "").replace("|", " ").strip()
-    return tr
+asr_engine = BatchInferenceEngine(model_registry, batch_size=ASR_BATCH_SIZE)
 
 
 def align(fp_arr, DEVICE, lang, restore_punct=True):
-    model_type, _, _ = name2model_dict[lang]
-    if model_type == "IndicWav2Vec":
-        text = align_w2v(fp_arr, DEVICE, lang, restore_punct=True)
-    elif model_type == "IndicTinyASR":
-        text = align_nemo(fp_arr, DEVICE, lang, restore_punct=True)
-    return text
-
-
-ydl_opts_audio = {
-    "format": "bestaudio[ext=m4a]",
-    "outtmpl": MEDIA_FOLDER + "/%(id)s.m4a",
-}
-ydl_audio = YoutubeDL(ydl_opts_audio)
-
-
-def download_yt_audio(url):
-    info = ydl_audio.extract_info(url, download=True)
-    downloaded_audio_path = os.path.join(MEDIA_FOLDER, info["id"]) + ".m4a"
-    # Create a new folder for each file to perform audio enhancement
-    new_audio_folder = os.path.join(MEDIA_FOLDER, info["id"])
-    Path(new_audio_folder).mkdir(exist_ok=True, parents=True)
-    new_file_path = os.path.join(new_audio_folder, info["id"] + ".m4a")
-    shutil.move(downloaded_audio_path, new_file_path)
-    return new_file_path
+    return asr_engine.transcribe([fp_arr], lang)[0]
+
+
+def split_vad_segment(arr, start_frame, end_frame, chunk_size):
+    """
+    Splits the audio of a VAD segment into the chunks that are transcribed,
+    as (offset in seconds, is last chunk, samples).
+    """
+    chunks = []
+    for frame in range(0, len(arr), int(chunk_size)):
+        if end_frame - frame - start_frame <= chunk_size + 0.1:
+            chunks.append(
+                (frame, True, arr[int((frame) * 16000) : int((end_frame) * 16000)])
+            )
+            break
+        chunks.append(
+            (
+                frame,
+                False,
+                arr[int((frame) * 16000) : int((frame + chunk_size + 0.1) * 16000)],
+            )
+        )
+    return chunks
+
+
+def transcribe_segments(segments, chunk_size, language):
+    """
+    Transcribes VAD segments while they are produced, ASR_STREAM_WINDOW
+    chunks at a time. Yields (start_frame, end_frame, chunks) for every
+    segment, with chunks as (offset in seconds, is last chunk, text).
+    """
+    pending = []
+    pending_chunks = 0
+    for segment, (start_frame, end_frame) in segments:
+        arr = pcm_to_float_array(segment)
+        chunks = split_vad_segment(arr, start_frame, end_frame, chunk_size)
+        pending.append((start_frame, end_frame, chunks))
+        pending_chunks += len(chunks)
+        if pending_chunks >= ASR_STREAM_WINDOW:
+            yield from transcribe_pending_segments(pending, language)
+            pending = []
+            pending_chunks = 0
+    yield from transcribe_pending_segments(pending, language)
+
+
+def transcribe_pending_segments(pending, language):
+    predictions = iter(
+        asr_engine.transcribe(
+            [chunk for _, _, chunks in pending for _, _, chunk in chunks],
+            language,
+        )
+    )
+    for start_frame, end_frame, chunks in pending:
+        yield start_frame, end_frame, [
+            (frame, is_last, next(predictions)) for frame, is_last, _ in chunks
+        ]
 
 
-drive_opts_audio = {
-    "format": "bestaudio[ext=mp3]",
-    "outtmpl": MEDIA_FOLDER + "/%(id)s.mp3",
-}
-drive_audio = YoutubeDL(drive_opts_audio)
+def download_yt_audio(url, folder=None):
+    if folder is None:
+        # Create a new folder for each file to perform audio enhancement
+        folder = tempfile.mkdtemp(dir=MEDIA_FOLDER)
+    # The denoiser removes the audio, so it gets a copy of the cached file
+    return media_cache.copy(url, "audio", os.path.join(folder, "audio.m4a"))
 
 
-def download_drive_audio(url):
-    output = gdown.download(url=url, quiet=False, fuzzy=True)
-    new_audio_folder = os.path.join(MEDIA_FOLDER, Path(output).stem)
-    Path(new_audio_folder).mkdir(exist_ok=True, parents=True)
-    downloaded_audio_path = os.path.join(new_audio_folder, output)
+def download_drive_audio(url, folder=None):
+    if folder is None:
+        folder = tempfile.mkdtemp(dir=MEDIA_FOLDER)
+    # A trailing separator makes gdown keep the name of the file in folder
+    downloaded_audio_path = gdown.download(
+        url=url, output=os.path.join(folder, ""), quiet=False, fuzzy=True
+    )
     print(f"Downloaded audio path: {downloaded_audio_path}")
-    shutil.move(output, downloaded_audio_path)
     subprocess.call(
         [
             "ffmpeg",
@@ -257,7 +216,11 @@ def download_drive_audio(url):
 
 @app.on_event("startup")
 async def startup_event():
+    model_registry.preload(
+        [lang.strip() for lang in ASR_PRELOAD_LANGUAGES.split(",") if lang.strip()]
+    )
     print("Model loaded.")
+    job_queue.start()
 
 
 @app.get("/")
@@ -299,6 +262,12 @@ async def supported_languages():
     return indic_language_dict
 
 
+@app.get("/models")
+async def models_status():
+    # Warm/cold status, device and memory of the models of every language
+    return model_registry.status()
+
+
 @app.get("/get_youtube_video_link_with_captions")
 @app.post("/get_youtube_video_link_with_captions")
 async def _get_youtube_video_link_with_captions(url: str, lang: str = "en"):
@@ -343,8 +312,64 @@ class AudioRequest(BaseModel):
     denoiser: Optional[bool] = False
 
 
+def transcribe_job(audio_request):
+    """
+    Runs a transcription in a temporary folder of its own, removed with the
+    downloaded and converted audio once the transcription is done.
+    """
+    work_dir = tempfile.mkdtemp(dir=MEDIA_FOLDER)
+    try:
+        return transcribe_request(audio_request, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+job_queue = JobQueue(
+    transcribe_job,
+    workers=ASR_JOB_WORKERS,
+    max_queued=ASR_MAX_QUEUED_JOBS,
+    result_ttl=ASR_JOB_RESULT_TTL,
+)
+
+
+def submit_job(audio_request):
+    try:
+        return job_queue.submit(audio_request)
+    except QueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many transcriptions queued, retry later.",
+            headers={"Retry-After": str(ASR_RETRY_AFTER)},
+        )
+
+
 @app.post("/transcribe")
 async def transcribe_audio(audio_request: AudioRequest):
+    # Waits for the job without blocking the event loop
+    job = submit_job(audio_request)
+    return await asyncio.wrap_future(job.future)
+
+
+@app.post("/jobs")
+async def create_job(audio_request: AudioRequest):
+    job = submit_job(audio_request)
+    return {"job_id": job.id, "status": job.status}
+
+
+@app.get("/jobs")
+async def jobs_status():
+    return job_queue.status()
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job.to_dict()
+
+
+def transcribe_request(audio_request, work_dir):
     url = audio_request.url
     vad_val = audio_request.vad_level
     # chunk_size = audio_request.chunk_size
@@ -355,15 +380,35 @@ async def transcribe_audio(audio_request: AudioRequest):
 
     if "youtube.com" in url or "youtu.be" in url:
         print("Loaded from youtube URL")
-        audio_url = download_yt_audio(url)
+        if is_denoiser:
+            audio_url = download_yt_audio(url, work_dir)
+        else:
+            # Held until the transcription ends, so it isn't evicted meanwhile
+            with media_cache.use(url, "wav16k") as audio_url:
+                return process_audio(
+                    audio_url,
+                    vad_val,
+                    chunk_size,
+                    language,
+                    is_denoiser,
+                    retsore_punct,
+                    work_dir=work_dir,
+                    is_wav16k=True,
+                )
     elif "drive.google.com" in url:
         print("Loaded from drive URL")
-        audio_url = download_drive_audio(url)
+        audio_url = download_drive_audio(url, work_dir)
     else:
         audio_url = url
 
     return process_audio(
-        audio_url, vad_val, chunk_size, language, is_denoiser, retsore_punct
+        audio_url,
+        vad_val,
+        chunk_size,
+        language,
+        is_denoiser,
+        retsore_punct,
+        work_dir=work_dir,
     )
 
 
@@ -380,7 +425,14 @@ def get_punctuated(transcript, lang, restore_punct=True):
 
 
 def process_audio(
-    audio_url, vad_val, chunk_size, language, denoiser=False, restore_punct=True
+    audio_url,
+    vad_val,
+    chunk_size,
+    language,
+    denoiser=False,
+    restore_punct=True,
+    work_dir=".",
+    is_wav16k=False,
 ):
     status = "SUCCESS"
     # la = req_data['config']['language']['sourceLanguage']
@@ -388,13 +440,25 @@ def process_audio(
     if audio_url in [None, ""]:
         status = "ERROR"
         return {"status": status, "output": ""}
+    elif is_wav16k and not denoiser:
+        # 16 kHz mono wav of the media cache, read as it is
+        fp_arr, output_wavpath = None, audio_url
     elif audio_url.startswith("media"):
-        fp_arr, output_wavpath = load_data(audio_url, of="raw", denoiser=denoiser)
+        fp_arr, output_wavpath = load_data(
+            audio_url, of="raw", denoiser=denoiser, load_audio=denoiser
+        )
     else:
         print("Loading data from url..")
-        fp_arr, output_wavpath = load_data(audio_url, of="url", denoiser=denoiser)
+        fp_arr, output_wavpath = load_data(
+            audio_url,
+            of="url",
+            denoiser=denoiser,
+            load_audio=denoiser,
+            download_folder=work_dir,
+        )
 
     if language == "en":
+        _, en_model, _ = model_registry.get("en")
         result = en_model.transcribe(
             output_wavpath,
             language="en",
@@ -415,7 +479,7 @@ def process_audio(
 
         return {"status": status, "output": op}
 
-    print(f"Length of loaded array: {len(fp_arr)}")
+    print(f"Transcribing {output_wavpath}")
 
     # try:
     #     fp_arr = load_data(audio_uri,of='raw')
@@ -428,23 +492,19 @@ def process_audio(
     op_nochunk = "WEBVTT\n\n"
     sample_rate = 16000
     vad = webrtcvad.Vad(vad_val)  # 2
-    frames = frame_generator(30, fp_arr, sample_rate)
-    frames = list(frames)
-    segments = list(vad_collector(sample_rate, 30, 300, vad, frames))
+    # Only the denoised audio is loaded in memory, otherwise frames are read
+    # from the wav file and segments are transcribed as VAD yields them.
+    if fp_arr is None:
+        frames = wave_frame_generator(30, output_wavpath)
+    else:
+        frames = frame_generator(30, fp_arr, sample_rate)
+    segments = vad_collector(sample_rate, 30, 300, vad, frames)
     vad_time_stamps = []
     counter = 1
     print("Transcribing..")
-    for i, (segment, (start_frame, end_frame)) in enumerate(
-        tqdm(segments, total=len(segments))
+    for i, (start_frame, end_frame, chunks) in enumerate(
+        tqdm(transcribe_segments(segments, chunk_size, language))
     ):
-        song = AudioSegment.from_raw(
-            io.BytesIO(segment), sample_width=2, frame_rate=16000, channels=1
-        )
-        samples = song.get_array_of_samples()
-        fp_arr = np.array(samples).T.astype(np.float64)
-        fp_arr /= np.iinfo(samples.typecode).max
-        arr = fp_arr.reshape(-1)
-
         op_nochunk += str(i + 1) + "\n"
         op_nochunk += (
             "{0}.000 --> {1}.000".format(
@@ -453,27 +513,12 @@ def process_audio(
             )
             + "\n"
         )
-        # arr = np.array(samples)
-        # print(f'Start frame: {start_frame},\t End frame: {end_frame}')
-        for e, frame in enumerate(range(0, len(arr), int(chunk_size))):
-            # op += str(i+e+1) + '\n'
-            if end_frame - frame - start_frame <= chunk_size + 0.1:
-                # op += "{0}.000 --> {1}.000".format(time.strftime('%H:%M:%S', time.gmtime(start_frame+frame)),time.strftime('%H:%M:%S', time.gmtime(end_frame)))+'\n'
-                # print(len(arr[int((start_frame+frame)*16000):int((end_frame)*16000)]),'Done')
-                # print(end_frame-frame-start_frame)
-                op_pred = (
-                    align(
-                        arr[int((frame) * 16000) : int((end_frame) * 16000)],
-                        DEVICE,
-                        language,
-                        restore_punct,
-                    )
-                    + "\n\n"
-                )
+        for frame, is_last, text in chunks:
+            if is_last:
+                op_pred = text + "\n\n"
                 if len(op_pred.strip()) > 2:
                     op += str(counter) + "\n"
                     counter += 1
-                    # op += str(i+e+1) + '\n'
                     op += (
                         "{0}.000 --> {1}.000".format(
                             time.strftime("%H:%M:%S", time.gmtime(start_frame + frame)),
@@ -483,21 +528,11 @@ def process_audio(
                     )
                     op += op_pred
                     op_nochunk += op_pred
-                # op+= op_pred
-                # op_nochunk += op_pred
-                break
             else:
-                # print('\nHere')
-                # print(int((start_frame+frame)*16000),int((start_frame+frame+5.1)*16000),'Done')
-                op_pred = align(
-                    arr[int((frame) * 16000) : int((frame + chunk_size + 0.1) * 16000)],
-                    DEVICE,
-                    language,
-                )
+                op_pred = text
                 if len(op_pred.strip()) > 2:
                     op += str(counter) + "\n"
                     counter += 1
-                    # op += str(i+e+1) + '\n'
                     op += (
                         "{0}.000 --> {1}.000".format(
                             time.strftime("%H:%M:%S", time.gmtime(start_frame + frame)),
@@ -510,12 +545,7 @@ def process_audio(
                     )
                     op += op_pred + "\n"
                     op_nochunk += op_pred + " "
-
-                # op += "{0}.000 --> {1}.000".format(time.strftime('%H:%M:%S', time.gmtime(start_frame+frame)),time.strftime('%H:%M:%S', time.gmtime(start_frame+frame+chunk_size)))+'\n'
-                # op_pred = align(arr[int((frame)*16000):int((frame+chunk_size+0.1)*16000)],cuda)
-                # op+= op_pred + '\n'
-                # op_nochunk += op_pred +' '
-            op += "\n"
+                op += "\n"
         op_nochunk += "\n"
     #    print(op)
     # return jsonify({'output':op})
@@ -524,10 +554,11 @@ def process_audio(
     # op += align(arr,cuda) +'\n'
     # print(op)
 
-    with open("placeholder.vtt", "w") as f:
+    vtt_path = os.path.join(work_dir, "placeholder.vtt")
+    with open(vtt_path, "w") as f:
         f.write(op)
 
-    captions = webvtt.read("placeholder.vtt")
+    captions = webvtt.read(vtt_path)
 
     print("Punctuating..")
     all_text = ""
@@ -0,0 +1,200 @@
+"""
+Lazily loaded ASR models.
+
+Every language of config.json used to be loaded when main.py was imported.
+ModelRegistry loads the models of a language on its first request instead,
+and once the loaded models add up to more than the memory budget, unloads
+the least recently used languages. The device of config.json can be
+overridden for all models, e.g. with "cpu" to run on nodes without GPUs.
+"""
+
+import gc
+import math
+import os
+import threading
+from collections import OrderedDict
+
+import torch
+from omegaconf import OmegaConf
+
+from support import load_model, W2lKenLMDecoder, W2lViterbiDecoder
+
+TOKEN_OFFSET = 100
+
+
+def load_w2v(m, device):
+    if eval(m["lm_usage"]):
+        lmarg = OmegaConf.create(m["lm_details"])
+        lmarg.unk_weight = -math.inf
+        model, dictionary = load_model(m["model_path"])
+        model.to(device)
+        print("Loading LM..")
+        generator = W2lKenLMDecoder(lmarg, dictionary)
+    else:
+        lmarg = OmegaConf.create({"nbest": 1})
+        model, dictionary = load_model(m["model_path"])
+        model.to(device)
+        generator = W2lViterbiDecoder(lmarg, dictionary)
+    return [m["model_type"], model, (generator, dictionary)]
+
+
+def load_nemo(m, device):
+    import nemo.collections.asr as nemo_asr
+
+    model = nemo_asr.models.EncDecCTCModel.restore_from(
+        restore_path=m["model_path"], map_location=torch.device(device)
+    )
+    model.freeze()
+    # model.decoder.freeze()
+    print(list(model.decoder.vocabulary), m["lm_path"])
+    vocab = model.decoder.vocabulary
+    vocab = [chr(idx + TOKEN_OFFSET) for idx in range(len(vocab))]
+    beam_search = nemo_asr.modules.BeamSearchDecoderWithLM(
+        vocab=vocab,
+        beam_width=128,
+        alpha=0.7,
+        beta=-0.5,  # TODO: Change the values
+        lm_path=m["lm_path"],
+        num_cpus=max(os.cpu_count(), 1),
+        input_tensor=False,
+    )
+    return (m["model_type"], model, beam_search)
+
+
+def load_whisper(m, device):
+    import whisper
+
+    return (m["model_type"], whisper.load_model(m["model_name"]).to(device), None)
+
+
+MODEL_LOADERS = {
+    "IndicWav2Vec": load_w2v,
+    "IndicTinyASR": load_nemo,
+    "Whisper": load_whisper,
+}
+
+
+def get_files_size(paths):
+    return sum(os.path.getsize(path) for path in paths if path and os.path.exists(path))
+
+
+def get_lm_paths(m):
+    lm_paths = [m.get("lm_path")]
+    if eval(m.get("lm_usage", "False")):
+        lm_paths += [m["lm_details"].get("kenlm_model"), m["lm_details"].get("lexicon")]
+    return lm_paths
+
+
+def estimate_memory_size(m):
+    """
+    Returns the size of the files of a model, as an estimate of the memory
+    it takes before it is loaded.
+    """
+    return get_files_size([m.get("model_path")] + get_lm_paths(m))
+
+
+def get_memory_size(m, entry):
+    """
+    Returns the bytes held by the tensors of a loaded model plus the size of
+    its language model files, which the decoders load in memory.
+    """
+    model = entry[1]
+    size = sum(
+        tensor.numel() * tensor.element_size()
+        for tensor in list(model.parameters()) + list(model.buffers())
+    )
+    return size + get_files_size(get_lm_paths(m))
+
+
+class ModelRegistry:
+    """
+    Models of config.json by language, loaded on first use. memory_budget
+    is in bytes, 0 means no limit. device overrides the device of every
+    model; "cuda" or an empty value keeps the devices of config.json, and
+    without CUDA every model is loaded on the CPU.
+    """
+
+    def __init__(self, config, memory_budget=0, device=""):
+        self.config = config
+        self.memory_budget = memory_budget
+        self.device = device
+        self.models = OrderedDict()
+        self.memory_sizes = {}
+        self.lock = threading.Lock()
+        self.language_locks = {lang: threading.Lock() for lang in config}
+
+    def __contains__(self, lang):
+        return lang in self.config
+
+    def __getitem__(self, lang):
+        return self.get(lang)
+
+    def get_device(self, lang):
+        if self.device == "cpu" or not torch.cuda.is_available():
+            return "cpu"
+        if self.device and self.device != "cuda":
+            return self.device
+        return self.config[lang]["device"]
+
+    def get(self, lang):
+        """
+        Returns the loaded models of a language, loading them if needed.
+        """
+        with self.lock:
+            if lang in self.models:
+                self.models.move_to_end(lang)
+                return self.models[lang]
+        # Loading a language doesn't block requests for the others.
+        with self.language_locks[lang]:
+            with self.lock:
+                if lang in self.models:
+                    self.models.move_to_end(lang)
+                    return self.models[lang]
+            m = self.config[lang]
+            with self.lock:
+                self.evict(reserve=estimate_memory_size(m))
+            print(f"Loading {m['model_type']} model of {lang}..")
+            entry = MODEL_LOADERS[m["model_type"]](m, self.get_device(lang))
+            with self.lock:
+                self.models[lang] = entry
+                self.memory_sizes[lang] = get_memory_size(m, entry)
+                self.evict()
+            return entry
+
+    def evict(self, reserve=0):
+        """
+        Unloads the least recently used languages until the loaded models,
+        and reserve bytes for a model about to be loaded, fit in the memory
+        budget. Without a reserve the most recently used model is kept.
+        """
+        if not self.memory_budget:
+            return
+        evicted = False
+        while (
+            len(self.models) > (0 if reserve else 1)
+            and sum(self.memory_sizes.values()) + reserve > self.memory_budget
+        ):
+            lang, _ = self.models.popitem(last=False)
+            del self.memory_sizes[lang]
+            print(f"Unloaded model of {lang}")
+            evicted = True
+        if evicted:
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+    def preload(self, langs):
+        for lang in langs:
+            self.get(lang)
+
+    def status(self):
+        with self.lock:
+            return {
+                lang: {
+                    "model_type": m["model_type"],
+                    "device": self.get_device(lang),
+                    "status": "warm" if lang in self.models else "cold",
+                    "memory_bytes": self.memory_sizes.get(lang),
+                }
+                for lang, m in self.config.items()
+            }
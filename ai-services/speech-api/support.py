@@ -272,7 +272,14 @@ HEADERS = {
 }
 
 
-def load_data(wavpath, of="raw", denoiser=False, **extra):
+def load_data(
+    wavpath,
+    of="raw",
+    denoiser=False,
+    load_audio=True,
+    download_folder=DOWNLOAD_FOLDER,
+    **extra,
+):
     print("Wavpath", wavpath)
     print("of", of)
     if of == "raw":
@@ -329,30 +336,34 @@ def load_data(wavpath, of="raw", denoiser=False, **extra):
 
         # os.remove(wavpath)
         # wavpath = wavpath+'_new.wav'
+        if not load_audio:
+            # The caller reads the converted wav file itself
+            return None, output_wavpath
         print(f"Loading wav file from {output_wavpath}")
         wav = pydub.AudioSegment.from_file(
             output_wavpath, sample_width=2, frame_rate=16000, channels=1
         )
     elif of == "url":
-        if not os.path.exists(DOWNLOAD_FOLDER):
-            os.makedirs(DOWNLOAD_FOLDER)
-        file_id = uuid.uuid4().hex[:6].upper()
+        if not os.path.exists(download_folder):
+            os.makedirs(download_folder)
+        # Jobs pass their temporary folder, so the download is removed with it
+        download_path = os.path.join(download_folder, uuid.uuid4().hex[:6].upper())
         # urllib.request.urlretrieve(wavpath, DOWNLOAD_FOLDER+file_id)
         try:
             print("Downloading file..")
             resp = requests.get(wavpath, headers=HEADERS).content
-            with open(DOWNLOAD_FOLDER + file_id, "wb") as f:
+            with open(download_path, "wb") as f:
                 f.write(resp)
             print("Audio is saved")
         except Exception as e:
             print(e)
         print("wavpath", wavpath)
-        print("downloads", DOWNLOAD_FOLDER + file_id)
+        print("downloads", download_path)
         subprocess.call(
             [
                 "ffmpeg",
                 "-i",
-                DOWNLOAD_FOLDER + file_id,
+                download_path,
                 "-ar",
                 "16k",
                 "-ac",
@@ -360,13 +371,17 @@ def load_data(wavpath, of="raw", denoiser=False, **extra):
                 "-hide_banner",
                 "-loglevel",
                 "error",
-                DOWNLOAD_FOLDER + file_id + "new.wav",
+                download_path + "new.wav",
             ]
         )
         # if os.path.exists(DOWNLOAD_FOLDER+file_id):
         #     os.remove(DOWNLOAD_FOLDER+file_id)
-        print("Filename: ", DOWNLOAD_FOLDER + file_id + "new.wav")
-        return load_data(DOWNLOAD_FOLDER + file_id + "new.wav", denoiser=denoiser)
+        print("Filename: ", download_path + "new.wav")
+        return load_data(
+            download_path + "new.wav",
+            denoiser=denoiser,
+            load_audio=load_audio,
+        )
         # return load_data(DOWNLOAD_FOLDER+file_id)
     elif of == "bytes":
         lang = extra["lang"]
@@ -378,7 +393,9 @@ def load_data(wavpath, of="raw", denoiser=False, **extra):
             file.setsampwidth(2)
             file.setframerate(16000)
             file.writeframes(base64.b64decode(wavpath))
-        return load_data(DOWNLOAD_FOLDER + name, denoiser=denoiser)
+        return load_data(
+            DOWNLOAD_FOLDER + name, denoiser=denoiser, load_audio=load_audio
+        )
 
     # sarray = wav.get_array_of_samples()
     # fp_arr = np.array(sarray).T.astype(np.float64)
@@ -81,6 +81,55 @@ def frame_generator(frame_duration_ms, audio, sample_rate):
         offset += n
 
 
+def read_exactly(read, size):
+    """Reads size bytes with read, fewer only at the end of the stream."""
+    data = b""
+    while len(data) < size:
+        chunk = read(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def stream_frame_generator(frame_duration_ms, read, sample_rate):
+    """Generates audio frames from a stream of PCM audio data.
+    Takes the desired frame duration in milliseconds, a function reading a
+    number of bytes from the stream (e.g. the stdout of ffmpeg) and the
+    sample rate.
+    Yields the same Frames as frame_generator over the whole data, reading
+    one frame ahead instead of holding the data in memory.
+    """
+    n = int(sample_rate * (frame_duration_ms / 1000.0) * 2)
+    timestamp = 0.0
+    duration = (float(n) / sample_rate) / 2.0
+    frame = read_exactly(read, n)
+    while len(frame) == n:
+        next_frame = read_exactly(read, n)
+        if not next_frame:
+            break
+        yield Frame(frame, timestamp, duration)
+        timestamp += duration
+        frame = next_frame
+
+
+def wave_frame_generator(frame_duration_ms, path):
+    """Generates audio frames from a 16 kHz mono .wav file, reading it a
+    frame at a time.
+    """
+    with contextlib.closing(wave.open(path, "rb")) as wf:
+        assert wf.getnchannels() == 1
+        sample_width = wf.getsampwidth()
+        assert sample_width == 2
+        sample_rate = wf.getframerate()
+        assert sample_rate == 16000
+        yield from stream_frame_generator(
+            frame_duration_ms,
+            lambda size: wf.readframes(size // sample_width),
+            sample_rate,
+        )
+
+
 def vad_collector(sample_rate, frame_duration_ms, padding_duration_ms, vad, frames):
     num_padding_frames = int(padding_duration_ms / frame_duration_ms)
     # We use a deque for our sliding window/ring buffer.
@@ -12,6 +12,8 @@ celery_app = Celery(
     worker_prefetch_multiplier=0,
 )
 celery_app.config_from_object("django.conf:settings", namespace="CELERY")
+# Task events feed the queue state read by inspect_queue
+celery_app.conf.worker_send_task_events = True
 
 # Celery Queue related settings
 celery_app.conf.task_default_queue = "default"
@@ -52,6 +54,10 @@ celery_app.conf.beat_schedule = {
         "task": "voiceover.tasks.check_stalled_post_process_tasks",
         "schedule": crontab(hour=4, minute=0),  # Run daily at 4:00 AM UTC = 9:30 AM IST
     },
+    "Rebuild_report_rollups": {
+        "task": "rebuild_report_rollups",
+        "schedule": crontab(minute=30, hour=0),  # execute everyday at 12:30 am
+    },
     "check-empty-payload": {
         "task": "voiceover.tasks.check_empty_payload",
         "schedule": crontab(hour=3, minute=30),  # Run daily at 3,u30 AM UTC = 9:00 AM IST
@@ -4,6 +4,8 @@ from dotenv import load_dotenv
 
 dhruva_key = os.getenv("DHRUVA_KEY")
 english_asr_url = os.getenv("ENGLISH_ASR_API_URL")
+# Base of the /jobs routes, derived from ENGLISH_ASR_API_URL when unset
+english_asr_jobs_url = os.getenv("ENGLISH_ASR_JOBS_URL")
 indic_asr_url = os.getenv("INDIC_ASR_API_URL")
 service_id_hindi = os.getenv("SERVICE_ID_HINDI")
 service_id_nepali = os.getenv("SERVICE_ID_NEPALI")
@@ -22,6 +24,11 @@ storage_account_key = os.getenv("AZURE_STORAGE_ACCOUNT_KEY")
 connection_string = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
 container_name = os.getenv("AZURE_STORAGE_CONTAINER_NAME")
 reports_container_name = os.getenv("AZURE_STORAGE_REPORTS_CONTAINER_NAME")
+# "azure", "local" or "inline" to keep voice over audio inside the payload
+voice_over_audio_store = os.getenv("VOICEOVER_AUDIO_STORE", "inline")
+
+redis_host = os.getenv("REDIS_HOST", "redis")
+redis_port = int(os.getenv("REDIS_PORT", 6379))
 
 flower_url = os.getenv("FLOWER_URL", "http://localhost:5555")
 flower_auth = os.getenv("FLOWER_BASIC_AUTH", None)
@@ -36,6 +43,39 @@ backend_default_translation_type = "MACHINE_GENERATED"
 backend_default_transcript_type = "MACHINE_GENERATED"
 backend_default_voice_over_type = "MACHINE_GENERATED"
 voice_over_payload_offset_size = 15
+voice_over_stitch_sample_rate = 22050
+tts_max_workers = int(os.getenv("TTS_MAX_WORKERS", 8))
+tts_timeout = int(os.getenv("TTS_TIMEOUT", 60))
+tts_max_retries = int(os.getenv("TTS_MAX_RETRIES", 3))
+tts_cache_redis_db = 7
+nmt_max_workers = int(os.getenv("NMT_MAX_WORKERS", 4))
+nmt_timeout = int(os.getenv("NMT_TIMEOUT", 120))
+nmt_max_retries = int(os.getenv("NMT_MAX_RETRIES", 3))
+translation_cache_redis_db = 8
+translation_cache_ttl = int(os.getenv("TRANSLATION_CACHE_TTL", 30 * 24 * 60 * 60))
+asr_connect_timeout = int(os.getenv("ASR_CONNECT_TIMEOUT", 10))
+asr_timeout = int(os.getenv("ASR_TIMEOUT", 40 * 60))
+asr_max_retries = int(os.getenv("ASR_MAX_RETRIES", 3))
+# Submit English ASR as a job and poll for it instead of holding a worker
+asr_async_jobs = os.getenv("ASR_ASYNC_JOBS", "false").lower() == "true"
+asr_poll_interval = int(os.getenv("ASR_POLL_INTERVAL", 30))
+asr_max_poll_attempts = int(os.getenv("ASR_MAX_POLL_ATTEMPTS", 240))
+voice_over_audio_workers = int(
+    os.getenv("VOICEOVER_AUDIO_WORKERS", os.cpu_count() or 4)
+)
+tts_cache_max_bytes = int(os.getenv("TTS_CACHE_MAX_BYTES", 2 * 1024 * 1024 * 1024))
+labse_embedding_cache_size = int(os.getenv("LABSE_EMBEDDING_CACHE_SIZE", 50000))
+glossary_index_cache_size = int(os.getenv("GLOSSARY_INDEX_CACHE_SIZE", 1000))
+bulk_export_download_workers = int(os.getenv("BULK_EXPORT_DOWNLOAD_WORKERS", 4))
+bulk_export_block_size = int(os.getenv("BULK_EXPORT_BLOCK_SIZE", 8 * 1024 * 1024))
+bulk_export_max_bytes = int(os.getenv("BULK_EXPORT_MAX_BYTES", 1024**3))
+queue_state_redis_db = 9
+queue_state_max_tasks = int(os.getenv("QUEUE_STATE_MAX_TASKS", 10000))
+queue_state_ttl = int(os.getenv("QUEUE_STATE_TTL", 3 * 24 * 60 * 60))
+queue_state_page_size = int(os.getenv("QUEUE_STATE_PAGE_SIZE", 50))
+# Downloaded videos, shared with the AI services through the same folder
+media_cache_dir = os.getenv("MEDIA_CACHE_DIR", "media_cache")
+media_cache_max_bytes = int(os.getenv("MEDIA_CACHE_MAX_BYTES", 20 * 1024**3))
 app_name = os.getenv("APP_NAME")
 
 allowed_roles = {
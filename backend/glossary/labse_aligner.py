@@ -1,4 +1,6 @@
 import sys
+import threading
+from collections import OrderedDict
 from sentence_transformers import SentenceTransformer
 import numpy as np
 from scipy.spatial import distance
@@ -6,6 +8,60 @@ import config
 import logging
 
 model_name = "sentence-transformers/LaBSE"
+labse_model = None
+labse_model_lock = threading.Lock()
+embedding_cache = OrderedDict()
+embedding_cache_lock = threading.Lock()
+
+
+def get_labse_model():
+    """
+    Loads the LaBSE model on first use and shares it across the process
+    """
+    global labse_model
+    if labse_model is None:
+        with labse_model_lock:
+            if labse_model is None:
+                logging.info("Loading LaBSE model")
+                labse_model = SentenceTransformer(model_name, device="cpu")
+    return labse_model
+
+
+def encode_texts(texts):
+    """
+    Returns a dict of text -> LaBSE embedding. Texts missing from the
+    embedding cache are encoded in a single batch.
+    """
+    embeddings, missing = {}, []
+    with embedding_cache_lock:
+        for text in dict.fromkeys(texts):
+            if text in embedding_cache:
+                embedding_cache.move_to_end(text)
+                embeddings[text] = embedding_cache[text]
+            else:
+                missing.append(text)
+    if missing:
+        encoded = get_labse_model().encode(missing, show_progress_bar=False)
+        with embedding_cache_lock:
+            for text, embedding in zip(missing, encoded):
+                embeddings[text] = embedding
+                embedding_cache[text] = embedding
+            while len(embedding_cache) > config.labse_embedding_cache_size:
+                embedding_cache.popitem(last=False)
+    logging.info(
+        "LaBSE embeddings: {} cached, {} encoded".format(
+            len(embeddings) - len(missing), len(missing)
+        )
+    )
+    return embeddings
+
+
+def get_alignment_texts(inputs):
+    texts = []
+    for src_phrase in inputs.get("src_phrases"):
+        texts.append(src_phrase)
+        texts.extend(split_tgt(len(src_phrase.split()), inputs.get("tgt")))
+    return texts
 
 
 class LabseAlignerResource:
@@ -14,9 +70,18 @@ class LabseAlignerResource:
         response_list = list()
         if len(inputs) > 0:
             try:
+                # Encode the phrases and candidates of all inputs in one batch
+                embeddings = encode_texts(
+                    [
+                        text
+                        for i in inputs
+                        if all(v in i for v in ["src_phrases", "tgt"])
+                        for text in get_alignment_texts(i)
+                    ]
+                )
                 for i in inputs:
                     if all(v in i for v in ["src_phrases", "tgt"]):
-                        res = LabseAlignerService.phrase_aligner(i)
+                        res = LabseAlignerService.phrase_aligner(i, embeddings)
                         response_list.append(res)
                         out = response_list
                     else:
@@ -33,9 +98,10 @@ class LabseAlignerResource:
 
 class LabseAlignerService:
     @staticmethod
-    def phrase_aligner(inputs):
+    def phrase_aligner(inputs, embeddings=None):
         """
         This function is meant to align src phrases with best possible tgt phrase using LABSE model
+        embeddings is a dict of text -> embedding already encoded for the inputs
         """
         out = {}
         aligned_phrases = {}
@@ -43,12 +109,14 @@ class LabseAlignerService:
             logging.info("Performing phrase alignenment using LABSE")
             logging.info("Input for phrase_aligner:{}".format(inputs))
             src_phrases, tgt = inputs.get("src_phrases"), inputs.get("tgt")
-            model = SentenceTransformer(model_name, device="cpu")
+            if embeddings is None:
+                embeddings = encode_texts(get_alignment_texts(inputs))
             for src_phrase in src_phrases:
                 length_src_phrase = len(src_phrase.split())
                 tgt_token_list = split_tgt(length_src_phrase, tgt)
-                embeddings_src_phrase, embeddings_tgt_tokens = generate_embeddings(
-                    model, [src_phrase], tgt_token_list
+                embeddings_src_phrase = np.array([embeddings[src_phrase]])
+                embeddings_tgt_tokens = np.array(
+                    [embeddings[token] for token in tgt_token_list]
                 )
                 alignments = get_target_sentence(
                     embeddings_tgt_tokens, embeddings_src_phrase, length_src_phrase
@@ -111,17 +179,6 @@ def split_tgt(length_src_phrase, tgt):
     return tgt_token_list
 
 
-def generate_embeddings(model, input_1, input_2):
-    """
-    Generate LABSE embeddings
-    Note: Inputs are array of strings
-    """
-    embeddings_input_1 = model.encode(input_1, show_progress_bar=True)
-    embeddings_input_2 = model.encode(input_2, show_progress_bar=True)
-    logging.info("LABSE embedding generation finished")
-    return embeddings_input_1, embeddings_input_2
-
-
 def get_target_sentence(target_embeddings, source_embedding, length_src_phrase):
     """
     Calculate cosine similarity using scipy distance method
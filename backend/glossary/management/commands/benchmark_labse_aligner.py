@@ -0,0 +1,103 @@
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from glossary import labse_aligner
+from glossary.labse_aligner import (
+    LabseAlignerResource,
+    get_labse_model,
+    get_target_sentence,
+    split_tgt,
+)
+
+SAMPLE_INPUTS = [
+    {
+        "src_phrases": ["machine learning", "data"],
+        "tgt": "मशीन लर्निंग के लिए बहुत सारा डेटा चाहिए",
+    },
+    {
+        "src_phrases": ["Python", "programming language"],
+        "tgt": "पायथन एक लोकप्रिय प्रोग्रामिंग भाषा है",
+    },
+    {
+        "src_phrases": ["video", "subtitles"],
+        "tgt": "इस वीडियो के उपशीर्षक हिंदी में हैं",
+    },
+]
+
+
+def get_distinct_inputs(repeat):
+    """
+    Returns repeat copies of the sample inputs made distinct by a numbered
+    word, so no embedding is shared between copies.
+    """
+    return [
+        {
+            "src_phrases": [f"{phrase} {n}" for phrase in sample["src_phrases"]],
+            "tgt": f"{sample['tgt']} {n}",
+        }
+        for n in range(repeat)
+        for sample in SAMPLE_INPUTS
+    ]
+
+
+def align_per_phrase(model, inputs):
+    """
+    The aligner before batching: one encode call for every source phrase and
+    one for its target candidates, with the model already loaded.
+    """
+    for i in inputs:
+        for src_phrase in i["src_phrases"]:
+            length_src_phrase = len(src_phrase.split())
+            tgt_token_list = split_tgt(length_src_phrase, i["tgt"])
+            embeddings_src_phrase = model.encode([src_phrase], show_progress_bar=False)
+            embeddings_tgt_tokens = model.encode(
+                tgt_token_list, show_progress_bar=False
+            )
+            get_target_sentence(
+                np.array(embeddings_tgt_tokens),
+                np.array(embeddings_src_phrase),
+                length_src_phrase,
+            )
+
+
+class Command(BaseCommand):
+    help = "Reports LaBSE phrase alignments per second on CPU, per phrase and batched."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=100,
+            help="Number of distinct copies of the sample inputs aligned.",
+        )
+
+    def handle(self, *args, **options):
+        start = time.time()
+        model = get_labse_model()
+        self.stdout.write(f"Model loaded in {time.time() - start:.2f}s")
+
+        inputs = get_distinct_inputs(options["repeat"])
+        phrases = sum(len(i["src_phrases"]) for i in inputs)
+        resource = LabseAlignerResource()
+
+        start = time.time()
+        align_per_phrase(model, inputs)
+        per_phrase = time.time() - start
+
+        labse_aligner.embedding_cache.clear()
+        start = time.time()
+        resource.post(inputs)
+        batched = time.time() - start
+
+        start = time.time()
+        resource.post(inputs)
+        cached = time.time() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Aligned {phrases} distinct phrases: "
+                f"{phrases / per_phrase:.1f} phrases/s encoded per phrase, "
+                f"{phrases / batched:.1f} phrases/s batched, "
+                f"{phrases / cached:.1f} phrases/s with cached embeddings"
+            )
+        )
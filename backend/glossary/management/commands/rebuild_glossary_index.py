@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from glossary.tmx.tmxrepo import TMXRepository
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the per user and locale glossary indexes from the TMX records. Glossary lookups fall back to per phrase reads until it has run once."
+
+    def handle(self, *args, **options):
+        TMXRepository().rebuild_glossary_index()
+        self.stdout.write(self.style.SUCCESS("Rebuilt the glossary indexes"))
@@ -10,6 +10,9 @@ redis_server_host = "redis"
 redis_server_port = 6379
 tmx_redis_db = 3
 utm_redis_db = 6
+glossary_version_key = "tmx_glossary_version"
+glossary_index_key_prefix = "tmx_glossary_index:"
+glossary_index_built_key = "tmx_glossary_index_built"
 redis_client = None
 utm_redis_client = None
 mongo_client_tmx = None
@@ -73,8 +76,9 @@ class TMXRepository:
         try:
             client = self.get_redis_instance()
             result = []
-            for key in key_list:
-                val = client.get(key)
+            if not key_list:
+                return result
+            for val in client.mget(key_list):
                 if val:
                     result.append(json.loads(val))
             return result
@@ -82,6 +86,128 @@ class TMXRepository:
             logging.info("Exception in TMXREPO: search | Cause: " + str(e))
             return None
 
+    # Fetches records for all keys in one MGET, None for every missing key
+    def search_many(self, key_list):
+        try:
+            client = self.get_redis_instance()
+            if not key_list:
+                return []
+            return [json.loads(val) if val else None for val in client.mget(key_list)]
+        except Exception as e:
+            logging.info("Exception in TMXREPO: search_many | Cause: " + str(e))
+            return None
+
+    # Iterates over all records with SCAN and chunked MGETs instead of KEYS
+    def scan_records(self, batch_size=1000):
+        client = self.get_redis_instance()
+        keys = []
+        for key in client.scan_iter(count=batch_size):
+            keys.append(key)
+            if len(keys) == batch_size:
+                for val in client.mget(keys):
+                    if val:
+                        yield json.loads(val)
+                keys = []
+        if keys:
+            for val in client.mget(keys):
+                if val:
+                    yield json.loads(val)
+
+    # Version of a user's glossary, bumped whenever entries are pushed or deleted
+    def get_glossary_version(self, user_id):
+        try:
+            client = self.get_utm_redis_instance()
+            global_version, user_version = client.mget(
+                glossary_version_key, glossary_version_key + ":" + str(user_id)
+            )
+            return int(global_version or 0), int(user_version or 0)
+        except Exception as e:
+            logging.info(
+                "Exception in TMXREPO: get_glossary_version | Cause: " + str(e)
+            )
+            return None
+
+    def bump_glossary_version(self, user_id=None):
+        try:
+            client = self.get_utm_redis_instance()
+            if user_id is None:
+                client.incr(glossary_version_key)
+            else:
+                client.incr(glossary_version_key + ":" + str(user_id))
+        except Exception as e:
+            logging.info(
+                "Exception in TMXREPO: bump_glossary_version | Cause: " + str(e)
+            )
+
+    def get_glossary_index_key(self, user_id, locale):
+        return glossary_index_key_prefix + str(user_id) + ":" + locale
+
+    # Adds src -> hash of user records to the glossary index of their user and locale
+    def add_to_glossary_index(self, records):
+        try:
+            pipe = self.get_utm_redis_instance().pipeline(transaction=False)
+            for record in records:
+                if "userID" in record and "hash" in record:
+                    pipe.hset(
+                        self.get_glossary_index_key(record["userID"], record["locale"]),
+                        record["src"],
+                        record["hash"],
+                    )
+            pipe.execute()
+        except Exception as e:
+            logging.info(
+                "Exception in TMXREPO: add_to_glossary_index | Cause: " + str(e)
+            )
+
+    def remove_from_glossary_index(self, records):
+        try:
+            pipe = self.get_utm_redis_instance().pipeline(transaction=False)
+            for record in records:
+                if "userID" in record:
+                    pipe.hdel(
+                        self.get_glossary_index_key(record["userID"], record["locale"]),
+                        record["src"],
+                    )
+            pipe.execute()
+        except Exception as e:
+            logging.info(
+                "Exception in TMXREPO: remove_from_glossary_index | Cause: " + str(e)
+            )
+
+    # Returns the src -> hash index of a user's glossary for a locale, None
+    # until rebuild_glossary_index has run once.
+    def get_glossary_index(self, user_id, locale):
+        try:
+            client = self.get_utm_redis_instance()
+            pipe = client.pipeline(transaction=False)
+            pipe.exists(glossary_index_built_key)
+            pipe.hgetall(self.get_glossary_index_key(user_id, locale))
+            built, index = pipe.execute()
+            if not built:
+                return None
+            return {
+                src.decode(): phrase_hash.decode() for src, phrase_hash in index.items()
+            }
+        except Exception as e:
+            logging.info("Exception in TMXREPO: get_glossary_index | Cause: " + str(e))
+            return None
+
+    # Rebuilds the glossary indexes of all users from the TMX records
+    def rebuild_glossary_index(self):
+        client = self.get_utm_redis_instance()
+        stale_keys = list(client.scan_iter(match=glossary_index_key_prefix + "*"))
+        if stale_keys:
+            client.delete(*stale_keys)
+        records = []
+        for record in self.scan_records():
+            if type(record) == dict and "locale" in record and "src" in record:
+                records.append(record)
+                if len(records) == 1000:
+                    self.add_to_glossary_index(records)
+                    records = []
+        self.add_to_glossary_index(records)
+        client.set(glossary_index_built_key, 1)
+
     def get_all_records(self, key_list):
         try:
             client = self.get_redis_instance()
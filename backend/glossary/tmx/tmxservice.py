@@ -1,6 +1,8 @@
 import hashlib
 import json
+import threading
 import time
+from collections import OrderedDict
 from datetime import datetime
 import uuid
 import requests
@@ -10,9 +12,12 @@ from glossary.labse_aligner import *
 import re
 from users.models import User
 from glossary.models import Glossary
+import config
 
 
 repo = TMXRepository()
+glossary_index_cache = OrderedDict()
+glossary_index_cache_lock = threading.Lock()
 
 
 class TMXService:
@@ -71,7 +76,9 @@ class TMXService:
                 for hash_key in hash_dict.keys():
                     tmx_record["hash"] = hash_dict[hash_key]
                     repo.upsert(tmx_record["hash"], tmx_record)
+            repo.add_to_glossary_index(tmx_records)
         self.push_tmx_metadata(tmx_input, None)
+        repo.bump_glossary_version(tmx_input.get("userID"))
         logging.info("Translations pushed to TMX!")
         return {"message": "Glossary entry created", "status": "SUCCESS"}
 
@@ -117,6 +124,8 @@ class TMXService:
                     for tmx_del in tmx_to_be_deleted:
                         hashes.append(tmx_del["hash"])
                     repo.delete(hashes)
+                    repo.remove_from_glossary_index(tmx_to_be_deleted)
+                    repo.bump_glossary_version(tmx_input.get("userID"))
                     logging.info("Glossary deleted!")
                     return {"message": "Glossary DELETED!", "status": "SUCCESS"}
                 else:
@@ -175,6 +184,8 @@ class TMXService:
                     if glossary_obj is not None:
                         glossary_obj.delete()
                 repo.delete(hashes)
+                repo.remove_from_glossary_index(tmx_records)
+                repo.bump_glossary_version(tmx_input.get("userID"))
                 logging.info("Glossary deleted!")
                 return {"message": "Glossary DELETED!", "status": "SUCCESS"}
             except Exception as e:
@@ -192,6 +203,69 @@ class TMXService:
         tmx_phrases, res_dict = self.tmx_phrase_search(tmx_record, tmx_level)
         return tmx_phrases, res_dict
 
+    # Method to fetch tmx phrases for every src of a transcript in one pass
+    # Phrases are matched against an in-memory index of the user's glossary and
+    # the matched records are fetched with a single MGET.
+    def get_tmx_phrases_batch(self, user_id, org_id, locale, sentences, tmx_level):
+        index = None
+        if tmx_level == "USER" and user_id:
+            index = self.get_glossary_index(user_id, locale)
+        if index is None:
+            return [
+                self.get_tmx_phrases(user_id, org_id, locale, sentence, tmx_level)
+                for sentence in sentences
+            ]
+
+        def lookup(tmx_record, tmx_level):
+            if tmx_record["src"] in index:
+                return [index[tmx_record["src"]]], True
+            return None, False
+
+        matched_hashes = []
+        for sentence in sentences:
+            tmx_record = {"locale": locale, "src": sentence.strip(), "userID": user_id}
+            matched_hashes.append(
+                self.tmx_phrase_search(tmx_record, tmx_level, lookup)
+            )
+        unique_hashes = list(
+            {phrase_hash for hashes, _ in matched_hashes for phrase_hash in hashes}
+        )
+        records = repo.search_many(unique_hashes) if unique_hashes else []
+        if records is None:
+            records = []
+        records_by_hash = dict(zip(unique_hashes, records))
+        result = []
+        for hashes, res_dict in matched_hashes:
+            tmx_phrases = [
+                records_by_hash[phrase_hash]
+                for phrase_hash in hashes
+                if records_by_hash.get(phrase_hash)
+            ]
+            result.append((tmx_phrases, res_dict))
+        return result
+
+    # Returns a dict of src -> hash of all glossary entries of a user for a locale
+    # The index is read from the user's index in Redis, kept in a per process LRU
+    # cache and reloaded when the glossary version changes.
+    def get_glossary_index(self, user_id, locale):
+        version = repo.get_glossary_version(user_id)
+        if version is None:
+            return None
+        cache_key = (str(user_id), locale)
+        with glossary_index_cache_lock:
+            cached = glossary_index_cache.get(cache_key)
+            if cached and cached[0] == version:
+                glossary_index_cache.move_to_end(cache_key)
+                return cached[1]
+        index = repo.get_glossary_index(user_id, locale)
+        if index is None:
+            return None
+        with glossary_index_cache_lock:
+            glossary_index_cache[cache_key] = (version, index)
+            while len(glossary_index_cache) > config.glossary_index_cache_size:
+                glossary_index_cache.popitem(last=False)
+        return index
+
     # Generates a 3 flavors for a sentence - title case, lowercase and uppercase.
     def fetch_diff_flavors_of_sentence(self, sentence):
         result = []
@@ -210,7 +284,7 @@ class TMXService:
 
     # Searches for all tmx phrases of a fixed length within a given sentence
     # Uses a custom implementation of the sliding window search algorithm - we call it hopping window.
-    def tmx_phrase_search(self, tmx_record, tmx_level):
+    def tmx_phrase_search(self, tmx_record, tmx_level, lookup=None):
         tmx_word_length = 4
         sentence, tmx_phrases = tmx_record["src"], []
         hopping_pivot, sliding_pivot, i = 0, len(sentence), 1
@@ -238,7 +312,7 @@ class TMXService:
                     suffix_phrase_list.append(short)
                 for phrases in suffix_phrase_list:
                     tmx_record["src"] = phrases
-                    tmx_result, fetch = self.get_tmx_with_fallback(
+                    tmx_result, fetch = (lookup or self.get_tmx_with_fallback)(
                         tmx_record, tmx_level
                     )
                     computed += 1
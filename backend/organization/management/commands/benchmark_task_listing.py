@@ -0,0 +1,67 @@
+import json
+import math
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+from organization.views import OrganizationViewSet
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Reports the SQL queries and time taken to list a page of org tasks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org-id", type=int, required=True)
+        parser.add_argument("--user-id", type=int, required=True)
+        parser.add_argument("--limit", type=int, default=50)
+
+    def list_tasks(self, user, org_id, params):
+        request = APIRequestFactory().get(
+            "/organization/{}/list_org_tasks/".format(org_id), params
+        )
+        force_authenticate(request, user=user)
+        view = OrganizationViewSet.as_view({"get": "list_org_tasks"})
+        with CaptureQueriesContext(connection) as queries:
+            start = time.time()
+            response = view(request, pk=org_id)
+            elapsed = time.time() - start
+        return response.data, len(queries), elapsed
+
+    def handle(self, *args, **options):
+        user = User.objects.get(pk=options["user_id"])
+        org_id, limit = options["org_id"], options["limit"]
+        params = {"limit": limit, "filter": json.dumps({}), "search": json.dumps({})}
+
+        data, query_count, elapsed = self.list_tasks(
+            user, org_id, {**params, "offset": 1}
+        )
+        total_count = data["total_count"]
+        last_page = max(math.ceil(total_count / limit), 1)
+        self.stdout.write(f"{total_count} tasks in organization {org_id}")
+        self.stdout.write(f"First page: {query_count} queries, {elapsed * 1000:.0f} ms")
+
+        _, query_count, elapsed = self.list_tasks(
+            user, org_id, {**params, "offset": last_page}
+        )
+        self.stdout.write(
+            f"Last page with offset: {query_count} queries, {elapsed * 1000:.0f} ms"
+        )
+
+        data, query_count, elapsed = self.list_tasks(
+            user, org_id, {**params, "offset": 1, "cursor": ""}
+        )
+        self.stdout.write(
+            f"First page with cursor: {query_count} queries, {elapsed * 1000:.0f} ms"
+        )
+        if data.get("next_cursor"):
+            _, query_count, elapsed = self.list_tasks(
+                user,
+                org_id,
+                {**params, "offset": 1, "cursor": data["next_cursor"]},
+            )
+            self.stdout.write(
+                f"Next page with cursor: {query_count} queries, "
+                f"{elapsed * 1000:.0f} ms"
+            )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from organization.rollups import rebuild_report_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the report rollups from completed transcripts, translations and voice overs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--org-id",
+            type=int,
+            default=None,
+            help="Only rebuild the rollups of this organization.",
+        )
+
+    def handle(self, *args, **options):
+        created = rebuild_report_rollups(options["org_id"])
+        self.stdout.write(self.style.SUCCESS(f"Created {created} report rollups"))
@@ -0,0 +1,119 @@
+import datetime
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("project", "0015_project_paraphrasing_enabled"),
+        ("organization", "0019_remove_organization_organization_owner"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReportRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("TRANSCRIPT", "Transcript"),
+                            ("TRANSLATION", "Translation"),
+                            ("VOICEOVER", "Voice Over"),
+                        ],
+                        max_length=20,
+                        verbose_name="Rollup Kind",
+                    ),
+                ),
+                (
+                    "task_type",
+                    models.CharField(max_length=35, verbose_name="Task Type"),
+                ),
+                (
+                    "src_language",
+                    models.CharField(max_length=10, verbose_name="Source Language"),
+                ),
+                (
+                    "tgt_language",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        max_length=10,
+                        verbose_name="Target Language",
+                    ),
+                ),
+                ("day", models.DateField(verbose_name="Day")),
+                ("completed_count", models.IntegerField(default=0)),
+                (
+                    "duration",
+                    models.DurationField(default=datetime.timedelta(0)),
+                ),
+                ("word_count", models.FloatField(default=0)),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="report_rollups",
+                        to="organization.organization",
+                        verbose_name="organization",
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="report_rollups",
+                        to="project.project",
+                        verbose_name="project",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="report_rollups",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Task Assignee",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["organization", "kind"],
+                        name="report_rollup_org_kind_idx",
+                    ),
+                    models.Index(
+                        fields=["project", "kind"],
+                        name="report_rollup_prj_kind_idx",
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=(
+                            "kind",
+                            "organization",
+                            "project",
+                            "task_type",
+                            "src_language",
+                            "tgt_language",
+                            "user",
+                            "day",
+                        ),
+                        name="report_rollup_bucket_unique",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -8,6 +8,7 @@ from translation.metadata import TRANSLATION_LANGUAGE_CHOICES
 from django.contrib.postgres.fields import ArrayField
 from config import frontend_url
 import os
+from datetime import timedelta
 from utils.email_template import invite_email_template
 
 TRANSCRIPT_TYPE = (
@@ -376,3 +377,81 @@ class Invite(models.Model):
         return "".join(
             secrets.choice(string.ascii_uppercase + string.digits) for i in range(10)
         )
+
+
+TRANSCRIPT_ROLLUP = "TRANSCRIPT"
+TRANSLATION_ROLLUP = "TRANSLATION"
+VOICEOVER_ROLLUP = "VOICEOVER"
+
+ROLLUP_KIND_CHOICES = (
+    (TRANSCRIPT_ROLLUP, "Transcript"),
+    (TRANSLATION_ROLLUP, "Translation"),
+    (VOICEOVER_ROLLUP, "Voice Over"),
+)
+
+# Fields identifying the bucket of a rollup, one row per bucket.
+ROLLUP_BUCKET_FIELDS = [
+    "kind",
+    "organization",
+    "project",
+    "task_type",
+    "src_language",
+    "tgt_language",
+    "user",
+    "day",
+]
+
+
+class ReportRollup(models.Model):
+    """
+    Completed transcripts, translations and voice overs summed per
+    organization, project, language pair, task type, assignee and day.
+    Maintained by organization.rollups and read by the report endpoints.
+    """
+
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name="report_rollups",
+        verbose_name="organization",
+    )
+    project = models.ForeignKey(
+        "project.Project",
+        on_delete=models.CASCADE,
+        related_name="report_rollups",
+        verbose_name="project",
+    )
+    kind = models.CharField(
+        choices=ROLLUP_KIND_CHOICES, max_length=20, verbose_name="Rollup Kind"
+    )
+    task_type = models.CharField(max_length=35, verbose_name="Task Type")
+    src_language = models.CharField(max_length=10, verbose_name="Source Language")
+    tgt_language = models.CharField(
+        max_length=10, blank=True, default="", verbose_name="Target Language"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="report_rollups",
+        verbose_name="Task Assignee",
+    )
+    day = models.DateField(verbose_name="Day")
+    completed_count = models.IntegerField(default=0)
+    duration = models.DurationField(default=timedelta(0))
+    word_count = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["organization", "kind"], name="report_rollup_org_kind_idx"
+            ),
+            models.Index(fields=["project", "kind"], name="report_rollup_prj_kind_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=ROLLUP_BUCKET_FIELDS, name="report_rollup_bucket_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return "{} rollup: {} {}".format(self.kind, self.project_id, self.day)
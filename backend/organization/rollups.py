@@ -0,0 +1,199 @@
+"""
+Reporting rollups.
+
+Completed transcripts, translations and voice overs are summed into
+ReportRollup rows keyed by organization, project, kind, task type, language
+pair, assignee and day. A save or delete of a source object refreshes the
+bucket it falls in (see organization.signals), rebuild_report_rollups
+recomputes everything, and the report functions read the rollups so their
+cost doesn't grow with the history of an organization.
+"""
+
+import logging
+from datetime import date, timedelta
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Sum, Value, CharField
+from django.db.models.functions import Cast, TruncDate
+from transcript.models import Transcript, TRANSCRIPTION_EDIT_COMPLETE
+from translation.models import Translation, TRANSLATION_EDIT_COMPLETE
+from voiceover.models import VoiceOver, VOICEOVER_EDIT_COMPLETE
+from .models import (
+    ReportRollup,
+    ROLLUP_BUCKET_FIELDS,
+    TRANSCRIPT_ROLLUP,
+    TRANSLATION_ROLLUP,
+    VOICEOVER_ROLLUP,
+)
+
+# Model, completed status and language lookups of every rollup kind.
+ROLLUP_SOURCES = {
+    TRANSCRIPT_ROLLUP: {
+        "model": Transcript,
+        "status": TRANSCRIPTION_EDIT_COMPLETE,
+        "src_language": "language",
+        "tgt_language": None,
+        "word_count": True,
+    },
+    TRANSLATION_ROLLUP: {
+        "model": Translation,
+        "status": TRANSLATION_EDIT_COMPLETE,
+        "src_language": "video__language",
+        "tgt_language": "target_language",
+        "word_count": True,
+    },
+    VOICEOVER_ROLLUP: {
+        "model": VoiceOver,
+        "status": VOICEOVER_EDIT_COMPLETE,
+        "src_language": "video__language",
+        "tgt_language": "target_language",
+        "word_count": False,
+    },
+}
+
+
+def get_rollup_kind(obj):
+    for kind, source in ROLLUP_SOURCES.items():
+        if isinstance(obj, source["model"]):
+            return kind
+    return None
+
+
+def get_rollup_key(kind, obj):
+    """
+    Returns the bucket a transcript, translation or voice over is summed in,
+    as a JSON serializable dict.
+    """
+    source = ROLLUP_SOURCES[kind]
+    src_language = obj
+    for field in source["src_language"].split("__"):
+        src_language = getattr(src_language, field)
+    return {
+        "organization_id": obj.video.project_id.organization_id_id,
+        "project_id": obj.video.project_id_id,
+        "task_type": obj.task.task_type,
+        "src_language": src_language,
+        "tgt_language": (
+            getattr(obj, source["tgt_language"]) if source["tgt_language"] else ""
+        ),
+        "user_id": obj.task.user_id,
+        "day": obj.created_at.date().isoformat(),
+    }
+
+
+def compute_rollups(kind, queryset):
+    """
+    Groups the completed objects of a queryset into ReportRollup rows.
+    """
+    source = ROLLUP_SOURCES[kind]
+    rows = (
+        queryset.filter(status=source["status"])
+        .values(
+            rollup_organization=F("video__project_id__organization_id"),
+            rollup_project=F("video__project_id"),
+            rollup_task_type=F("task__task_type"),
+            rollup_src_language=F(source["src_language"]),
+            rollup_tgt_language=(
+                F(source["tgt_language"])
+                if source["tgt_language"]
+                else Value("", output_field=CharField())
+            ),
+            rollup_user=F("task__user"),
+            rollup_day=TruncDate("created_at"),
+        )
+        .annotate(
+            rollup_count=Count("pk"),
+            rollup_duration=Sum("video__duration"),
+            rollup_word_count=(
+                Sum(Cast("payload__word_count", FloatField()))
+                if source["word_count"]
+                else Value(0.0, output_field=FloatField())
+            ),
+        )
+        .order_by()
+    )
+    return [
+        ReportRollup(
+            organization_id=row["rollup_organization"],
+            project_id=row["rollup_project"],
+            kind=kind,
+            task_type=row["rollup_task_type"],
+            src_language=row["rollup_src_language"],
+            tgt_language=row["rollup_tgt_language"] or "",
+            user_id=row["rollup_user"],
+            day=row["rollup_day"],
+            completed_count=row["rollup_count"],
+            duration=row["rollup_duration"] or timedelta(0),
+            word_count=row["rollup_word_count"] or 0,
+        )
+        for row in rows
+        # The unique bucket constraint doesn't match NULLs, so every bucket
+        # field must be set for upserts to find the existing row.
+        if row["rollup_organization"] is not None and row["rollup_user"] is not None
+    ]
+
+
+def save_rollups(rollups):
+    """
+    Inserts rollups, updating the rows of buckets that already exist, so
+    concurrent refreshes of a bucket never duplicate it.
+    """
+    return ReportRollup.objects.bulk_create(
+        rollups,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=ROLLUP_BUCKET_FIELDS,
+        update_fields=["completed_count", "duration", "word_count"],
+    )
+
+
+def refresh_rollup_bucket(kind, key):
+    """
+    Recomputes the ReportRollup row of one bucket from its source objects.
+    """
+    source = ROLLUP_SOURCES[kind]
+    day = date.fromisoformat(key["day"])
+    queryset = source["model"].objects.filter(
+        video__project_id=key["project_id"],
+        task__task_type=key["task_type"],
+        task__user=key["user_id"],
+        created_at__date=day,
+        **{source["src_language"]: key["src_language"]},
+    )
+    if source["tgt_language"]:
+        queryset = queryset.filter(**{source["tgt_language"]: key["tgt_language"]})
+    rollups = compute_rollups(kind, queryset)
+    if rollups:
+        save_rollups(rollups)
+    else:
+        # The last completed object of the bucket was deleted or reopened.
+        ReportRollup.objects.filter(
+            kind=kind,
+            organization_id=key["organization_id"],
+            project_id=key["project_id"],
+            task_type=key["task_type"],
+            src_language=key["src_language"],
+            tgt_language=key["tgt_language"],
+            user_id=key["user_id"],
+            day=day,
+        ).delete()
+
+
+def rebuild_report_rollups(organization_id=None):
+    """
+    Recomputes all rollups, or those of one organization.
+    """
+    with transaction.atomic():
+        rollups = ReportRollup.objects.all()
+        if organization_id is not None:
+            rollups = rollups.filter(organization_id=organization_id)
+        rollups.delete()
+        created = 0
+        for kind, source in ROLLUP_SOURCES.items():
+            queryset = source["model"].objects.all()
+            if organization_id is not None:
+                queryset = queryset.filter(
+                    video__project_id__organization_id=organization_id
+                )
+            created += len(save_rollups(compute_rollups(kind, queryset)))
+    logging.info("Rebuilt %s report rollups", created)
+    return created
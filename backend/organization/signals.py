@@ -0,0 +1,130 @@
+import logging
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from task.models import Task
+from transcript.models import Transcript
+from translation.models import Translation
+from voiceover.models import VoiceOver
+from .rollups import ROLLUP_SOURCES, get_rollup_key, get_rollup_kind
+
+
+def get_bucket_fields(kind, instance):
+    """
+    Returns the columns of a source object that decide its rollup bucket,
+    leaving out those read through relations.
+    """
+    source = ROLLUP_SOURCES[kind]
+    fields = ["task_id", "video_id", source["src_language"], source["tgt_language"]]
+    return {
+        field: getattr(instance, field)
+        for field in fields
+        if field and "__" not in field
+    }
+
+
+def schedule_bucket_refresh(kind, key):
+    from .tasks import refresh_report_rollup
+
+    transaction.on_commit(lambda: refresh_report_rollup.delay(kind, key))
+
+
+def remember_status(sender, instance, **kwargs):
+    instance._rollup_status = instance.status
+    instance._rollup_fields = get_bucket_fields(get_rollup_kind(instance), instance)
+
+
+def remember_previous_key(sender, instance, **kwargs):
+    """
+    Reads the bucket a completed object was stored in when a save moves it,
+    so that bucket is refreshed along with the new one.
+    """
+    kind = get_rollup_kind(instance)
+    instance._rollup_previous_key = None
+    if (
+        instance.pk is None
+        or getattr(instance, "_rollup_status", None) != ROLLUP_SOURCES[kind]["status"]
+        or getattr(instance, "_rollup_fields", None)
+        == get_bucket_fields(kind, instance)
+    ):
+        return
+    previous = (
+        sender.objects.filter(pk=instance.pk)
+        .select_related("task", "video__project_id")
+        .first()
+    )
+    if previous is None:
+        return
+    try:
+        instance._rollup_previous_key = get_rollup_key(kind, previous)
+    except Exception as e:
+        logging.info("Error in computing report rollup key %s", str(e))
+
+
+def schedule_rollup_refresh(sender, instance, **kwargs):
+    kind = get_rollup_kind(instance)
+    completed_status = ROLLUP_SOURCES[kind]["status"]
+    # Only saves that complete an object or change a completed one count.
+    if (
+        instance.status != completed_status
+        and getattr(instance, "_rollup_status", None) != completed_status
+    ):
+        return
+    instance._rollup_status = instance.status
+    instance._rollup_fields = get_bucket_fields(kind, instance)
+    try:
+        key = get_rollup_key(kind, instance)
+    except Exception as e:
+        logging.info("Error in computing report rollup key %s", str(e))
+        return
+    schedule_bucket_refresh(kind, key)
+    previous_key = getattr(instance, "_rollup_previous_key", None)
+    if previous_key is not None and previous_key != key:
+        schedule_bucket_refresh(kind, previous_key)
+    instance._rollup_previous_key = None
+
+
+def remember_task_assignment(sender, instance, **kwargs):
+    instance._rollup_user_id = instance.user_id
+    instance._rollup_task_type = instance.task_type
+
+
+def schedule_task_rollup_refresh(sender, instance, created, **kwargs):
+    """
+    Moves the completed objects of a task to their new buckets when the task
+    is reassigned or its type changes.
+    """
+    previous_user_id = getattr(instance, "_rollup_user_id", None)
+    previous_task_type = getattr(instance, "_rollup_task_type", None)
+    remember_task_assignment(sender, instance)
+    if created or (
+        previous_user_id == instance.user_id
+        and previous_task_type == instance.task_type
+    ):
+        return
+    for kind, source in ROLLUP_SOURCES.items():
+        objects = (
+            source["model"]
+            .objects.filter(task=instance, status=source["status"])
+            .select_related("task", "video__project_id")
+        )
+        for obj in objects:
+            try:
+                key = get_rollup_key(kind, obj)
+            except Exception as e:
+                logging.info("Error in computing report rollup key %s", str(e))
+                continue
+            schedule_bucket_refresh(kind, key)
+            schedule_bucket_refresh(
+                kind,
+                {**key, "user_id": previous_user_id, "task_type": previous_task_type},
+            )
+
+
+def connect_rollup_signals():
+    for model in [Transcript, Translation, VoiceOver]:
+        post_init.connect(remember_status, sender=model)
+        pre_save.connect(remember_previous_key, sender=model)
+        post_save.connect(schedule_rollup_refresh, sender=model)
+        post_delete.connect(schedule_rollup_refresh, sender=model)
+    post_init.connect(remember_task_assignment, sender=Task)
+    post_save.connect(schedule_task_rollup_refresh, sender=Task)
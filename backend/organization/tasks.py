@@ -13,6 +13,7 @@ from users.models import User
 from azure.storage.blob import BlobServiceClient
 from datetime import datetime, timedelta
 from config import storage_account_key, connection_string, reports_container_name
+from .rollups import refresh_rollup_bucket, rebuild_report_rollups
 
 
 @shared_task()
@@ -66,3 +67,13 @@ def delete_reports():
             blob_client = container_client.get_blob_client(blob.name)
             blob_client.delete_blob()
             print(f"Deleted: {blob.name}")
+
+
+@shared_task()
+def refresh_report_rollup(kind, key):
+    refresh_rollup_bucket(kind, key)
+
+
+@shared_task(name="rebuild_report_rollups")
+def rebuild_report_rollups_task():
+    rebuild_report_rollups()
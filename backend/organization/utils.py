@@ -3,8 +3,6 @@ from django.db.models import (
     Q,
     Count,
     Avg,
-    F,
-    FloatField,
     BigIntegerField,
     Sum,
     Value,
@@ -12,16 +10,20 @@ from django.db.models import (
     When,
     IntegerField,
 )
-from django.db.models.functions import Cast, Concat
+from django.db.models.functions import Concat
 from datetime import timedelta, datetime
 import os
-from organization.models import Organization
+from organization.models import (
+    Organization,
+    ReportRollup,
+    TRANSCRIPT_ROLLUP,
+    TRANSLATION_ROLLUP,
+)
 from project.models import Project
 from users.models import User
 from project.views import ProjectViewSet
 from project.utils import *
 from django.http import HttpRequest
-import pandas as pd
 from transcript.models import Transcript
 from translation.models import Translation
 from voiceover.models import VoiceOver
@@ -34,6 +36,7 @@ import logging
 from collections import defaultdict
 from django.core.mail import EmailMultiAlternatives
 from utils.email_template import send_email_template_with_attachment
+from utils.streaming_export import write_report_csv, write_records_csv
 
 
 def send_mail_with_report(subject, body, user, csv_file_paths):
@@ -159,16 +162,11 @@ def get_org_report_users_email(org_id, user):
             for report in project_report:
                 report["project"] = {"value": project.title, "label": "Project"}
                 user_data.append(report)
-    columns = [field["label"] for field in user_data[0].values()]
-
-    data = [[field["value"] for field in row.values()] for row in user_data]
     current_time = datetime.now()
-
-    df = pd.DataFrame(data, columns=columns)
     csv_file_path = "organization_user_reports_{}_{}.csv".format(
         org.title, current_time
     )
-    df.to_csv(csv_file_path, index=False)
+    write_report_csv(csv_file_path, user_data)
 
     formatted_date = current_time.strftime("%d %b")
     subject = f"User Reports for Organization - {org.title} - {formatted_date}"
@@ -264,10 +262,8 @@ def get_org_report_languages_email(org_id, user):
     data = get_org_report_languages(org_id, user)
     csv_file_paths = []
 
-    def write_csv_pandas(file_name, data_list):
-        df = pd.DataFrame(data_list)
-        df.to_csv(file_name, index=False)
-        csv_file_paths.append(file_name)
+    def write_csv(file_name, data_list):
+        csv_file_paths.append(write_records_csv(file_name, data_list))
 
     for section in ["transcript_stats", "translation_stats", "voiceover_stats"]:
         if section in data:
@@ -282,15 +278,15 @@ def get_org_report_languages_email(org_id, user):
                     entry[label] = entry[key]["value"]
                     del entry[key]
     current_time = datetime.now()
-    write_csv_pandas(
+    write_csv(
         "transcript_stats_{}_{}.csv".format(org_id, current_time),
         data["transcript_stats"],
     )
-    write_csv_pandas(
+    write_csv(
         "translation_stats_{}_{}.csv".format(org_id, current_time),
         data["translation_stats"],
     )
-    write_csv_pandas(
+    write_csv(
         "voiceover_stats_{}_{}.csv".format(org_id, current_time),
         data["voiceover_stats"],
     )
@@ -345,19 +341,12 @@ def format_completion_time(completion_time):
     return full_time
 
 
-def get_org_report_tasks(
+def filter_org_report_tasks(
     pk,
-    user,
-    limit,
-    offset,
     taskStartDate="2020-01-01",
     taskEndDate=datetime.now().date(),
     filter_dict={},
 ):
-    if limit != "All" and limit != "undefined":
-        start_offset = (int(offset) - 1) * int(limit)
-        end_offset = start_offset + int(limit)
-
     if "src_language" in filter_dict and len(filter_dict["src_language"]):
         src_lang_list = []
         for lang in filter_dict["src_language"]:
@@ -372,7 +361,7 @@ def get_org_report_tasks(
     task_orgs = Task.objects.filter(
         video__in=org_videos, created_at__date__range=(taskStartDate, taskEndDate)
     ).order_by("-created_at")
-    total_count = len(task_orgs)
+    total_count = task_orgs.count()
     if "task_type" in filter_dict and len(filter_dict["task_type"]):
         task_orgs = task_orgs.filter(task_type__in=filter_dict["task_type"])
     if "target_language" in filter_dict and len(filter_dict["target_language"]):
@@ -385,10 +374,10 @@ def get_org_report_tasks(
     if "status" in filter_dict and len(filter_dict["status"]):
         task_orgs = task_orgs.filter(status__in=filter_dict["status"])
 
-    if limit != "All" and limit != "undefined":
-        task_orgs = task_orgs[start_offset:end_offset]
+    return task_orgs, total_count
 
-    tasks_list = []
+
+def iter_org_report_tasks(task_orgs):
     for task in task_orgs:
         if task.description is not None:
             description = task.description
@@ -452,7 +441,7 @@ def get_org_report_tasks(
         except:
             word_diff_percent = 0
         is_active = task.is_active
-        tasks_list.append(
+        yield (
             {
                 "task_id": {
                     "value": task.id,
@@ -540,21 +529,43 @@ def get_org_report_tasks(
                 },
             }
         )
+
+
+def get_org_report_tasks(
+    pk,
+    user,
+    limit,
+    offset,
+    taskStartDate="2020-01-01",
+    taskEndDate=datetime.now().date(),
+    filter_dict={},
+):
+    if limit != "All" and limit != "undefined":
+        start_offset = (int(offset) - 1) * int(limit)
+        end_offset = start_offset + int(limit)
+
+    task_orgs, total_count = filter_org_report_tasks(
+        pk, taskStartDate, taskEndDate, filter_dict
+    )
+    task_orgs = task_orgs.select_related("video", "video__project_id", "user")
+    if limit != "All" and limit != "undefined":
+        task_orgs = task_orgs[start_offset:end_offset]
+
+    tasks_list = list(iter_org_report_tasks(task_orgs))
     return tasks_list, total_count
 
 
 def get_org_report_tasks_email(org_id, user, taskStartDate, taskEndDate):
     org = Organization.objects.get(pk=org_id)
-    limit = len(Task.objects.filter(video__project_id__organization_id__id=org.id))
-    tasks_list, _ = get_org_report_tasks(org_id, user, limit, 1, taskStartDate, taskEndDate)
-    columns = [field["label"] for field in tasks_list[0].values()]
-
-    data = [[field["value"] for field in row.values()] for row in tasks_list]
+    task_orgs, _ = filter_org_report_tasks(org_id, taskStartDate, taskEndDate)
+    task_orgs = task_orgs.select_related("video", "video__project_id", "user")
     current_time = datetime.now()
 
-    df = pd.DataFrame(data, columns=columns)
+    # Rows are written as the tasks are read instead of being collected first.
     csv_file_path = "organization_tasks_reports_{}_{}.csv".format(org_id, current_time)
-    df.to_csv(csv_file_path, index=False)
+    write_report_csv(
+        csv_file_path, iter_org_report_tasks(task_orgs.iterator(chunk_size=500))
+    )
 
     formatted_date = current_time.strftime("%d %b")
     subject = f"Tasks Reports for Organization - {org.title} - {formatted_date}"
@@ -579,71 +590,41 @@ def get_org_report_projects(pk, user, limit, offset):
 
     project_stats = org_projects.annotate(num_videos=Count("video"))
 
-    video_duration_transcripts = org_projects.annotate(
-        total_transcriptions=Sum(
-            "video__duration",
-            filter=Q(video__transcripts__status="TRANSCRIPTION_EDIT_COMPLETE"),
-        )
-    )
-
-    video_duration_translations = org_projects.annotate(
-        total_translations=Sum(
-            "video__duration",
-            filter=Q(video__translation_video__status="TRANSLATION_EDIT_COMPLETE"),
+    # Durations and word counts are read from the report rollups.
+    project_rollups = {
+        rollup["project_id"]: rollup
+        for rollup in ReportRollup.objects.filter(
+            project_id__in=[project["id"] for project in org_projects]
         )
-    )
-
-    word_count_transcripts = org_projects.annotate(
-        word_count=Sum(
-            Cast(F("video__transcripts__payload__word_count"), FloatField()),
-            filter=Q(video__transcripts__status__in=["TRANSCRIPTION_EDIT_COMPLETE"]),
-        )
-    )
-
-    word_count_translations = org_projects.annotate(
-        word_count=Sum(
-            Cast(F("video__translation_video__payload__word_count"), FloatField()),
-            filter=Q(
-                video__translation_video__status__in=["TRANSLATION_EDIT_COMPLETE"]
+        .values("project_id")
+        .annotate(
+            total_transcriptions=Sum("duration", filter=Q(kind=TRANSCRIPT_ROLLUP)),
+            total_translations=Sum("duration", filter=Q(kind=TRANSLATION_ROLLUP)),
+            word_count=Sum(
+                "word_count", filter=Q(kind__in=[TRANSCRIPT_ROLLUP, TRANSLATION_ROLLUP])
             ),
         )
-    )
+        .order_by()
+    }
 
     project_data = []
-    idx = 0
     for elem in project_stats:
         manager_names = Project.objects.get(pk=elem["id"]).managers.all()
         manager_list = []
         for manager_name in manager_names:
             manager_list.append(manager_name.first_name + " " + manager_name.last_name)
+        rollup = project_rollups.get(elem["id"], {})
         transcript_duration = (
             None
-            if video_duration_transcripts[idx]["total_transcriptions"] is None
-            else round(
-                video_duration_transcripts[idx]["total_transcriptions"].total_seconds()
-                / 3600,
-                3,
-            )
-        )
-        transcript_word_count = (
-            0
-            if word_count_transcripts[idx]["word_count"] is None
-            else word_count_transcripts[idx]["word_count"]
+            if rollup.get("total_transcriptions") is None
+            else round(rollup["total_transcriptions"].total_seconds() / 3600, 3)
         )
         translation_duration = (
             None
-            if video_duration_translations[idx]["total_translations"] is None
-            else round(
-                video_duration_translations[idx]["total_translations"].total_seconds()
-                / 3600,
-                3,
-            )
-        )
-        translation_word_count = (
-            0
-            if word_count_translations[idx]["word_count"] is None
-            else word_count_translations[idx]["word_count"]
+            if rollup.get("total_translations") is None
+            else round(rollup["total_translations"].total_seconds() / 3600, 3)
         )
+        word_count = rollup.get("word_count") or 0
         project_dict = {
             "id": {"value": elem["id"], "label": "Id", "viewColumns": False},
             "title": {"value": elem["title"], "label": "Title", "viewColumns": False},
@@ -662,29 +643,23 @@ def get_org_report_projects(pk, user, limit, offset):
                 "label": "Duration (Hours)",
             },
             "total_word_count": {
-                "value": int(transcript_word_count + translation_word_count),
+                "value": int(word_count),
                 "label": "Total Word Count",
             },
         }
         project_data.append(project_dict)
-        idx += 1
     return project_data, total_count
 
 
 def get_org_report_projects_email(org_id, user):
     org = Organization.objects.get(pk=org_id)
-    projects_count = len(Project.objects.filter(organization_id=org.id))
-    projects_list, _ = get_org_report_projects(org_id, user, projects_count, 1)
-    columns = [field["label"] for field in projects_list[0].values()]
-
-    data = [[field["value"] for field in row.values()] for row in projects_list]
+    projects_list, _ = get_org_report_projects(org_id, user, "All", 1)
     current_time = datetime.now()
 
-    df = pd.DataFrame(data, columns=columns)
     csv_file_path = "organization_projects_reports_{}_{}.csv".format(
         org_id, current_time
     )
-    df.to_csv(csv_file_path, index=False)
+    write_report_csv(csv_file_path, projects_list)
 
     formatted_date = current_time.strftime("%d %b")
     subject = f"Projects Reports for Organization - {org.title} - {formatted_date}"
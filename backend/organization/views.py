@@ -6,7 +6,13 @@ from rest_framework import status
 from rest_framework.views import APIView
 from users.serializers import UserFetchSerializer
 from users.models import User
-from .models import Organization, OnboardOrganisationAccount
+from .models import (
+    Organization,
+    OnboardOrganisationAccount,
+    ReportRollup,
+    TRANSCRIPT_ROLLUP,
+    TRANSLATION_ROLLUP,
+)
 from .serializers import OrganizationSerializer, OnboardingOrgAccountSerializer
 from .decorators import (
     is_organization_owner,
@@ -24,16 +30,11 @@ from django.db.models import Q, Count, Avg, F, FloatField, BigIntegerField, Sum,
 from django.db.models.functions import Cast, Concat
 from datetime import timedelta, datetime
 from video.models import Video
-from transcript.models import Transcript
-from translation.models import Translation
 import json
 from translation.metadata import TRANSLATION_LANGUAGE_CHOICES
 from django.http import HttpRequest
-from django.db.models import Q
 import logging
 import math
-from django.db.models import Value
-from django.db.models.functions import Concat
 from project.utils import *
 from .tasks import *
 from .utils import *
@@ -405,6 +406,16 @@ class OrganizationViewSet(viewsets.ModelViewSet):
                 type=openapi.TYPE_OBJECT,
                 required=False,
             ),
+            openapi.Parameter(
+                "cursor",
+                openapi.IN_QUERY,
+                description=(
+                    "Cursor of the page to fetch, returned as next_cursor by the"
+                    " previous page. Pass an empty cursor for the first page."
+                ),
+                type=openapi.TYPE_STRING,
+                required=False,
+            ),
         ],
         responses={200: "List of org tasks"},
     )
@@ -428,6 +439,9 @@ class OrganizationViewSet(viewsets.ModelViewSet):
             sort_by = request.query_params.get("sort_by", "updated_at")
             reverse = request.query_params.get("reverse", "True")
             reverse = reverse.lower() == "true"
+            cursor = request.query_params.get("cursor")
+            if sort_by not in TASK_KEYSET_SORT_FIELDS:
+                cursor = None
         except Organization.DoesNotExist:
             return Response(
                 {"message": "Organization does not exist"},
@@ -438,6 +452,7 @@ class OrganizationViewSet(viewsets.ModelViewSet):
         src_languages = set()
         target_languages = set()
         total_count = 0
+        next_cursor = None
         if (
             organization.organization_owners.filter(id=user.id).exists()
             or user.role == "ADMIN"
@@ -459,13 +474,25 @@ class OrganizationViewSet(viewsets.ModelViewSet):
 
             # filter data based on filter parameters
             all_tasks = task_filter_query(all_tasks, filter_dict)
-            total_count = len(all_tasks)
-            total_pages = math.ceil(total_count / int(limit))
-            if offset > total_pages - 1:
-                offset = 0
-            start = offset * int(limit)
-            end = start + int(limit) - 1
-            tasks = all_tasks[start:end]
+            total_count = all_tasks.count()
+            all_tasks = select_task_list_related(all_tasks)
+            if cursor is not None:
+                try:
+                    tasks, next_cursor = keyset_paginate_tasks(
+                        all_tasks, sort_by, limit, cursor
+                    )
+                except InvalidTaskCursor as e:
+                    return Response(
+                        {"message": str(e)},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+            else:
+                total_pages = math.ceil(total_count / int(limit))
+                if offset > total_pages - 1:
+                    offset = 0
+                start = offset * int(limit)
+                end = start + int(limit) - 1
+                tasks = all_tasks[start:end]
             tasks_serializer = TaskSerializer(tasks, many=True)
             tasks_list = json.loads(json.dumps(tasks_serializer.data))
             for task in tasks_list:
@@ -584,13 +611,27 @@ class OrganizationViewSet(viewsets.ModelViewSet):
                 all_tasks_in_projects = task_filter_query(
                     all_tasks_in_projects, filter_dict
                 )
-                total_count = len(all_tasks_in_projects)
-                total_pages = math.ceil(total_count / int(limit))
-                if offset > total_pages:
-                    offset = 0
-                start = offset * int(limit)
-                end = start + int(limit)
-                tasks_in_projects = all_tasks_in_projects[start:end]
+                total_count = all_tasks_in_projects.count()
+                all_tasks_in_projects = select_task_list_related(
+                    all_tasks_in_projects
+                )
+                if cursor is not None:
+                    try:
+                        tasks_in_projects, next_cursor = keyset_paginate_tasks(
+                            all_tasks_in_projects, sort_by, limit, cursor
+                        )
+                    except InvalidTaskCursor as e:
+                        return Response(
+                            {"message": str(e)},
+                            status=status.HTTP_400_BAD_REQUEST,
+                        )
+                else:
+                    total_pages = math.ceil(total_count / int(limit))
+                    if offset > total_pages:
+                        offset = 0
+                    start = offset * int(limit)
+                    end = start + int(limit)
+                    tasks_in_projects = all_tasks_in_projects[start:end]
 
                 tasks_list = []
                 for task_o in tasks_in_projects:
@@ -670,13 +711,25 @@ class OrganizationViewSet(viewsets.ModelViewSet):
 
                 # filter data based on filter parameters
                 all_tasks = task_filter_query(all_tasks, filter_dict)
-                total_count = len(all_tasks)
-                total_pages = math.ceil(total_count / int(limit))
-                if offset > total_pages:
-                    offset = 0
-                start = offset * int(limit)
-                end = start + int(limit)
-                tasks = all_tasks[start:end]
+                total_count = all_tasks.count()
+                all_tasks = select_task_list_related(all_tasks)
+                if cursor is not None:
+                    try:
+                        tasks, next_cursor = keyset_paginate_tasks(
+                            all_tasks, sort_by, limit, cursor
+                        )
+                    except InvalidTaskCursor as e:
+                        return Response(
+                            {"message": str(e)},
+                            status=status.HTTP_400_BAD_REQUEST,
+                        )
+                else:
+                    total_pages = math.ceil(total_count / int(limit))
+                    if offset > total_pages:
+                        offset = 0
+                    start = offset * int(limit)
+                    end = start + int(limit)
+                    tasks = all_tasks[start:end]
                 tasks_serializer = TaskSerializer(tasks, many=True)
                 tasks_list = json.loads(json.dumps(tasks_serializer.data))
                 for task in tasks_list:
@@ -720,15 +773,15 @@ class OrganizationViewSet(viewsets.ModelViewSet):
         target_languages_list = list(target_languages)
         if "-" in target_languages_list:
             target_languages_list.remove("-")
-        return Response(
-            {
-                "total_count": total_count,
-                "tasks_list": tasks_list,
-                "src_languages_list": sorted(list(src_languages)),
-                "target_languages_list": sorted(target_languages_list),
-            },
-            status=status.HTTP_200_OK,
-        )
+        response = {
+            "total_count": total_count,
+            "tasks_list": tasks_list,
+            "src_languages_list": sorted(list(src_languages)),
+            "target_languages_list": sorted(target_languages_list),
+        }
+        if cursor is not None:
+            response["next_cursor"] = next_cursor
+        return Response(response, status=status.HTTP_200_OK)
 
     @swagger_auto_schema(method="get", responses={200: "Success"})
     @action(
@@ -991,45 +1044,28 @@ class OrganizationViewSet(viewsets.ModelViewSet):
             )
             .exclude(tasks_assigned_count=0)
         )
-        user_statistics = all_user_statistics[start:end]
-        total_count = len(all_user_statistics)
-
-        user_data = []
-        word_count_idx = 0
-        for elem in user_statistics:
-            transcript_word_count = User.objects.filter(
-                transcript__video__project_id__organization_id__id=pk,
-                transcript__status="TRANSCRIPTION_EDIT_COMPLETE",
-                transcript__task__user__email=elem["mail"],
-            ).aggregate(
-                transcript_word_count=Sum(
-                    Cast("transcript__payload__word_count", FloatField())
-                )
-            )
-
-            transcript_result = (
-                transcript_word_count["transcript_word_count"]
-                if transcript_word_count["transcript_word_count"] is not None
-                else 0.0
+        user_statistics = list(all_user_statistics[start:end])
+        total_count = all_user_statistics.count()
+
+        # Word counts are read from the report rollups.
+        word_counts = {
+            (rollup["user__email"], rollup["kind"]): rollup["word_count"]
+            for rollup in ReportRollup.objects.filter(
+                organization_id=pk,
+                kind__in=[TRANSCRIPT_ROLLUP, TRANSLATION_ROLLUP],
+                user__email__in=[elem["mail"] for elem in user_statistics],
             )
-
-            translation_word_count = User.objects.filter(
-                translation__video__project_id__organization_id__id=pk,
-                translation__status="TRANSLATION_EDIT_COMPLETE",
-                translation__task__user__email=elem["mail"],
-            ).aggregate(
-                translation_word_count=Sum(
-                    Cast("translation__payload__word_count", FloatField())
-                )
+            .values("user__email", "kind")
+            .annotate(word_count=Sum("word_count"))
+            .order_by()
+        }
+        for elem in user_statistics:
+            elem["word_count_translation"] = int(
+                word_counts.get((elem["mail"], TRANSLATION_ROLLUP)) or 0
             )
-
-            translation_result = (
-                translation_word_count["translation_word_count"]
-                if translation_word_count["translation_word_count"] is not None
-                else 0.0
+            elem["word_count_transcript"] = int(
+                word_counts.get((elem["mail"], TRANSCRIPT_ROLLUP)) or 0
             )
-            elem["word_count_translation"] = int(translation_result)
-            elem["word_count_transcript"] = int(transcript_result)
 
         user_data = []
         for elem in user_statistics:
@@ -1199,25 +1235,19 @@ class OrganizationViewSet(viewsets.ModelViewSet):
             return Response(
                 {"message": "Organization not found"}, status=status.HTTP_404_NOT_FOUND
             )
-        org_videos = Video.objects.filter(project_id__organization_id=pk)
-        org_transcriptions = (
-            Transcript.objects.filter(video__in=org_videos)
-            .filter(status="TRANSCRIPTION_EDIT_COMPLETE")
-            .values("language")
-        )
-        transcript_statistics = org_transcriptions.annotate(
-            total_duration=Sum(F("video__duration"))
-        ).order_by("-total_duration")
-        org_translations = (
-            Translation.objects.filter(video__in=org_videos)
-            .filter(status="TRANSLATION_EDIT_COMPLETE")
-            .values(
-                src_language=F("video__language"), tgt_language=F("target_language")
-            )
+        # Durations are read from the report rollups.
+        org_rollups = ReportRollup.objects.filter(organization_id=pk)
+        transcript_statistics = (
+            org_rollups.filter(kind=TRANSCRIPT_ROLLUP)
+            .values(language=F("src_language"))
+            .annotate(total_duration=Sum("duration"))
+            .order_by("-total_duration")
         )
         translation_statistics = (
-            org_translations.annotate(transcripts_translated=Count("id"))
-            .annotate(translation_duration=Sum(F("video__duration")))
+            org_rollups.filter(kind=TRANSLATION_ROLLUP)
+            .values("src_language", "tgt_language")
+            .annotate(transcripts_translated=Sum("completed_count"))
+            .annotate(translation_duration=Sum("duration"))
             .order_by("-translation_duration")
         )
 
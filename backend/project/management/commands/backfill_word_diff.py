@@ -0,0 +1,77 @@
+import json
+from django.core.management.base import BaseCommand
+from organization.rollups import (
+    get_rollup_key,
+    get_rollup_kind,
+    refresh_rollup_bucket,
+)
+from project.utils import set_payload_word_diff
+from transcript.models import (
+    Transcript,
+    TRANSCRIPTION_EDIT_COMPLETE,
+    TRANSCRIPTION_SELECT_SOURCE,
+)
+from translation.models import (
+    Translation,
+    TRANSLATION_EDIT_COMPLETE,
+    TRANSLATION_SELECT_SOURCE,
+)
+
+
+class Command(BaseCommand):
+    help = "Stores the word diff used by user reports in completed transcripts and translations."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of objects loaded from the database at a time.",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recompute the word diff of objects that already have one.",
+        )
+
+    def backfill(self, queryset, select_source_status, text_key, batch_size):
+        if not self.recompute:
+            queryset = queryset.exclude(payload__has_key="word_diff")
+        updated = 0
+        buckets = set()
+        for obj in queryset.select_related("task", "video__project_id").iterator(
+            chunk_size=batch_size
+        ):
+            set_payload_word_diff(obj, select_source_status, text_key)
+            # Saved with update() so updated_at and the save hooks don't run.
+            type(obj).objects.filter(pk=obj.pk).update(payload=obj.payload)
+            kind = get_rollup_kind(obj)
+            buckets.add((kind, json.dumps(get_rollup_key(kind, obj), sort_keys=True)))
+            updated += 1
+            if updated % 1000 == 0:
+                self.stdout.write(f"Updated {updated} {queryset.model.__name__}s")
+        # The save hooks would have refreshed the report rollups the word
+        # counts are summed in.
+        for kind, key in buckets:
+            refresh_rollup_bucket(kind, json.loads(key))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Updated {updated} {queryset.model.__name__}s"
+                f" and {len(buckets)} report rollups"
+            )
+        )
+
+    def handle(self, *args, **options):
+        self.recompute = options["all"]
+        self.backfill(
+            Transcript.objects.filter(status=TRANSCRIPTION_EDIT_COMPLETE),
+            TRANSCRIPTION_SELECT_SOURCE,
+            "text",
+            options["batch_size"],
+        )
+        self.backfill(
+            Translation.objects.filter(status=TRANSLATION_EDIT_COMPLETE),
+            TRANSLATION_SELECT_SOURCE,
+            "target_text",
+            options["batch_size"],
+        )
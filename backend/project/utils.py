@@ -11,13 +11,24 @@ from django.db.models import (
     Case,
     When,
     IntegerField,
+    CharField,
+    OuterRef,
+    Subquery,
 )
 from django.db.models.functions import Cast, Concat, Extract
 from datetime import timedelta, datetime
-import pandas as pd
 from project.models import Project
+from organization.models import (
+    ReportRollup,
+    TRANSCRIPT_ROLLUP,
+    TRANSLATION_ROLLUP,
+    VOICEOVER_ROLLUP,
+)
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.mail import send_mail, EmailMessage
+import base64
+import json
 import logging
 import os
 from translation.metadata import TRANSLATION_LANGUAGE_CHOICES
@@ -25,9 +36,9 @@ from voiceover.metadata import VOICEOVER_LANGUAGE_CHOICES
 from transcript.models import Transcript
 from translation.models import Translation
 from voiceover.models import VoiceOver
-from video.models import Video
 from azure.storage.blob import BlobServiceClient
 from config import storage_account_key, connection_string, reports_container_name
+from utils.streaming_export import write_report_csv, write_records_csv
 from django.conf import settings
 
 
@@ -42,6 +53,50 @@ def count_word_differences(text1, text2):
     words2 = set(text2.split())
     return len(words1.symmetric_difference(words2))
 
+
+def count_payload_word_differences(payload1, payload2, text_key):
+    """
+    Sums the word differences of matching segments of two payloads, up to
+    the first segment missing from either of them.
+    """
+    word_diff = 0
+    try:
+        payload_len = len(payload2) if len(payload2) > len(payload1) else len(payload1)
+        for seg_no in range(0, payload_len):
+            word_diff += count_word_differences(
+                payload1[seg_no][text_key], payload2[seg_no][text_key]
+            )
+    except:
+        pass
+    return word_diff
+
+
+def set_payload_word_diff(obj, select_source_status, text_key):
+    """
+    Stores in the payload of a completed transcript or translation the word
+    differences from the source the assignee selected, so reports can sum
+    them in SQL instead of loading both payloads.
+    """
+    if type(obj.payload) != dict or "payload" not in obj.payload:
+        return
+    source_payload = (
+        type(obj)
+        .objects.filter(
+            video_id=obj.video_id,
+            status=select_source_status,
+            task__user_id=obj.task.user_id,
+        )
+        .order_by("-created_at")
+        .values_list("payload", flat=True)
+        .first()
+    )
+    if type(source_payload) == dict and "payload" in source_payload:
+        obj.payload["word_diff"] = count_payload_word_differences(
+            obj.payload["payload"], source_payload["payload"], text_key
+        )
+    else:
+        obj.payload["word_diff"] = 0
+
 def get_reports_for_users(pk, start, end):
     subquery = (
         User.objects.filter(projects__pk=pk, has_accepted_invite=True)
@@ -100,89 +155,53 @@ def get_reports_for_users(pk, start, end):
         )
         .exclude(tasks_assigned_count=0)
     ).order_by("mail")
-    total_count = len(all_user_statistics)
-    user_statistics = all_user_statistics[start:end]
+    total_count = all_user_statistics.count()
+    user_statistics = list(all_user_statistics[start:end])
+    mails = [elem["mail"] for elem in user_statistics]
+
+    # Word counts and word diffs are stored in the payload when a transcript
+    # or translation is completed, see set_payload_word_diff.
+    transcript_stats = {
+        stats["task__user__email"]: stats
+        for stats in Transcript.objects.filter(
+            video__project_id__id=pk,
+            status="TRANSCRIPTION_EDIT_COMPLETE",
+            task__user__email__in=mails,
+            user__isnull=False,
+        )
+        .values("task__user__email")
+        .annotate(
+            word_count=Sum(Cast("payload__word_count", FloatField())),
+            word_diff=Sum(Cast("payload__word_diff", FloatField())),
+        )
+        .order_by()
+    }
+    translation_stats = {
+        stats["task__user__email"]: stats
+        for stats in Translation.objects.filter(
+            video__project_id__id=pk,
+            status="TRANSLATION_EDIT_COMPLETE",
+            task__user__email__in=mails,
+            user__isnull=False,
+        )
+        .values("task__user__email")
+        .annotate(
+            word_count=Sum(Cast("payload__word_count", FloatField())),
+            word_diff=Sum(Cast("payload__word_diff", FloatField())),
+        )
+        .order_by()
+    }
 
     user_data = []
 
     for elem in user_statistics:
-        transcript_word_count = User.objects.filter(
-            transcript__video__project_id__id=pk,
-            transcript__status="TRANSCRIPTION_EDIT_COMPLETE",
-            transcript__task__user__email=elem["mail"],
-        ).aggregate(
-            transcript_word_count=Sum(
-                Cast("transcript__payload__word_count", FloatField())
-            )
-        )
+        transcript = transcript_stats.get(elem["mail"], {})
+        translation = translation_stats.get(elem["mail"], {})
+        transcript_result = transcript.get("word_count") or 0.0
+        transcript_word_diff = transcript.get("word_diff") or 0
+        translation_result = translation.get("word_count") or 0.0
+        translation_word_diff = translation.get("word_diff") or 0
 
-        user_transcription_complete_payloads = User.objects.filter(
-            transcript__video__project_id__id=pk,
-            transcript__status="TRANSCRIPTION_EDIT_COMPLETE",
-            transcript__task__user__email=elem["mail"],
-        ).values_list("transcript__video", "transcript__payload")
-        transcription_complete_payloads = {video_id: payload["payload"] for video_id, payload in user_transcription_complete_payloads if "payload" in payload}
-        user_transcription_selectsource_payloads = User.objects.filter(
-            transcript__video__project_id__id=pk,
-            transcript__status="TRANSCRIPTION_SELECT_SOURCE",
-            transcript__task__user__email=elem["mail"],
-        ).values_list("transcript__video", "transcript__payload")
-        transcription_selectsource_payloads = {video_id: payload["payload"] for video_id, payload in user_transcription_selectsource_payloads if "payload" in payload}
-
-        transcript_word_diff = 0
-        for video_id, payload1 in transcription_complete_payloads.items():
-            try:
-                payload2 = transcription_selectsource_payloads[video_id]
-                payload_len = len(payload2) if len(payload2) > len(payload1) else len(payload1)
-                for seg_no in range(0, payload_len):
-                    transcript_word_diff += count_word_differences(payload1[seg_no]['text'], payload2[seg_no]['text'])
-            except:
-                continue
-
-        transcript_result = (
-            transcript_word_count["transcript_word_count"]
-            if transcript_word_count["transcript_word_count"] is not None
-            else 0.0
-        )
-
-        translation_word_count = User.objects.filter(
-            translation__video__project_id__id=pk,
-            translation__status="TRANSLATION_EDIT_COMPLETE",
-            translation__task__user__email=elem["mail"],
-        ).aggregate(
-            translation_word_count=Sum(
-                Cast("translation__payload__word_count", FloatField())
-            )
-        )
-
-        user_translation_complete_payloads = User.objects.filter(
-            translation__video__project_id__id=pk,
-            translation__status="TRANSLATION_EDIT_COMPLETE",
-            translation__task__user__email=elem["mail"],
-        ).values_list("translation__video", "translation__payload")
-        translation_complete_payloads = {video_id: payload["payload"] for video_id, payload in user_translation_complete_payloads if "payload" in payload}
-        user_translation_selectsource_payloads = User.objects.filter(
-            translation__video__project_id__id=pk,
-            translation__status="TRANSLATION_SELECT_SOURCE",
-            translation__task__user__email=elem["mail"],
-        ).values_list("translation__video", "translation__payload")
-        translation_selectsource_payloads = {video_id: payload["payload"] for video_id, payload in user_translation_selectsource_payloads if "payload" in payload}
-
-        translation_word_diff = 0
-        for video_id, payload1 in translation_complete_payloads.items():
-            try:
-                payload2 = translation_selectsource_payloads[video_id]
-                payload_len = len(payload2) if len(payload2) > len(payload1) else len(payload1)
-                for seg_no in range(0, payload_len):
-                    translation_word_diff += count_word_differences(payload1[seg_no]['target_text'], payload2[seg_no]['target_text'])
-            except:
-                continue
-
-        translation_result = (
-            translation_word_count["translation_word_count"]
-            if translation_word_count["translation_word_count"] is not None
-            else 0.0
-        )
         elem["word_count_translation"] = int(translation_result)
         elem["word_count_transcript"] = int(transcript_result)
         try:
@@ -283,37 +302,29 @@ def send_mail_with_report(subject, body, user, csv_file_paths):
 
 
 def get_reports_for_languages(pk):
-    prj_videos = Video.objects.filter(project_id=pk)
-    prj_transcriptions = (
-        Transcript.objects.filter(video__in=prj_videos)
-        .filter(status="TRANSCRIPTION_EDIT_COMPLETE")
-        .values("language")
-    )
+    # Sums are read from the report rollups, see organization.rollups.
+    prj_rollups = ReportRollup.objects.filter(project_id=pk)
     transcript_statistics = (
-        prj_transcriptions.annotate(transcripts=Count("id"))
-        .annotate(total_duration=Sum(F("video__duration")))
-        .annotate(word_count=Sum(Cast(F("payload__word_count"), FloatField())))
+        prj_rollups.filter(kind=TRANSCRIPT_ROLLUP)
+        .values(language=F("src_language"))
+        .annotate(transcripts=Sum("completed_count"))
+        .annotate(total_duration=Sum("duration"))
+        .annotate(word_count=Sum("word_count"))
         .order_by("-total_duration")
     )
-    prj_translations = (
-        Translation.objects.filter(video__in=prj_videos)
-        .filter(status="TRANSLATION_EDIT_COMPLETE")
-        .values(src_language=F("video__language"), tgt_language=F("target_language"))
-    )
     translation_statistics = (
-        prj_translations.annotate(transcripts_translated=Count("id"))
-        .annotate(translation_duration=Sum(F("video__duration")))
-        .annotate(word_count=Sum(Cast(F("payload__word_count"), FloatField())))
+        prj_rollups.filter(kind=TRANSLATION_ROLLUP)
+        .values("src_language", "tgt_language")
+        .annotate(transcripts_translated=Sum("completed_count"))
+        .annotate(translation_duration=Sum("duration"))
+        .annotate(word_count=Sum("word_count"))
         .order_by("-translation_duration")
     )
-    prj_voiceovers = (
-        VoiceOver.objects.filter(video__in=prj_videos)
-        .filter(status="VOICEOVER_EDIT_COMPLETE")
-        .values(src_language=F("video__language"), tgt_language=F("target_language"))
-    )
     voiceover_statistics = (
-        prj_voiceovers.annotate(voiceovers_completed=Count("id"))
-        .annotate(voiceover_duration=Sum(F("video__duration")))
+        prj_rollups.filter(kind=VOICEOVER_ROLLUP)
+        .values("src_language", "tgt_language")
+        .annotate(voiceovers_completed=Sum("completed_count"))
+        .annotate(voiceover_duration=Sum("duration"))
         .order_by("-voiceover_duration")
     )
 
@@ -407,17 +418,11 @@ def get_project_report_users_email(project_id, user):
     end = len(User.objects.filter(projects__pk=project_id, has_accepted_invite=True))
     user_data, _ = get_reports_for_users(project_id, start, end)
     project = Project.objects.get(pk=project_id)
-    columns = [field["label"] for field in user_data[0].values()]
-
-    # Extract data values from the 'value' field of each dictionary
-    data = [[field["value"] for field in row.values()] for row in user_data]
     current_time = datetime.now()
 
-    # Create a DataFrame
-    df = pd.DataFrame(data, columns=columns)
     csv_file_path = "project_user_reports_{}_{}.csv".format(project_id, current_time)
-    # Write DataFrame to a CSV file
-    df.to_csv(csv_file_path, index=False)
+    # Write the rows to a CSV file
+    write_report_csv(csv_file_path, user_data)
 
     formatted_date = current_time.strftime("%d %b")
     subject = f"User Reports for Project - {project.title} - {formatted_date}"
@@ -431,10 +436,8 @@ def get_project_report_languages_email(project_id, user):
 
     csv_file_paths = []
 
-    def write_csv_pandas(file_name, data_list):
-        df = pd.DataFrame(data_list)
-        df.to_csv(file_name, index=False)
-        csv_file_paths.append(file_name)
+    def write_csv(file_name, data_list):
+        csv_file_paths.append(write_records_csv(file_name, data_list))
 
     for section in ["transcript_stats", "translation_stats", "voiceover_stats"]:
         if section in data:
@@ -449,16 +452,16 @@ def get_project_report_languages_email(project_id, user):
                     entry[label] = entry[key]["value"]
                     del entry[key]
     current_time = datetime.now()
-    # Write CSV files using pandas
-    write_csv_pandas(
+    # Write CSV files
+    write_csv(
         "transcript_stats_{}_{}.csv".format(project_id, current_time),
         data["transcript_stats"],
     )
-    write_csv_pandas(
+    write_csv(
         "translation_stats_{}_{}.csv".format(project_id, current_time),
         data["translation_stats"],
     )
-    write_csv_pandas(
+    write_csv(
         "voiceover_stats_{}_{}.csv".format(project_id, current_time),
         data["voiceover_stats"],
     )
@@ -524,3 +527,112 @@ def task_search_by_description(all_tasks, search_dict):
             | Q(description__icontains=search_dict["description"])
         )
     return all_tasks
+
+
+TASK_KEYSET_SORT_FIELDS = ["updated_at", "created_at", "id"]
+
+
+def annotate_source_type(all_tasks):
+    """
+    Annotates the type of the transcript, translation or voice over of every
+    task as source_type_value, read by Task.get_source_type.
+    """
+    transcript_type = (
+        Transcript.objects.filter(task=OuterRef("pk"))
+        .order_by("pk")
+        .values("transcript_type")[:1]
+    )
+    translation_type = (
+        Translation.objects.filter(task=OuterRef("pk"))
+        .order_by("pk")
+        .values("translation_type")[:1]
+    )
+    voice_over_type = (
+        VoiceOver.objects.filter(task=OuterRef("pk"))
+        .order_by("pk")
+        .values("voice_over_type")[:1]
+    )
+    return all_tasks.annotate(
+        source_type_value=Case(
+            When(
+                task_type__in=["TRANSCRIPTION_EDIT", "TRANSCRIPTION_REVIEW"],
+                then=Subquery(transcript_type),
+            ),
+            When(
+                task_type__in=["TRANSLATION_EDIT", "TRANSLATION_REVIEW"],
+                then=Subquery(translation_type),
+            ),
+            When(
+                task_type__in=["VOICEOVER_EDIT", "VOICEOVER_REVIEW"],
+                then=Subquery(voice_over_type),
+            ),
+            default=Value(None),
+            output_field=CharField(),
+        )
+    )
+
+
+def select_task_list_related(all_tasks):
+    """
+    Joins the rows TaskSerializer reads for every task, so serializing a page
+    doesn't run a query per task.
+    """
+    all_tasks = all_tasks.select_related(
+        "video", "video__project_id", "user", "created_by"
+    ).prefetch_related("video__project_id__managers")
+    return annotate_source_type(all_tasks)
+
+
+def encode_task_cursor(task, field):
+    value = getattr(task, field)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    cursor = json.dumps([value, task.id])
+    return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+
+class InvalidTaskCursor(ValueError):
+    pass
+
+
+def decode_task_cursor(all_tasks, cursor, field):
+    """
+    Returns the sort value and the id of the task a cursor points to, raises
+    InvalidTaskCursor for a malformed or tampered cursor.
+    """
+    try:
+        value, task_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return all_tasks.model._meta.get_field(field).to_python(value), int(task_id)
+    except (ValueError, TypeError, ValidationError) as e:
+        raise InvalidTaskCursor("Invalid cursor") from e
+
+
+def keyset_paginate_tasks(all_tasks, sort_by, limit, cursor):
+    """
+    Returns the page of tasks after the cursor and the cursor of the next
+    page, None on the last page. Unlike offset pagination, deep pages cost
+    the same as the first one. sort_by must be one of TASK_KEYSET_SORT_FIELDS,
+    with a "-" prefix for descending order, ties are broken by id.
+    """
+    field = sort_by.lstrip("-")
+    descending = sort_by.startswith("-")
+    lookup = "lt" if descending else "gt"
+    if field == "id":
+        all_tasks = all_tasks.order_by(sort_by)
+    else:
+        all_tasks = all_tasks.order_by(sort_by, "-id" if descending else "id")
+    if cursor:
+        value, task_id = decode_task_cursor(all_tasks, cursor, field)
+        if field == "id":
+            all_tasks = all_tasks.filter(**{"id__" + lookup: task_id})
+        else:
+            all_tasks = all_tasks.filter(
+                Q(**{field + "__" + lookup: value})
+                | Q(**{field: value, "id__" + lookup: task_id})
+            )
+    tasks = list(all_tasks[: limit + 1])
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = encode_task_cursor(tasks[-1], field)
+    return tasks, next_cursor
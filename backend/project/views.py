@@ -758,6 +758,16 @@ class ProjectViewSet(viewsets.ModelViewSet):
                 type=openapi.TYPE_OBJECT,
                 required=False,
             ),
+            openapi.Parameter(
+                "cursor",
+                openapi.IN_QUERY,
+                description=(
+                    "Cursor of the page to fetch, returned as next_cursor by the"
+                    " previous page. Pass an empty cursor for the first page."
+                ),
+                type=openapi.TYPE_STRING,
+                required=False,
+            ),
         ],
         responses={200: "List of org tasks"},
     )
@@ -783,6 +793,9 @@ class ProjectViewSet(viewsets.ModelViewSet):
             sort_by = request.query_params.get("sort_by", "updated_at")
             reverse = request.query_params.get("reverse", "True")
             reverse = reverse.lower() == "true"
+            cursor = request.query_params.get("cursor")
+            if sort_by not in TASK_KEYSET_SORT_FIELDS:
+                cursor = None
             project = Project.objects.get(pk=pk)
             project_data = ProjectSerializer(project)
             organization = Organization.objects.get(
@@ -810,13 +823,27 @@ class ProjectViewSet(viewsets.ModelViewSet):
             ):
                 all_tasks = all_tasks.filter(user=request.user).order_by(sort_by)
 
-            total_count = len(all_tasks)
-            total_pages = math.ceil(total_count / int(limit))
-            if offset > total_pages - 1:
-                offset = 0
-            start = offset * int(limit)
-            end = start + int(limit)
-            tasks = all_tasks[start:end]
+            total_count = all_tasks.count()
+            all_tasks = select_task_list_related(all_tasks)
+            next_cursor = None
+            if cursor is not None:
+                try:
+                    tasks, next_cursor = keyset_paginate_tasks(
+                        all_tasks, sort_by, limit, cursor
+                    )
+                except InvalidTaskCursor as e:
+                    return Response(
+                        {"message": str(e)},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+            else:
+                total_pages = math.ceil(total_count / int(limit))
+                if offset > total_pages - 1:
+                    offset = 0
+                start = offset * int(limit)
+                end = start + int(limit)
+                tasks = list(all_tasks[start:end])
+            tasks_by_id = {task.id: task for task in tasks}
 
             src_languages = set()
             target_languages = set()
@@ -902,7 +929,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
                                 and data["is_active"] == True
                                 and data["time_spent"] == "0"
                             ):
-                                video = Video.objects.get(pk=data["video"])
+                                video = tasks_by_id[data["id"]].video
                                 if video.multiple_speaker == True:
                                     buttons["Edit-Speaker"] = True
                                     # buttons["View"] = False
@@ -961,15 +988,15 @@ class ProjectViewSet(viewsets.ModelViewSet):
             target_languages_list = list(target_languages)
             if "-" in target_languages_list:
                 target_languages_list.remove("-")
-            return Response(
-                {
-                    "total_count": total_count,
-                    "tasks_list": serialized_dict,
-                    "src_languages_list": sorted(list(src_languages)),
-                    "target_languages_list": sorted(target_languages_list),
-                },
-                status=status.HTTP_200_OK,
-            )
+            response = {
+                "total_count": total_count,
+                "tasks_list": serialized_dict,
+                "src_languages_list": sorted(list(src_languages)),
+                "target_languages_list": sorted(target_languages_list),
+            }
+            if cursor is not None:
+                response["next_cursor"] = next_cursor
+            return Response(response, status=status.HTTP_200_OK)
 
         except Project.DoesNotExist:
             return Response(
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class TaskConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "task"
+
+    def ready(self):
+        from celery.signals import before_task_publish
+        from .queue_state import record_published_task
+
+        before_task_publish.connect(record_published_task, weak=False)
@@ -0,0 +1,53 @@
+import time
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from project.models import Project
+from task.models import Task, TASK_TYPE, TASK_STATUS
+from task.serializers import TaskSerializer
+from users.models import User
+from video.models import Video
+
+
+class Command(BaseCommand):
+    help = "Reports the time taken by TaskSerializer to serialize in-memory tasks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        user = User(id=1, username="user", email="user@example.com")
+        project = Project(id=1, title="Project")
+        video = Video(
+            id=1,
+            name="Video",
+            url="https://example.com/video.mp4",
+            language="en",
+            project_id=project,
+        )
+        now = timezone.now()
+        tasks = []
+        for i in range(options["count"]):
+            task = Task(
+                id=i + 1,
+                task_type=TASK_TYPE[i % len(TASK_TYPE)][0],
+                video=video,
+                target_language="hi",
+                status=TASK_STATUS[i % len(TASK_STATUS)][0],
+                user=user,
+                created_by=user,
+                created_at=now,
+                updated_at=now,
+            )
+            # Set by project.utils.annotate_source_type on querysets.
+            task.source_type_value = "MACHINE_GENERATED"
+            tasks.append(task)
+
+        start = time.time()
+        data = TaskSerializer(tasks, many=True).data
+        elapsed = time.time() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Serialized {len(data)} tasks in {elapsed:.2f}s "
+                f"({len(data) / elapsed:.0f} tasks/s)"
+            )
+        )
@@ -0,0 +1,28 @@
+import logging
+from django.core.management.base import BaseCommand
+from backend.celery import celery_app
+from task.queue_state import record_task_event, EVENT_STATES
+
+
+class Command(BaseCommand):
+    help = "Follows the Celery task events and keeps the queue state read by inspect_queue."
+
+    def handle(self, *args, **options):
+        def on_event(event):
+            try:
+                record_task_event(event)
+            except Exception as e:
+                logging.warning(
+                    "Unable to record %s of task %s: %s",
+                    event.get("type"),
+                    event.get("uuid"),
+                    str(e),
+                )
+
+        self.stdout.write("Consuming task events")
+        with celery_app.connection() as connection:
+            receiver = celery_app.events.Receiver(
+                connection,
+                handlers={event_type: on_event for event_type in EVENT_STATES},
+            )
+            receiver.capture(limit=None, timeout=None, wakeup=True)
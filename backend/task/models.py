@@ -60,6 +60,21 @@ PRIORITY = (
     (P4, "Priority No 4"),
 )
 
+TRANSLATION_LANGUAGE_LABELS = dict(TRANSLATION_LANGUAGE_CHOICES)
+TASK_TYPE_LABELS = dict(TASK_TYPE)
+TASK_STATUS_LABELS = dict(TASK_STATUS)
+TRANSCRIPT_TYPE_LABELS = dict(TRANSCRIPT_TYPE)
+
+# Related name and type field of the source of a task, by task type
+SOURCE_TYPE_FIELDS = {
+    TRANSCRIPTION_EDIT: ("transcript_tasks", "transcript_type"),
+    TRANSCRIPTION_REVIEW: ("transcript_tasks", "transcript_type"),
+    TRANSLATION_EDIT: ("translation_tasks", "translation_type"),
+    TRANSLATION_REVIEW: ("translation_tasks", "translation_type"),
+    VOICEOVER_EDIT: ("voice_over_tasks", "voice_over_type"),
+    VOICEOVER_REVIEW: ("voice_over_tasks", "voice_over_type"),
+}
+
 
 class Task(models.Model):
     """
@@ -124,22 +139,15 @@ class Task(models.Model):
 
     @property
     def get_src_language_label(self):
-        for language in TRANSLATION_LANGUAGE_CHOICES:
-            if self.video.language == language[0]:
-                return language[1]
+        return TRANSLATION_LANGUAGE_LABELS.get(self.video.language)
 
     @property
     def get_task_type_label(self):
-        for t_type in TASK_TYPE:
-            if self.task_type == t_type[0]:
-                return t_type[1]
+        return TASK_TYPE_LABELS.get(self.task_type)
 
     @property
     def get_target_language_label(self):
-        for language in TRANSLATION_LANGUAGE_CHOICES:
-            if self.target_language == language[0]:
-                return language[1]
-        return "-"
+        return TRANSLATION_LANGUAGE_LABELS.get(self.target_language, "-")
 
     @property
     def get_language_pair_label(self):
@@ -156,10 +164,7 @@ class Task(models.Model):
 
     @property
     def get_task_status_label(self):
-        for status in TASK_STATUS:
-            if self.status == status[0]:
-                return status[1]
-        return "-"
+        return TASK_STATUS_LABELS.get(self.status, "-")
 
     @property
     def format_time_spent(self):
@@ -214,37 +219,24 @@ class Task(models.Model):
 
     @property
     def get_source_type(self):
-        source_mapping = {
-            "TRANSCRIPTION_EDIT": "self.transcript_tasks.values('transcript_type').first()",
-            "TRANSCRIPTION_REVIEW": "self.transcript_tasks.values('transcript_type').first()",
-            "TRANSLATION_EDIT": "self.translation_tasks.values('translation_type').first()",
-            "TRANSLATION_REVIEW": "self.translation_tasks.values('translation_type').first()",
-            "VOICEOVER_EDIT": "self.voice_over_tasks.values('voice_over_type').first()",
-            "VOICEOVER_REVIEW": "self.voice_over_tasks.values('voice_over_type').first()",
-        }
-
-        fields_mapping = {
-            "TRANSCRIPTION_EDIT": "transcript_type",
-            "TRANSCRIPTION_REVIEW": "transcript_type",
-            "TRANSLATION_EDIT": "translation_type",
-            "TRANSLATION_REVIEW": "translation_type",
-            "VOICEOVER_EDIT": "voice_over_type",
-            "VOICEOVER_REVIEW": "voice_over_type",
-        }
-
-        source_type = None
+        """
+        Label of the type of the transcript, translation or voice over of the
+        task. Uses the source_type_value annotation when the queryset has it
+        (see project.utils.annotate_source_type), otherwise queries it.
+        """
         if self.task_type == "TRANSLATION_VOICEOVER_EDIT":
             return "Machine Generated"
-        if self.task_type in source_mapping.keys():
-            source_type_var = eval(source_mapping[self.task_type])
+        source_type = None
+        if hasattr(self, "source_type_value"):
+            source_type = self.source_type_value
+        elif self.task_type in SOURCE_TYPE_FIELDS:
+            related_name, field = SOURCE_TYPE_FIELDS[self.task_type]
+            source_type_var = getattr(self, related_name).values(field).first()
             if source_type_var is not None:
-                source_type = source_type_var[fields_mapping[self.task_type]]
+                source_type = source_type_var[field]
 
         if source_type:
-            for TRANSCRIPT_TYPE_OBJ in TRANSCRIPT_TYPE:
-                if source_type == TRANSCRIPT_TYPE_OBJ[0]:
-                    return TRANSCRIPT_TYPE_OBJ[1]
-            return "-"
+            return TRANSCRIPT_TYPE_LABELS.get(source_type, "-")
         else:
             return "-"
 
@@ -0,0 +1,187 @@
+"""
+Queue state of Celery tasks kept in Redis for inspect_queue.
+
+A task is recorded when it is published, with the Chitralekha task id read
+from its arguments, and added to the index of its queue. The consume_task_events
+command then follows the task-received, task-started and task-succeeded/failed
+events of the workers and updates its state. Indexes are sorted sets of
+Celery task uuids ordered by publish time and trimmed to
+queue_state_max_tasks, so reading a page of a queue costs one range read and
+one pipelined hash read per task.
+"""
+
+import ast
+import logging
+import time
+import redis
+from config import (
+    redis_host,
+    redis_port,
+    queue_state_redis_db,
+    queue_state_max_tasks,
+    queue_state_ttl,
+)
+
+queue_state_redis_client = None
+
+QUEUE_STATE_TASK_KEY_PREFIX = "queue_state:task:"
+QUEUE_STATE_INDEX_KEY_PREFIX = "queue_state:queue:"
+ALL_TASKS_QUEUE = "all_tasks"
+
+# Queue of inspect_queue and position of the task_id argument of the Celery
+# tasks that work on a Chitralekha task.
+QUEUE_TASKS = {
+    "task.tasks.celery_asr_call": ("asr", 0),
+    "task.tasks.celery_tts_call": ("tts", 0),
+    "task.tasks.celery_nmt_call": ("nmt", 0),
+    "task.tasks.celery_nmt_tts_call": ("nmt_tts", 0),
+    "voiceover.tasks.celery_integration": (None, 3),
+    "voiceover.tasks.export_voiceover_async": (None, 0),
+}
+
+EVENT_STATES = {
+    "task-received": "RECEIVED",
+    "task-started": "STARTED",
+    "task-succeeded": "SUCCESS",
+    "task-failed": "FAILURE",
+    "task-retried": "RETRY",
+    "task-revoked": "REVOKED",
+}
+
+
+def get_queue_state_redis_client():
+    global queue_state_redis_client
+    if not queue_state_redis_client:
+        queue_state_redis_client = redis.Redis(
+            host=redis_host,
+            port=redis_port,
+            db=queue_state_redis_db,
+            decode_responses=True,
+        )
+    return queue_state_redis_client
+
+
+def get_task_key(uuid):
+    return QUEUE_STATE_TASK_KEY_PREFIX + uuid
+
+
+def get_index_key(queue):
+    return QUEUE_STATE_INDEX_KEY_PREFIX + queue
+
+
+def get_chitralekha_task_id(name, args, kwargs):
+    if name not in QUEUE_TASKS:
+        return ""
+    position = QUEUE_TASKS[name][1]
+    if "task_id" in kwargs:
+        return kwargs["task_id"]
+    if len(args) > position:
+        return args[position]
+    return ""
+
+
+def add_task(pipe, uuid, name, task_id, score, fields):
+    queue = QUEUE_TASKS.get(name, (None,))[0]
+    pipe.hset(
+        get_task_key(uuid),
+        mapping={"name": name, "task_id": task_id, "queue": queue or "", **fields},
+    )
+    pipe.expire(get_task_key(uuid), queue_state_ttl)
+    for index in [ALL_TASKS_QUEUE, queue] if queue else [ALL_TASKS_QUEUE]:
+        pipe.zadd(get_index_key(index), {uuid: score}, nx=True)
+        pipe.zremrangebyrank(get_index_key(index), 0, -(queue_state_max_tasks + 1))
+
+
+def record_published_task(sender=None, headers=None, body=None, **kwargs):
+    """
+    before_task_publish handler, records a task as PENDING with its
+    arguments before it reaches the broker.
+    """
+    try:
+        args, task_kwargs = body[0], body[1]
+        pipe = get_queue_state_redis_client().pipeline()
+        add_task(
+            pipe,
+            headers["id"],
+            sender,
+            get_chitralekha_task_id(sender, args, task_kwargs),
+            time.time(),
+            {"state": "PENDING"},
+        )
+        pipe.execute()
+    except Exception as e:
+        logging.warning("Unable to record published task %s: %s", sender, str(e))
+
+
+def parse_event_arguments(event):
+    """
+    Returns the args and kwargs of a task-received event, which only carries
+    their repr, for tasks that were not recorded when published.
+    """
+    try:
+        args = ast.literal_eval(event.get("args") or "()")
+        kwargs = ast.literal_eval(event.get("kwargs") or "{}")
+    except (ValueError, SyntaxError):
+        return (), {}
+    if not isinstance(args, (list, tuple)) or not isinstance(kwargs, dict):
+        return (), {}
+    return args, kwargs
+
+
+def record_task_event(event):
+    """
+    Updates the state of a task from a Celery task event.
+    """
+    if event["type"] not in EVENT_STATES:
+        return
+    uuid = event["uuid"]
+    fields = {"state": EVENT_STATES[event["type"]]}
+    if event["type"] in ["task-received", "task-started"]:
+        fields["worker"] = event["hostname"]
+        fields[event["type"].split("-")[1]] = event["timestamp"]
+
+    client = get_queue_state_redis_client()
+    pipe = client.pipeline()
+    if event["type"] == "task-received" and not client.exists(get_task_key(uuid)):
+        args, kwargs = parse_event_arguments(event)
+        add_task(
+            pipe,
+            uuid,
+            event["name"],
+            get_chitralekha_task_id(event["name"], args, kwargs),
+            event["timestamp"],
+            fields,
+        )
+    else:
+        pipe.hset(get_task_key(uuid), mapping=fields)
+        pipe.expire(get_task_key(uuid), queue_state_ttl)
+    pipe.execute()
+
+
+def get_queue_tasks(queue, offset=0, limit=queue_state_max_tasks):
+    """
+    Returns the most recently published tasks of a queue, newest first, as
+    dicts of uuid, name, task_id, state, received, started and worker.
+    """
+    client = get_queue_state_redis_client()
+    uuids = client.zrevrange(get_index_key(queue), offset, offset + limit - 1)
+    pipe = client.pipeline()
+    for uuid in uuids:
+        pipe.hgetall(get_task_key(uuid))
+    tasks = []
+    for uuid, fields in zip(uuids, pipe.execute()):
+        if not fields:
+            continue
+        task_id = fields.get("task_id", "")
+        tasks.append(
+            {
+                "uuid": uuid,
+                "name": fields.get("name", ""),
+                "task_id": int(task_id) if task_id.isdigit() else task_id,
+                "state": fields.get("state", ""),
+                "received": float(fields["received"]) if "received" in fields else None,
+                "started": float(fields["started"]) if "started" in fields else None,
+                "worker": fields.get("worker", ""),
+            }
+        )
+    return tasks
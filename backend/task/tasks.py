@@ -1,4 +1,8 @@
-from transcript.utils.asr import make_asr_api_call
+from transcript.utils.asr import (
+    make_asr_api_call,
+    submit_asr_job,
+    get_asr_job_result,
+)
 from transcript.models import Transcript
 from task.models import Task
 from io import StringIO
@@ -18,6 +22,7 @@ import pysrt
 import logging
 from translation.utils import generate_translation_payload
 from rest_framework.response import Response
+from config import asr_async_jobs, asr_poll_interval, asr_max_poll_attempts
 
 
 def convert_vtt_to_payload(vtt_content):
@@ -266,48 +271,75 @@ def celery_asr_call(task_id):
     task_obj = Task.objects.get(pk=task_id)
     transcript_obj = Transcript.objects.filter(task=task_obj).first()
     if transcript_obj is None:
+        if asr_async_jobs and task_obj.video.language == "en":
+            job_id = submit_asr_job(task_obj.video.url, task_obj.video.language)
+            if job_id is not None:
+                # The worker is released while the ASR service transcribes.
+                celery_poll_asr_job.apply_async(
+                    args=[task_id, job_id, 1], countdown=asr_poll_interval
+                )
+                return
         transcribed_data = make_asr_api_call(
             task_obj.video.url, task_obj.video.language
         )
-        if transcribed_data is not None:
-            if task_obj.video.language == "en":
-                task_obj = Task.objects.get(pk=task_id)
-                data = convert_payload_format(transcribed_data)
-                transcript_obj = Transcript(
-                    video=task_obj.video,
-                    user=task_obj.user,
-                    payload=data,
-                    language=task_obj.video.language,
-                    task=task_obj,
-                    transcript_type="MACHINE_GENERATED",
-                    status="TRANSCRIPTION_SELECT_SOURCE",
-                )
-                task_obj.is_active = True
-                task_obj.status = "SELECTED_SOURCE"
-                task_obj.save()
-                transcript_obj.save()
-                send_mail_to_user(task_obj)
-            else:
-                data = convert_dhruva_payload_format(transcribed_data)
-                task_obj = Task.objects.get(pk=task_id)
-                transcript_obj = Transcript(
-                    video=task_obj.video,
-                    user=task_obj.user,
-                    payload=data,
-                    language=task_obj.video.language,
-                    task=task_obj,
-                    transcript_type="MACHINE_GENERATED",
-                    status="TRANSCRIPTION_SELECT_SOURCE",
-                )
-                task_obj.is_active = True
-                task_obj.save()
-                transcript_obj.save()
-                send_mail_to_user(task_obj)
+        save_asr_transcript(task_id, transcribed_data)
+    else:
+        logging.info("Transcript already exists")
+
+
+@celery_app.task(queue="asr_tts")
+def celery_poll_asr_job(task_id, job_id, attempt):
+    job_status, transcribed_data = get_asr_job_result(job_id)
+    if job_status in ["QUEUED", "RUNNING"]:
+        if attempt < asr_max_poll_attempts:
+            celery_poll_asr_job.apply_async(
+                args=[task_id, job_id, attempt + 1], countdown=asr_poll_interval
+            )
+            return
+        logging.info("ASR job %s timed out for task %s", job_id, str(task_id))
+    if Transcript.objects.filter(task_id=task_id).exists():
+        logging.info("Transcript already exists")
+        return
+    save_asr_transcript(task_id, transcribed_data)
+
+
+def save_asr_transcript(task_id, transcribed_data):
+    task_obj = Task.objects.get(pk=task_id)
+    if transcribed_data is not None:
+        if task_obj.video.language == "en":
+            data = convert_payload_format(transcribed_data)
+            transcript_obj = Transcript(
+                video=task_obj.video,
+                user=task_obj.user,
+                payload=data,
+                language=task_obj.video.language,
+                task=task_obj,
+                transcript_type="MACHINE_GENERATED",
+                status="TRANSCRIPTION_SELECT_SOURCE",
+            )
+            task_obj.is_active = True
+            task_obj.status = "SELECTED_SOURCE"
+            task_obj.save()
+            transcript_obj.save()
+            send_mail_to_user(task_obj)
         else:
-            task_obj.status = "FAILED"
+            data = convert_dhruva_payload_format(transcribed_data)
+            transcript_obj = Transcript(
+                video=task_obj.video,
+                user=task_obj.user,
+                payload=data,
+                language=task_obj.video.language,
+                task=task_obj,
+                transcript_type="MACHINE_GENERATED",
+                status="TRANSCRIPTION_SELECT_SOURCE",
+            )
+            task_obj.is_active = True
             task_obj.save()
+            transcript_obj.save()
+            send_mail_to_user(task_obj)
     else:
-        logging.info("Transcript already exists")
+        task_obj.status = "FAILED"
+        task_obj.save()
 
 
 @celery_app.task(queue="nmt")
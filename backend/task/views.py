@@ -64,9 +64,7 @@ from rest_framework.response import Response
 from functools import wraps
 from rest_framework import status
 import logging
-import io
-import zipfile
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 import datetime
 from task.tasks import (
     celery_asr_call,
@@ -77,10 +75,11 @@ from task.tasks import (
     convert_vtt_to_payload,
     celery_nmt_tts_call,
 )
-import requests
+from task.queue_state import get_queue_tasks, ALL_TASKS_QUEUE
 from django.db.models.functions import Concat
 from django.db.models import Value
 from django.http import HttpRequest
+from utils.streaming_export import iter_zip_stream
 from django.utils import timezone
 from transcript.views import export_transcript, get_transcript_id
 from translation.views import export_translation, get_translation_id
@@ -2507,72 +2506,57 @@ class TaskViewSet(ModelViewSet):
                 {"message": "missing required params: video_id or export_type"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        valid_tasks = []
-        invalid_tasks = []
-
-        for task_id in task_ids.split(","):
-            task = Task.objects.filter(pk=int(task_id)).first()
-            if task is None:
-                invalid_tasks.append(task_id)
-            else:
-                valid_tasks.append(task)
-
-        zip_file = io.BytesIO()
-        non_completed_tasks = 0
-        time_now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with zipfile.ZipFile(zip_file, "w") as zf:
-            for task in valid_tasks:
-                if "COMPLETE" in task.status:
-                    if "TRANSCRIPT" in task.task_type:
-                        transcript = get_export_transcript(
-                            request, task.id, export_type
-                        )
-                        if "docx" in export_type:
-                            content = b"".join(transcript.streaming_content)
-                        else:
-                            content = transcript.content
-                        if (
-                            task.video.project_id.organization_id.id == 16
-                            and len(task.description) > 0
-                        ):
-                            file_name = f"{task.description}.{export_type}"
-                        else:
-                            file_name = f"{task.video.name}_{time_now}.{export_type}"
-                        zf.writestr(file_name, content)
-                    elif "TRANSLATION" in task.task_type:
-                        translation = get_export_translation(
-                            request, task.id, export_type
-                        )
-                        if "docx" in export_type:
-                            content = b"".join(translation.streaming_content)
-                        else:
-                            content = translation.content
-                        if (
-                            task.video.project_id.organization_id.id == 16
-                            and len(task.description) > 0
-                        ):
-                            file_name = f"{task.description}.{export_type}"
-                        else:
-                            file_name = f"{task.video.name}_{time_now}.{export_type}"
-                        zf.writestr(
-                            f"{task.video.name}_{time_now}_{task.target_language}.{export_type}",
-                            content,
-                        )
-                    else:
-                        logging.info("Not a valid task type")
-                else:
-                    non_completed_tasks += 1
-
-        if non_completed_tasks == len(valid_tasks):
+        # All the requested tasks are read in one query, the files of the
+        # completed ones are written to the response as they are exported.
+        tasks = Task.objects.filter(
+            pk__in=[int(task_id) for task_id in task_ids.split(",")]
+        ).select_related("video", "video__project_id")
+        completed_tasks = tasks.filter(status__contains="COMPLETE")
+        if not completed_tasks.exists():
             return Response(
                 {
                     "message": "The selected task(s) doesn't have completed transcripts/translations."
                 },
                 status=status.HTTP_404_NOT_FOUND,
             )
-        zip_file.seek(0)
-        response = HttpResponse(
-            zip_file, content_type="application/zip", status=status.HTTP_200_OK
+
+        time_now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        def get_task_files():
+            for task in completed_tasks.iterator(chunk_size=100):
+                if "TRANSCRIPT" in task.task_type:
+                    transcript = get_export_transcript(request, task.id, export_type)
+                    if "docx" in export_type:
+                        content = b"".join(transcript.streaming_content)
+                    else:
+                        content = transcript.content
+                    if (
+                        task.video.project_id.organization_id_id == 16
+                        and len(task.description) > 0
+                    ):
+                        file_name = f"{task.description}.{export_type}"
+                    else:
+                        file_name = f"{task.video.name}_{time_now}.{export_type}"
+                    yield file_name, content
+                elif "TRANSLATION" in task.task_type:
+                    translation = get_export_translation(
+                        request, task.id, export_type
+                    )
+                    if "docx" in export_type:
+                        content = b"".join(translation.streaming_content)
+                    else:
+                        content = translation.content
+                    yield (
+                        f"{task.video.name}_{time_now}_{task.target_language}.{export_type}",
+                        content,
+                    )
+                else:
+                    logging.info("Not a valid task type")
+
+        response = StreamingHttpResponse(
+            iter_zip_stream(get_task_files()),
+            content_type="application/zip",
+            status=status.HTTP_200_OK,
         )
         response[
             "Content-Disposition"
@@ -3161,13 +3145,45 @@ class TaskViewSet(ModelViewSet):
                 description=("The type of queue to inspect"),
                 type=openapi.TYPE_STRING,
                 required=True,
-            )
+            ),
+            openapi.Parameter(
+                "offset",
+                openapi.IN_QUERY,
+                description=("Number of most recent tasks to skip"),
+                type=openapi.TYPE_INTEGER,
+                required=False,
+            ),
+            openapi.Parameter(
+                "limit",
+                openapi.IN_QUERY,
+                description=("Number of tasks to return, 50 by default"),
+                type=openapi.TYPE_INTEGER,
+                required=False,
+            ),
         ],
-        responses={200: "successful", 500: "unable to query celery"},
+        responses={
+            200: "successful",
+            400: "invalid offset or limit",
+            500: "unable to query celery",
+        },
     )
     @action(detail=False, methods=["get"], url_path="inspect_queue")
     def inspect_queue(self, request):
         queue = request.query_params.get("queue")
+        try:
+            offset = int(request.query_params.get("offset", 0))
+            limit = int(request.query_params.get("limit", queue_state_page_size))
+        except ValueError:
+            return Response(
+                {"message": "offset and limit must be integers"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if offset < 0 or limit < 1:
+            return Response(
+                {"message": "offset can't be negative and limit must be positive"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = min(limit, queue_state_max_tasks)
         if queue == "all_tasks":
             if not (
                 request.user.role in ["ORG_OWNER", "ADMIN"] or request.user.is_superuser
@@ -3181,39 +3197,7 @@ class TaskViewSet(ModelViewSet):
                 )
             try:
                 task_list = []
-                url = f"{flower_url}/api/tasks"
-                params = {}
-                if flower_username and flower_password:
-                    res = requests.get(
-                        url, params=params, auth=(flower_username, flower_password)
-                    )
-                else:
-                    res = requests.get(url, params=params)
-                data = res.json()
-
-                task_data = list(data.values())
-                for elem in task_data:
-                    task_obj = {}
-                    if elem["name"] == "task.tasks.celery_asr_call":
-                        task_obj["task_id"] = eval(elem["kwargs"])["task_id"]
-                    elif elem["name"] == "task.tasks.celery_tts_call":
-                        task_obj["task_id"] = eval(
-                            elem["args"].split(",")[0].split("(")[1]
-                        )
-                    elif elem["name"] == "task.tasks.celery_nmt_call":
-                        task_obj["task_id"] = eval(elem["kwargs"])["task_id"]
-                    elif elem["name"] == "task.tasks.celery_nmt_tts_call":
-                        try:
-                            task_obj["task_id"] = eval(elem["kwargs"])["task_id"]
-                        except:
-                            task_obj["task_id"] = eval(elem["args"].split(",")[0].split("(")[1])
-                    elif elem["name"] == "voiceover.tasks.celery_integration":
-                        task_obj["task_id"] = eval(elem["args"].replace(")","").split(",")[3])
-                    elif elem["name"] == "voiceover.tasks.export_voiceover_async":
-                        task_obj["task_id"] = eval(elem["args"].split(",")[0].split("(")[1])
-                    else:
-                        task_obj["task_id"] = ""
-
+                for elem in get_queue_tasks(ALL_TASKS_QUEUE, offset, limit):
                     received_time = (
                         timezone.datetime.utcfromtimestamp(elem["received"]).strftime(
                             "%Y-%m-%dT%H:%M:%S.%fZ"
@@ -3228,14 +3212,17 @@ class TaskViewSet(ModelViewSet):
                         if elem["started"]
                         else ""
                     )
-
-                    task_obj["uuid"] = elem["uuid"] if elem["uuid"] else ""
-                    task_obj["name"] = elem["name"] if elem["name"] else ""
-                    task_obj["state"] = elem["state"] if elem["state"] else ""
-                    task_obj["received_time"] = received_time
-                    task_obj["started_time"] = started_time
-                    task_obj["worker"] = elem["worker"] if elem["worker"] else ""
-                    task_list.append(task_obj)
+                    task_list.append(
+                        {
+                            "task_id": elem["task_id"],
+                            "uuid": elem["uuid"],
+                            "name": elem["name"],
+                            "state": elem["state"],
+                            "received_time": received_time,
+                            "started_time": started_time,
+                            "worker": elem["worker"],
+                        }
+                    )
 
                 return Response(
                     {"message": "successful", "data": task_list, "admin_data": True},
@@ -3247,53 +3234,13 @@ class TaskViewSet(ModelViewSet):
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 )
         else:
-            if queue == "nmt" or queue == "nmt_tts":
-                queue_type = "celery@nmt_worker"
-            else:
-                queue_type = "celery@asr_tts_worker"
-
             try:
                 task_list = []
                 status_list = []
-                url = f"{flower_url}/api/tasks"
-                params = {
-                    "sort_by": "-received",
-                    "workername": queue_type,
-                }
-                if flower_username and flower_password:
-                    res = requests.get(
-                        url, params=params, auth=(flower_username, flower_password)
-                    )
-                else:
-                    res = requests.get(url, params=params)
-                data = res.json()
-                task_data = list(data.values())
-                for elem in task_data:
-                    if queue == "asr" and elem["name"] == "task.tasks.celery_asr_call":
-                        task_list.append(eval(elem["kwargs"])["task_id"])
+                for elem in get_queue_tasks(queue, offset, limit):
+                    if elem["task_id"] != "":
+                        task_list.append(elem["task_id"])
                         status_list.append(elem["state"])
-                    elif (
-                        queue == "tts" and elem["name"] == "task.tasks.celery_tts_call"
-                    ):
-                        # task_list.append(eval(elem["kwargs"])["task_id"])
-                        task_list.append(eval(elem["args"].split(",")[0].split("(")[1]))
-                        status_list.append(elem["state"])
-                    elif (
-                        queue == "nmt" and elem["name"] == "task.tasks.celery_nmt_call"
-                    ):
-                        task_list.append(eval(elem["kwargs"])["task_id"])
-                        status_list.append(elem["state"])
-                    elif (
-                        queue == "nmt_tts" and elem["name"] == "task.tasks.celery_nmt_tts_call"
-                    ):
-                        try:
-                            task_list.append(eval(elem["kwargs"])["task_id"])
-                            status_list.append(elem["state"])
-                        except:
-                            task_list.append(eval(elem["args"].split(",")[0].split("(")[1]))
-                            status_list.append(elem["state"])
-                    else:
-                        pass
                 if task_list:
                     task_details = Task.objects.filter(id__in=task_list).values(
                         "id",
@@ -3306,21 +3253,20 @@ class TaskViewSet(ModelViewSet):
                             "created_by__last_name",
                         ),
                     )
-                    for elem in task_details:
-                        task_dict = {
+                    task_details = {elem["id"]: elem for elem in task_details}
+                    for i, task_id in enumerate(task_list):
+                        if task_id not in task_details:
+                            task_list[i] = {"task_id": task_id, "status": "Not Found"}
+                            continue
+                        elem = task_details[task_id]
+                        task_list[i] = {
                             "task_id": elem["id"],
                             "video_id": elem["video__id"],
                             "submitter_name": elem["submitter_name"],
                             "org_name": elem["created_by__organization__title"],
                             "video_duration": str(elem["video__duration"]),
+                            "status": status_list[i],
                         }
-                        i = task_list.index(elem["id"])
-                        task_dict["status"] = status_list[i]
-                        task_list[i] = task_dict
-                for i in task_list:
-                    if type(i) == int:
-                        j = task_list.index(i)
-                        task_list[j] = {"task_id": i, "status": "Not Found"}
                 return Response(
                     {"message": "successful", "data": task_list},
                     status=status.HTTP_200_OK,
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# get_payload used to add an empty speaker_id to the segments of transcripts
+# without one, and save them, on every read.
+ADD_MISSING_SPEAKER_IDS = """
+UPDATE transcript_transcript
+SET payload = jsonb_set(
+    payload,
+    '{payload}',
+    (
+        SELECT jsonb_agg(
+            CASE
+                WHEN jsonb_typeof(segment) = 'object' AND NOT segment ? 'speaker_id'
+                THEN segment || '{"speaker_id": ""}'::jsonb
+                ELSE segment
+            END
+            ORDER BY position
+        )
+        FROM jsonb_array_elements(payload -> 'payload')
+            WITH ORDINALITY AS segments(segment, position)
+    )
+)
+WHERE jsonb_typeof(payload -> 'payload') = 'array'
+    AND jsonb_array_length(payload -> 'payload') > 0
+    AND jsonb_path_exists(
+        payload, '$.payload[*] ? (@.type() == "object" && !exists(@.speaker_id))'
+    )
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("transcript", "0016_alter_transcript_paraphrase_stage"),
+    ]
+
+    operations = [
+        migrations.RunSQL(ADD_MISSING_SPEAKER_IDS, migrations.RunSQL.noop),
+    ]
@@ -111,5 +111,12 @@ class Transcript(models.Model):
         blank=True,
     )
 
+    def save(self, *args, **kwargs):
+        if self.status == TRANSCRIPTION_EDIT_COMPLETE:
+            from project.utils import set_payload_word_diff
+
+            set_payload_word_diff(self, TRANSCRIPTION_SELECT_SOURCE, "text")
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return str(self.id)
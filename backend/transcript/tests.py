@@ -1,3 +1,46 @@
-from django.test import TestCase
+from types import SimpleNamespace
+from django.test import SimpleTestCase
+from utils.segment_store import get_changed_segment_indices, get_segments_snapshot
+from .views import modify_payload
 
-# Create your tests here.
+
+def get_segment(n, text):
+    return {
+        "start_time": "00:00:0{}.000".format(n),
+        "end_time": "00:00:0{}.500".format(n),
+        "text": text,
+        "speaker_id": "",
+    }
+
+
+class ChangedSegmentsTests(SimpleTestCase):
+    def test_replaced_segments_are_reported(self):
+        segments = [get_segment(n, "old") for n in range(3)]
+        snapshot = list(segments)
+        segments[1] = get_segment(1, "new")
+        self.assertEqual(get_changed_segment_indices(segments, snapshot), [1])
+
+    def test_segments_changed_in_place_are_not_reported(self):
+        segments = [get_segment(n, "old") for n in range(3)]
+        snapshot = list(segments)
+        segments[1]["text"] = "new"
+        self.assertEqual(get_changed_segment_indices(segments, snapshot), [])
+
+    def test_inserted_segments_fall_back_to_full_save(self):
+        segments = [get_segment(n, "old") for n in range(3)]
+        snapshot = list(segments)
+        segments.insert(1, get_segment(1, "new"))
+        self.assertIsNone(get_changed_segment_indices(segments, snapshot))
+
+    def test_modify_payload_replaces_edited_segments(self):
+        transcript = SimpleNamespace(
+            payload={"payload": [get_segment(n, "old") for n in range(4)]}
+        )
+        snapshot = get_segments_snapshot(transcript)
+        page = {"payload": [get_segment(2, "old"), get_segment(3, "new")]}
+        modify_payload(2, 2, page, 2, 4, transcript)
+        self.assertEqual(
+            get_changed_segment_indices(transcript.payload["payload"], snapshot),
+            [2, 3],
+        )
+        self.assertEqual(transcript.payload["payload"][3]["text"], "new")
@@ -3,92 +3,199 @@
 import traceback
 import requests
 import logging
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from config import (
     english_asr_url,
+    english_asr_jobs_url,
     indic_asr_url,
     dhruva_key,
     service_id_hindi,
     service_id_nepali,
     service_id_indo_aryan,
     service_id_dravidian,
+    asr_connect_timeout,
+    asr_timeout,
+    asr_max_retries,
 )
-import subprocess
-import json
+
+asr_sessions = {}
+
+
+class AsrRetry(Retry):
+    """
+    Retries GETs on server errors and timeouts. A POST starts a transcription
+    or queues a job, so it is only retried when the connection failed or the
+    service asked for it with a 503 and Retry-After, never after it may have
+    been processed.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method.upper() == "POST":
+            return bool(
+                self.total
+                and self.respect_retry_after_header
+                and has_retry_after
+                and status_code == 503
+            )
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def get_asr_session(service_id):
+    """
+    Keep-alive session for one ASR service, so retries and the connection
+    pool of a slow or failing service don't affect the others.
+    """
+    if service_id not in asr_sessions:
+        session = requests.Session()
+        retries = AsrRetry(
+            total=asr_max_retries,
+            backoff_factor=2,
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods=["GET"],
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(max_retries=retries)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        asr_sessions[service_id] = session
+    return asr_sessions[service_id]
+
+
+def get_indic_service_id(lang):
+    if lang == "hi":
+        return service_id_hindi
+    elif lang in ["bn", "gu", "mr", "or", "pa", "sa", "ur"]:
+        return service_id_indo_aryan
+    elif lang in ["kn", "ml", "ta", "te"]:
+        return service_id_dravidian
+    elif lang in ["ne"]:
+        return service_id_nepali
+    return None
+
+
+def get_english_asr_request(url, lang, vad_level, chunk_size):
+    return {
+        "url": url,
+        "vad_level": vad_level,
+        "chunk_size": chunk_size,
+        "language": lang,
+    }
+
+
+def get_indic_asr_request(url, lang, service_id):
+    if lang not in ["kn", "gu", "ur", "ml"]:
+        return {
+            "config": {
+                "serviceId": service_id,
+                "language": {"sourceLanguage": lang},
+                "transcriptionFormat": {"value": "srt"},
+                "postProcessors": ["itn", "punctuation"],
+                "preProcessors": ["vad"],
+            },
+            "audio": [{"audioUri": url}],
+        }
+    return {
+        "config": {
+            "serviceId": service_id,
+            "language": {"sourceLanguage": lang},
+            "transcriptionFormat": {"value": "srt"},
+            "preProcessors": ["vad"],
+        },
+        "audio": [{"audioUri": url}],
+    }
 
 
 def make_asr_api_call(url, lang, vad_level=3, chunk_size=10):
-    json_data = json.dumps(
-        {"url": url, "vad_level": vad_level, "chunk_size": chunk_size, "language": lang}
-    )
     if lang == "en":
         request_url = english_asr_url
         logging.info("Calling another instance for English video.%s", url)
         logging.info("Request to ASR API sent %s", request_url)
         try:
-            curl_request = subprocess.run(
-                [
-                    "curl",
-                    "-X",
-                    "POST",
-                    "-d",
-                    json_data,
-                    "-H",
-                    "Keep-Alive: timeout=40*60,max=60*60",
-                    "-H",
-                    "Content-Type: application/json",
-                    request_url,
-                ],
-                capture_output=True,
+            response = get_asr_session("en").post(
+                request_url,
+                json=get_english_asr_request(url, lang, vad_level, chunk_size),
+                timeout=(asr_connect_timeout, asr_timeout),
             )
-            output = curl_request.stdout.decode()
-            return eval(output)
-        except:
-            logging.info("Error in ASR API")
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            logging.info("Error in ASR API %s", str(e))
             return None
     else:
-        if lang == "hi":
-            service_id = service_id_hindi
-        elif lang in ["bn", "gu", "mr", "or", "pa", "sa", "ur"]:
-            service_id = service_id_indo_aryan
-        elif lang in ["kn", "ml", "ta", "te"]:
-            service_id = service_id_dravidian
-        elif lang in ["ne"]:
-            service_id = service_id_nepali
-        else:
+        service_id = get_indic_service_id(lang)
+        if service_id is None:
             return None
 
-        if lang not in ["kn", "gu", "ur", "ml"]:
-            json_data = {
-                "config": {
-                    "serviceId": service_id,
-                    "language": {"sourceLanguage": lang},
-                    "transcriptionFormat": {"value": "srt"},
-                    "postProcessors": ["itn", "punctuation"],
-                    "preProcessors": ["vad"],
-                },
-                "audio": [{"audioUri": url}],
-            }
-        else:
-            json_data = {
-                "config": {
-                    "serviceId": service_id,
-                    "language": {"sourceLanguage": lang},
-                    "transcriptionFormat": {"value": "srt"},
-                    "preProcessors": ["vad"],
-                },
-                "audio": [{"audioUri": url}],
-            }
         logging.info("Sending request to indic model.")
         try:
-            response = requests.post(
+            response = get_asr_session(service_id).post(
                 indic_asr_url,
                 headers={"authorization": dhruva_key},
-                json=json_data,
+                json=get_indic_asr_request(url, lang, service_id),
+                timeout=(asr_connect_timeout, asr_timeout),
             )
+            response.raise_for_status()
             logging.info("Response Received")
             return response.json()["output"][0]["source"]
-        except:
-            logging.info("Error in Indic ASR API")
+        except Exception as e:
+            logging.info("Error in Indic ASR API %s", str(e))
+
+
+def get_asr_jobs_url():
+    """
+    ENGLISH_ASR_API_URL is the /transcribe endpoint, the job routes are
+    served next to it.
+    """
+    if english_asr_jobs_url:
+        return english_asr_jobs_url.rstrip("/")
+    base_url = english_asr_url.rstrip("/")
+    if base_url.endswith("/transcribe"):
+        base_url = base_url[: -len("/transcribe")]
+    return base_url + "/jobs"
+
+
+def submit_asr_job(url, lang, vad_level=3, chunk_size=10):
+    """
+    Queues an English transcription on the ASR service and returns the job
+    id, or None if the job could not be submitted.
+    """
+    try:
+        response = get_asr_session("en").post(
+            get_asr_jobs_url(),
+            json=get_english_asr_request(url, lang, vad_level, chunk_size),
+            timeout=(asr_connect_timeout, 60),
+        )
+        response.raise_for_status()
+        job_id = response.json()["job_id"]
+        logging.info("ASR job %s submitted for %s", job_id, url)
+        return job_id
+    except Exception as e:
+        logging.info("Error in submitting ASR job %s", str(e))
+        return None
+
+
+def get_asr_job_result(job_id):
+    """
+    Returns (status, result) of an ASR job. Status is one of QUEUED, RUNNING,
+    SUCCESS and FAILED, result is the /transcribe response of a SUCCESS job.
+    Network errors are reported as RUNNING so the caller polls again.
+    """
+    try:
+        response = get_asr_session("en").get(
+            get_asr_jobs_url() + "/" + str(job_id),
+            timeout=(asr_connect_timeout, 60),
+        )
+        if response.status_code == 404:
+            return "FAILED", None
+        response.raise_for_status()
+        job = response.json()
+    except Exception as e:
+        logging.info("Error in polling ASR job %s %s", job_id, str(e))
+        return "RUNNING", None
+    if job["status"] == "SUCCESS":
+        return "SUCCESS", job["result"]
+    return job["status"], None
 
 
 def get_asr_supported_languages():
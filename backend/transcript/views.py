@@ -80,6 +80,11 @@ import os
 from .utils.timestamp import *
 import openai
 from utils.llm_api import get_model_output
+from utils.segment_store import (
+    get_segments_page,
+    get_segments_snapshot,
+    save_changed_segments,
+)
 from voiceover.models import VoiceOver
 from django.utils.timezone import now
 
@@ -653,8 +658,10 @@ def generate_transcription(video, lang, user, transcript_type, task, payload):
     }
 
 
-def get_transcript_id(task):
+def get_transcript_id(task, defer_payload=False):
     transcript = Transcript.objects.filter(task=task)
+    if defer_payload:
+        transcript = transcript.defer("payload")
     if "EDIT" in task.task_type:
         if task.status == "NEW":
             transcript_id = None
@@ -947,36 +954,31 @@ def get_payload(request):
             status=status.HTTP_404_NOT_FOUND,
         )
 
-    transcript = get_transcript_id(task)
+    transcript = get_transcript_id(task, defer_payload=True)
     if transcript is None:
         return Response(
             {"message": "Transcript not found."},
             status=status.HTTP_404_NOT_FOUND,
         )
-    else:
-        transcript_id = transcript.id
 
-    # Retrieve the transcript object
-    try:
-        transcript = Transcript.objects.get(pk=transcript_id)
-    except Transcript.DoesNotExist:
-        return Response(
-            {"message": "Transcript doesn't exist."},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
+    # Only the requested page of segments is read from the payload.
+    transcripts = Transcript.objects.filter(pk=transcript.id)
+    start = (int(page) - 1) * int(limit)
+    end = start + int(limit)
+    page_records, segments_count = get_segments_page(transcripts, start, end)
 
-    total_pages = math.ceil(len(transcript.payload["payload"]) / int(limit))
+    total_pages = math.ceil(segments_count / int(limit))
     if total_pages < int(page):
         page = 1
-    start = (int(page) - 1) * int(limit)
-    end = start + int(limit)
-    page_records = transcript.payload["payload"][start:end]
+        start = 0
+        end = int(limit)
+        page_records, segments_count = get_segments_page(transcripts, start, end)
 
     next_page = int(page) + 1
     pre_page = int(page) - 1
 
     if next_page > total_pages:
-        end = len(transcript.payload["payload"])
+        end = segments_count
         next_page = None
 
     if (pre_page <= 0) | (int(page) > total_pages):
@@ -992,14 +994,9 @@ def get_payload(request):
         for i in range(len(page_records)):
             page_records[i]["id"] = start + i
 
-    if "speaker_id" not in transcript.payload["payload"][0]:
-        for i in range(len(transcript.payload["payload"])):
-            transcript.payload["payload"][i]["speaker_id"] = ""
-        transcript.save()
-
-    for segment in transcript.payload["payload"]:
-        if "image_url" not in segment:
-                segment["image_url"] = None
+    for segment in page_records:
+        segment.setdefault("speaker_id", "")
+        segment.setdefault("image_url", None)
 
     count_empty = 0
     records = []
@@ -1015,7 +1012,7 @@ def get_payload(request):
         {
             "payload": response,
             "source_type": transcript.transcript_type,
-            "count": len(transcript.payload["payload"]),
+            "count": segments_count,
             "current_count": len(records),
             "total_pages": total_pages,
             "current": int(page),
@@ -1534,6 +1531,13 @@ def update_transcript(i, start_offset, payload, transcript):
 
 
 def modify_payload(offset, limit, payload, start_offset, end_offset, transcript):
+    """
+    Applies a page of edited segments to transcript.payload.
+
+    Edited segments must be replaced with new dicts, never updated in place:
+    save_changed_segments only writes the segments that are not the same
+    objects as in the snapshot taken before this call.
+    """
     count_sentences = len(transcript.payload["payload"])
     total_pages = math.ceil(len(transcript.payload["payload"]) / int(limit))
     if (
@@ -2244,6 +2248,7 @@ def save_transcription(request):
 
                     tc_status = TRANSCRIPTION_EDIT_INPROGRESS
                     if transcript_obj is not None:
+                        segments_snapshot = get_segments_snapshot(transcript_obj)
                         modify_payload(
                             offset,
                             limit,
@@ -2252,9 +2257,9 @@ def save_transcription(request):
                             end_offset,
                             transcript_obj,
                         )
-                        # transcript_obj.payload = payload
-                        transcript_obj.transcript_type = transcript_obj.transcript_type
-                        transcript_obj.save()
+                        # Only the segments modify_payload replaced are written,
+                        # segments edited in place would not be saved.
+                        save_changed_segments(transcript_obj, segments_snapshot)
                     else:
                         transcript_obj = (
                             Transcript.objects.filter(
@@ -2279,6 +2284,7 @@ def save_transcription(request):
                             task=task,
                             status=tc_status,
                         )
+                        segments_snapshot = get_segments_snapshot(transcript_obj)
                         modify_payload(
                             offset,
                             limit,
@@ -2287,7 +2293,7 @@ def save_transcription(request):
                             end_offset,
                             transcript_obj,
                         )
-                        transcript_obj.save()
+                        save_changed_segments(transcript_obj, segments_snapshot)
                         task.status = "INPROGRESS"
                         task.save()
             else:
@@ -2375,6 +2381,7 @@ def save_transcription(request):
                         .first()
                     )
                     if transcript_obj is not None:
+                        segments_snapshot = get_segments_snapshot(transcript_obj)
                         modify_payload(
                             offset,
                             limit,
@@ -2383,9 +2390,12 @@ def save_transcription(request):
                             end_offset,
                             transcript_obj,
                         )
-                        # transcript_obj.payload = payload
                         transcript_obj.transcript_type = transcript_type
-                        transcript_obj.save()
+                        save_changed_segments(
+                            transcript_obj,
+                            segments_snapshot,
+                            fields=["transcript_type"],
+                        )
                     else:
                         transcript_obj = Transcript.objects.create(
                             transcript_type=transcript_type,
@@ -2397,6 +2407,7 @@ def save_transcription(request):
                             task=task,
                             status=tc_status,
                         )
+                        segments_snapshot = get_segments_snapshot(transcript_obj)
                         modify_payload(
                             offset,
                             limit,
@@ -2405,7 +2416,7 @@ def save_transcription(request):
                             end_offset,
                             transcript_obj,
                         )
-                        transcript_obj.save()
+                        save_changed_segments(transcript_obj, segments_snapshot)
                         task.status = "INPROGRESS"
                         task.save()
 
@@ -0,0 +1,115 @@
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from django.core.management.base import BaseCommand
+from translation import utils
+from translation.utils import get_translations_in_batches
+
+
+def get_stub_handler(latency):
+    class StubNmtHandler(BaseHTTPRequestHandler):
+        """
+        Answers like the NMT API after latency seconds, echoing every source
+        sentence back as its target.
+        """
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(latency)
+            output = json.dumps(
+                {"output": [{"target": i["source"]} for i in body["input"]]}
+            ).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(output)))
+            self.end_headers()
+            self.wfile.write(output)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubNmtHandler
+
+
+def translate_per_batch(url, sentence_list, source_language, target_language, size):
+    """
+    The translation before the parallel engine: one new connection and one
+    blocking request per batch, without the translation memory.
+    """
+    translations = []
+    for i in range(0, len(sentence_list), size):
+        json_data = {
+            "input": [{"source": s} for s in sentence_list[i : i + size]],
+            "config": {
+                "language": {
+                    "sourceLanguage": source_language,
+                    "targetLanguage": target_language,
+                },
+            },
+        }
+        response = requests.post(url, json=json_data)
+        translations.extend(t["target"] for t in response.json()["output"])
+    return translations
+
+
+class Command(BaseCommand):
+    help = "Reports sentences translated per second against a local stub NMT API, per batch and in parallel."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sentences",
+            type=int,
+            default=500,
+            help="Number of distinct sentences translated.",
+        )
+        parser.add_argument("--batch-size", type=int, default=25)
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.2,
+            help="Seconds the stub NMT API takes to answer a batch.",
+        )
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer(
+            ("127.0.0.1", 0), get_stub_handler(options["latency"])
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = "http://127.0.0.1:{}/".format(server.server_address[1])
+        previous_url = utils.nmt_url
+        utils.nmt_url = url
+
+        # A run tag keeps the sentences out of earlier runs' cache entries.
+        run_tag = uuid.uuid4().hex[:8]
+        sentence_list = [
+            f"Sentence {n} of benchmark run {run_tag}."
+            for n in range(options["sentences"])
+        ]
+        sentences, batch_size = len(sentence_list), options["batch_size"]
+        try:
+            start = time.time()
+            translate_per_batch(url, sentence_list, "en", "hi", batch_size)
+            per_batch = time.time() - start
+
+            start = time.time()
+            get_translations_in_batches(sentence_list, "en", "hi", batch_size)
+            parallel = time.time() - start
+
+            start = time.time()
+            get_translations_in_batches(sentence_list, "en", "hi", batch_size)
+            cached = time.time() - start
+        finally:
+            utils.nmt_url = previous_url
+            server.shutdown()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Translated {sentences} distinct sentences: "
+                f"{sentences / per_batch:.1f} sentences/s per batch, "
+                f"{sentences / parallel:.1f} sentences/s in parallel, "
+                f"{sentences / cached:.1f} sentences/s from the translation memory"
+            )
+        )
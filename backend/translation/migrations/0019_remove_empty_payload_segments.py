@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# The voice over get_payload used to drop the empty segments left by
+# unfinished edits from completed translations, and save them, on reads.
+REMOVE_EMPTY_SEGMENTS = """
+UPDATE translation_translation
+SET payload = jsonb_set(
+    payload,
+    '{payload}',
+    COALESCE(
+        (
+            SELECT jsonb_agg(segment ORDER BY position)
+            FROM jsonb_array_elements(payload -> 'payload')
+                WITH ORDINALITY AS segments(segment, position)
+            WHERE jsonb_typeof(segment) = 'object' AND segment ? 'text'
+        ),
+        '[]'::jsonb
+    )
+)
+WHERE status IN ('TRANSLATION_EDIT_COMPLETE', 'TRANSLATION_REVIEW_COMPLETE')
+    AND jsonb_typeof(payload -> 'payload') = 'array'
+    AND jsonb_path_exists(
+        payload, '$.payload[*] ? (@.type() != "object" || !exists(@.text))'
+    )
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("translation", "0018_alter_translation_translation_type"),
+    ]
+
+    operations = [
+        migrations.RunSQL(REMOVE_EMPTY_SEGMENTS, migrations.RunSQL.noop),
+    ]
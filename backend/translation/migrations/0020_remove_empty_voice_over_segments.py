@@ -0,0 +1,41 @@
+from django.db import migrations
+
+# 0019 dropped the empty segments of completed translations. Voice overs are
+# also made from in-progress copies of translations, which the voice over
+# get_payload used to clean up on reads too.
+REMOVE_EMPTY_SEGMENTS = """
+UPDATE translation_translation
+SET payload = jsonb_set(
+    payload,
+    '{payload}',
+    COALESCE(
+        (
+            SELECT jsonb_agg(segment ORDER BY position)
+            FROM jsonb_array_elements(payload -> 'payload')
+                WITH ORDINALITY AS segments(segment, position)
+            WHERE jsonb_typeof(segment) = 'object' AND segment ? 'text'
+        ),
+        '[]'::jsonb
+    )
+)
+WHERE id IN (
+        SELECT translation_id
+        FROM voiceover_voiceover
+        WHERE translation_id IS NOT NULL
+    )
+    AND jsonb_typeof(payload -> 'payload') = 'array'
+    AND jsonb_path_exists(
+        payload, '$.payload[*] ? (@.type() != "object" || !exists(@.text))'
+    )
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("translation", "0019_remove_empty_payload_segments"),
+        ("voiceover", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunSQL(REMOVE_EMPTY_SEGMENTS, migrations.RunSQL.noop),
+    ]
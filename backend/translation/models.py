@@ -37,6 +37,22 @@ TRANSLATION_STATUS = (
 )
 
 
+def remove_empty_segments(translation):
+    """
+    Drops the segments left empty by edits from a translation, as voice overs
+    index the segments of the translation they are made from.
+    """
+    if (
+        type(translation.payload) == dict
+        and type(translation.payload.get("payload")) == list
+    ):
+        translation.payload["payload"] = [
+            segment
+            for segment in translation.payload["payload"]
+            if type(segment) == dict and "text" in segment
+        ]
+
+
 class Translation(models.Model):
     """
     Translation model
@@ -106,5 +122,14 @@ class Translation(models.Model):
         auto_now=True, verbose_name="Translation Updated At"
     )
 
+    def save(self, *args, **kwargs):
+        if self.status in (TRANSLATION_EDIT_COMPLETE, TRANSLATION_REVIEW_COMPLETE):
+            remove_empty_segments(self)
+        if self.status == TRANSLATION_EDIT_COMPLETE:
+            from project.utils import set_payload_word_diff
+
+            set_payload_word_diff(self, TRANSLATION_SELECT_SOURCE, "target_text")
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return "Translation: " + str(self.translation_uuid)
@@ -1,3 +1,29 @@
-from django.test import TestCase
+from types import SimpleNamespace
+from django.test import SimpleTestCase
+from utils.segment_store import get_changed_segment_indices, get_segments_snapshot
+from .views import modify_payload
 
-# Create your tests here.
+
+def get_segment(n, target_text):
+    return {
+        "start_time": "00:00:0{}.000".format(n),
+        "end_time": "00:00:0{}.500".format(n),
+        "text": "text",
+        "target_text": target_text,
+        "speaker_id": "",
+    }
+
+
+class ModifyPayloadTests(SimpleTestCase):
+    def test_modify_payload_replaces_edited_segments(self):
+        translation = SimpleNamespace(
+            payload={"payload": [get_segment(n, "old") for n in range(4)]}
+        )
+        snapshot = get_segments_snapshot(translation)
+        page = {"payload": [get_segment(0, "new"), get_segment(1, "old")]}
+        modify_payload(2, page, 0, 2, translation)
+        self.assertEqual(
+            get_changed_segment_indices(translation.payload["payload"], snapshot),
+            [0, 1],
+        )
+        self.assertEqual(translation.payload["payload"][0]["target_text"], "new")
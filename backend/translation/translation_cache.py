@@ -0,0 +1,76 @@
+import hashlib
+import json
+import logging
+import redis
+from config import (
+    redis_host,
+    redis_port,
+    translation_cache_redis_db,
+    translation_cache_ttl,
+)
+
+translation_cache_redis_client = None
+
+TRANSLATION_CACHE_KEY_PREFIX = "nmt:"
+TRANSLATION_CACHE_HITS_KEY = "translation_cache:hits"
+TRANSLATION_CACHE_MISSES_KEY = "translation_cache:misses"
+
+
+class TranslationCache:
+    """
+    Translation memory of machine translations stored in Redis.
+
+    Entries are keyed by a hash of the source text, source language, target
+    language and NMT model, and expire after translation_cache_ttl seconds.
+    Redis errors are logged and treated as misses.
+    """
+
+    def __init__(self):
+        pass
+
+    def get_redis_instance(self):
+        global translation_cache_redis_client
+        if not translation_cache_redis_client:
+            translation_cache_redis_client = redis.Redis(
+                host=redis_host, port=redis_port, db=translation_cache_redis_db
+            )
+        return translation_cache_redis_client
+
+    def make_key(self, text, source_language, target_language, model_id):
+        key_input = json.dumps(
+            [text, source_language, target_language, model_id], ensure_ascii=False
+        )
+        return (
+            TRANSLATION_CACHE_KEY_PREFIX
+            + hashlib.sha256(key_input.encode("utf-8")).hexdigest()
+        )
+
+    def get_many(self, keys):
+        """
+        Returns the cached translations for keys, None for every miss.
+        """
+        if not keys:
+            return []
+        try:
+            client = self.get_redis_instance()
+            values = client.mget(keys)
+            hits = len([val for val in values if val is not None])
+            pipe = client.pipeline(transaction=False)
+            pipe.incrby(TRANSLATION_CACHE_HITS_KEY, hits)
+            pipe.incrby(TRANSLATION_CACHE_MISSES_KEY, len(keys) - hits)
+            pipe.execute()
+            logging.info("Translation cache hits %s, misses %s", hits, len(keys) - hits)
+            return [val.decode("utf-8") if val is not None else None for val in values]
+        except Exception as e:
+            logging.info("Exception in TranslationCache: get_many | Cause: " + str(e))
+            return [None] * len(keys)
+
+    def set_many(self, items):
+        try:
+            client = self.get_redis_instance()
+            pipe = client.pipeline(transaction=False)
+            for key, value in items:
+                pipe.set(key, value, ex=translation_cache_ttl)
+            pipe.execute()
+        except Exception as e:
+            logging.info("Exception in TranslationCache: set_many | Cause: " + str(e))
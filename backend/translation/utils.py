@@ -11,7 +11,14 @@ from django.http import HttpResponse, StreamingHttpResponse
 from io import StringIO, BytesIO
 import os
 import datetime
-from config import nmt_url, dhruva_key, app_name
+from config import (
+    nmt_url,
+    dhruva_key,
+    app_name,
+    nmt_max_workers,
+    nmt_timeout,
+    nmt_max_retries,
+)
 from .metadata import LANG_CODE_TO_NAME, english_noise_tags, target_noise_tags
 import math
 from task.models import Task
@@ -28,6 +35,10 @@ import logging
 from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
 import zipfile 
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .translation_cache import TranslationCache
 
 def send_report_as_attachment(subject, body, user, attachment_content, filename, mime_type):
     try:
@@ -556,12 +567,40 @@ def convert_to_paragraph_with_images_bilingual(payload, video_name, task_id, use
         mime_type="application/zip"
     )
 
+
+def get_nmt_session():
+    """
+    Keep-alive session shared by all NMT calls of a process, retrying
+    transient failures with backoff.
+    """
+    session = requests.Session()
+    retries = Retry(
+        total=nmt_max_retries,
+        backoff_factor=1,
+        status_forcelist=[500, 502, 503, 504],
+        allowed_methods=["POST"],
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_maxsize=nmt_max_workers, pool_block=True, max_retries=retries
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"authorization": dhruva_key})
+    return session
+
+
+nmt_session = get_nmt_session()
+translation_cache = TranslationCache()
+
+
 def get_batch_translations_using_indictrans_nmt_api(
     sentence_list,
     source_language,
     target_language,
 ):
     """Function to get the translation for the input sentences using the IndicTrans NMT API.
+    Sentences found in the translation memory are not sent to the API.
     Args:
         sentence_list (str): List of sentences to be translated.
         source_language (str): Original language of the sentence.
@@ -576,8 +615,19 @@ def get_batch_translations_using_indictrans_nmt_api(
     # logging.info("source_language_name %s", source_language_name)
     logging.info("target_language_name %s", target_language_name)
 
+    cache_keys = [
+        translation_cache.make_key(sentence, source_language, target_language, nmt_url)
+        for sentence in sentence_list
+    ]
+    translations = translation_cache.get_many(cache_keys)
+    missed_indices = [
+        ind for ind, translation in enumerate(translations) if translation is None
+    ]
+    if len(missed_indices) == 0:
+        return translations
+
     # Create the input sentences list
-    input_sentences = [{"source": sentence} for sentence in sentence_list]
+    input_sentences = [{"source": sentence_list[ind]} for ind in missed_indices]
 
     json_data = {
         "input": input_sentences,
@@ -589,19 +639,59 @@ def get_batch_translations_using_indictrans_nmt_api(
         },
     }
     try:
-        response = requests.post(
-            nmt_url,
-            headers={"authorization": dhruva_key},
-            json=json_data,
-        )
+        response = nmt_session.post(nmt_url, json=json_data, timeout=nmt_timeout)
         translations_output = response.json()["output"]
+        if len(translations_output) != len(missed_indices):
+            return "Error while generating translation."
         # Collect the translated sentences
-        return [translation["target"] for translation in translations_output]
+        for ind, translation in zip(missed_indices, translations_output):
+            translations[ind] = translation["target"]
+        translation_cache.set_many(
+            [(cache_keys[ind], translations[ind]) for ind in missed_indices]
+        )
+        return translations
     except Exception as e:
         logging.info("Error in generating translation Output")
         return str(e)
 
 
+def get_translations_in_batches(
+    sentence_list, source_language, target_language, batch_size
+):
+    """
+    Translates sentence_list with several NMT batches in flight at once.
+    Repeated sentences are translated once. Returns the translations in
+    input order, or the error string of the first failed batch.
+    """
+    unique_sentences = list(dict.fromkeys(sentence_list))
+    batches = [
+        unique_sentences[i : i + batch_size]
+        for i in range(0, len(unique_sentences), batch_size)
+    ]
+    with ThreadPoolExecutor(max_workers=nmt_max_workers) as executor:
+        batch_outputs = list(
+            executor.map(
+                lambda batch: get_batch_translations_using_indictrans_nmt_api(
+                    sentence_list=batch,
+                    source_language=source_language,
+                    target_language=target_language,
+                ),
+                batches,
+            )
+        )
+    translated_sentences = {}
+    for batch, translations_output in zip(batches, batch_outputs):
+        # Check if translations output doesn't return a string error
+        if isinstance(translations_output, str):
+            return translations_output
+        translated_sentences.update(zip(batch, translations_output))
+    return [
+        translated_sentences[sentence]
+        for sentence in sentence_list
+        if sentence in translated_sentences
+    ]
+
+
 def convert_payload_format(data):
     if data:
         subtitle_url = [item["url"] for item in data if item["ext"] == "vtt"][0]
@@ -843,25 +933,15 @@ def translation_mg(transcript, target_language, user_id, batch_size=25):
     for ind in delete_indices:
         vtt_output["payload"].pop(ind)
 
-    all_translated_sentences = []  # List to store all the translated sentences
-
-    # Iterate over the sentences in batch format and send them to the Translation API
-    for i in range(0, len(sentence_list), batch_size):
-        batch_of_input_sentences = sentence_list[i : i + batch_size]
-        # Get the translation using the Indictrans NMT API
-        translations_output = get_batch_translations_using_indictrans_nmt_api(
-            sentence_list=batch_of_input_sentences,
-            source_language=transcript.language,
-            target_language=target_language,
+    # Send the sentences to the Translation API in batches
+    all_translated_sentences = get_translations_in_batches(
+        sentence_list, transcript.language, target_language, batch_size
+    )
+    # Check if translations output doesn't return a string error
+    if isinstance(all_translated_sentences, str):
+        return Response(
+            {"message": all_translated_sentences}, status=status.HTTP_400_BAD_REQUEST
         )
-        # Check if translations output doesn't return a string error
-        if isinstance(translations_output, str):
-            return Response(
-                {"message": translations_output}, status=status.HTTP_400_BAD_REQUEST
-            )
-        else:
-            # Add the translated sentences to the list
-            all_translated_sentences.extend(translations_output)
 
     # Check if the length of the translated sentences is equal to the length of the input sentences
     if len(all_translated_sentences) != len(sentence_list):
@@ -930,7 +1010,16 @@ def translation_mg(transcript, target_language, user_id, batch_size=25):
     tmxservice = TMXService()
     import platform
 
-    for source, target in zip(vtt_output["payload"], all_translated_sentences):
+    tmx_phrases_list = tmxservice.get_tmx_phrases_batch(
+        str(user_id),
+        None,
+        transcript.language + "|" + target_language,
+        [source["text"] for source in vtt_output["payload"]],
+        "USER",
+    )
+    for index, (source, target) in enumerate(
+        zip(vtt_output["payload"], all_translated_sentences)
+    ):
         # start_time = datetime.datetime.strptime(source["start_time"], "%H:%M:%S.%f")
         # end_time = datetime.datetime.strptime(source["end_time"], "%H:%M:%S.%f")
 
@@ -965,13 +1054,7 @@ def translation_mg(transcript, target_language, user_id, batch_size=25):
         source["end_time"] = format_timestamp(source["end_time"])
 
         if "speaker_id" in source.keys():
-            locale = transcript.language + "|" + target_language
-            org_id = None
-            user_id = str(user_id)
-            tmx_level = "USER"
-            tmx_phrases, res_dict = tmxservice.get_tmx_phrases(
-                user_id, org_id, locale, source["text"], tmx_level
-            )
+            tmx_phrases, res_dict = tmx_phrases_list[index]
             tgt, tmx_replacement = tmxservice.replace_nmt_tgt_with_user_tgt(
                 tmx_phrases, source["text"], target
             )
@@ -993,13 +1076,7 @@ def translation_mg(transcript, target_language, user_id, batch_size=25):
                 }
             )
         else:
-            locale = transcript.language + "|" + target_language
-            user_id = str(user_id)
-            org_id = None
-            tmx_level = "USER"
-            tmx_phrases, res_dict = tmxservice.get_tmx_phrases(
-                user_id, org_id, locale, source["text"], tmx_level
-            )
+            tmx_phrases, res_dict = tmx_phrases_list[index]
             # [{'src_phrase': 'Python', 'tmx_tgt': 'अजगर', 'tgt': 'पायथन', 'type': 'NMT'}]
             tgt, tmx_replacement = tmxservice.replace_nmt_tgt_with_user_tgt(
                 tmx_phrases, source["text"], target
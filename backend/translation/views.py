@@ -73,6 +73,11 @@ from transcript.utils.timestamp import *
 from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
 from transcript.views import get_transcript_id
+from utils.segment_store import (
+    get_segments_page,
+    get_segments_snapshot,
+    save_changed_segments,
+)
 from task.tasks import celery_nmt_tts_call
 from django.utils.timezone import now
 from users.models import User
@@ -508,8 +513,10 @@ def retrieve_all_translations(request):
     return Response(all_translations, status=status.HTTP_200_OK)
 
 
-def get_translation_id(task):
+def get_translation_id(task, defer_payload=False):
     translation = Translation.objects.filter(task=task)
+    if defer_payload:
+        translation = translation.defer("payload")
     if "EDIT" in task.task_type:
         if task.status == "NEW":
             translation_id = None
@@ -771,35 +778,26 @@ def get_payload(request):
             status=status.HTTP_404_NOT_FOUND,
         )
 
-    translation = get_translation_id(task)
-    if translation is not None:
-        translation_id = translation.id
-    else:
-        return Response(
-            {"message": "Translation doesn't exist."},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
-
-    # Retrieve the transcript object
-    try:
-        translation = Translation.objects.get(pk=translation_id)
-    except Translation.DoesNotExist:
+    translation = get_translation_id(task, defer_payload=True)
+    if translation is None:
         return Response(
             {"message": "Translation doesn't exist."},
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    # Only the requested page of segments is read from the payload.
     start = (int(page) - 1) * int(limit)
     end = start + int(limit)
-    page_records = translation.payload["payload"][start:end]
-    records = translation.payload["payload"]
+    page_records, segments_count = get_segments_page(
+        Translation.objects.filter(pk=translation.id), start, end
+    )
 
-    total_pages = math.ceil(len(translation.payload["payload"]) / int(limit))
+    total_pages = math.ceil(segments_count / int(limit))
     next_page = int(page) + 1
     pre_page = int(page) - 1
 
     if next_page > total_pages:
-        end = len(translation.payload["payload"])
+        end = segments_count
         next_page = None
 
     if (pre_page <= 0) | (int(page) > total_pages):
@@ -829,7 +827,7 @@ def get_payload(request):
         {
             "payload": response,
             "source_type": translation.translation_type,
-            "count": len(translation.payload["payload"]),
+            "count": segments_count,
             "current_count": len(records),
             "total_pages": total_pages,
             "current": int(page),
@@ -1396,6 +1394,13 @@ def generate_translation_output(request):
 
 
 def modify_payload(limit, payload, start_offset, end_offset, translation):
+    """
+    Applies a page of edited segments to translation.payload.
+
+    Edited segments must be replaced with new dicts, never updated in place:
+    save_changed_segments only writes the segments that are not the same
+    objects as in the snapshot taken before this call.
+    """
     count_sentences = len(translation.payload["payload"])
     for i in range(len(payload["payload"])):
         if "retranslate" in payload["payload"][i].keys():
@@ -1825,6 +1830,7 @@ def save_translation(request):
                             .order_by("-updated_at")
                             .first()
                         )
+                        segments_snapshot = get_segments_snapshot(translation_obj)
                         modify_payload(
                             limit,
                             payload,
@@ -1832,7 +1838,9 @@ def save_translation(request):
                             end_offset,
                             translation_obj,
                         )
-                        translation_obj.save()
+                        # Only the segments modify_payload replaced are written,
+                        # segments edited in place would not be saved.
+                        save_changed_segments(translation_obj, segments_snapshot)
                         # logging.info("Error in saving translation")
                     else:
                         translation_obj = (
@@ -1857,10 +1865,11 @@ def save_translation(request):
                             status=ts_status,
                             task=task,
                         )
+                        segments_snapshot = get_segments_snapshot(translation_obj)
                         modify_payload(
                             limit, payload, start_offset, end_offset, translation_obj
                         )
-                        translation_obj.save()
+                        save_changed_segments(translation_obj, segments_snapshot)
                         task.status = "INPROGRESS"
                         task.save()
             else:
@@ -1936,11 +1945,16 @@ def save_translation(request):
                     ts_status = TRANSLATION_REVIEW_INPROGRESS
                     translation_type = translation.translation_type
                     if translation_obj is not None:
+                        segments_snapshot = get_segments_snapshot(translation_obj)
                         modify_payload(
                             limit, payload, start_offset, end_offset, translation_obj
                         )
                         translation_obj.translation_type = translation_type
-                        translation_obj.save()
+                        save_changed_segments(
+                            translation_obj,
+                            segments_snapshot,
+                            fields=["translation_type"],
+                        )
                         task.status = "INPROGRESS"
                         task.save()
                     else:
@@ -1956,10 +1970,11 @@ def save_translation(request):
                             status=ts_status,
                             task=task,
                         )
+                        segments_snapshot = get_segments_snapshot(translation_obj)
                         modify_payload(
                             limit, payload, start_offset, end_offset, translation_obj
                         )
-                        translation_obj.save()
+                        save_changed_segments(translation_obj, segments_snapshot)
                         task.status = "INPROGRESS"
                         task.save()
             if request.data.get("final"):
@@ -13,121 +13,179 @@ from task.models import Task
 from datetime import datetime, timedelta
 from django.db.models import Q
 import pandas as pd
-from django.core.mail import send_mail, EmailMultiAlternatives
+from django.core.mail import send_mail, EmailMultiAlternatives, get_connection
+from django.db import connection
 from django.conf import settings
 from pretty_html_table import build_table
 import numpy as np
-import datetime
-from datetime import timedelta, datetime
 from django.utils import timezone
 from django.utils.timezone import localdate, localtime, now
 from users.models import User
-from video.models import Video
 import logging
-from organization.models import Organization
+from collections import defaultdict
+from contextlib import contextmanager
 from config import app_name
 from utils.email_template import send_email_template_with_attachment,complete_email_template_with_attachment
 
 
+def render_digest_table(records):
+    df = pd.DataFrame.from_records(records)
+    blankIndex = [""] * len(df)
+    df.index = blankIndex
+    html_table_df_tasks = build_table(
+        df,
+        "blue_dark",
+        font_size="medium",
+        text_align="left",
+        width="auto",
+        padding="5px 5px 5px 5px",
+        index=False,
+    )
+    return f"""
+<style>
+  @media only screen and (max-width: 600px) {{
+      .responsive-table-container {{
+          width: 100%;
+          overflow-x: scroll;
+      }}
+  }}
+</style>
+<div class="responsive-table-container" style="overflow-x: auto; width: 100%; ">
+    <div style="display: inline-block; min-width: 800px;">
+        {html_table_df_tasks}
+    </div>
+</div>
+"""
+
+
+def build_digest_mail(subject, recipient, compiled_msg):
+    msg = EmailMultiAlternatives(
+        subject,
+        compiled_msg,
+        settings.DEFAULT_FROM_EMAIL,
+        [recipient],
+    )
+    msg.attach_alternative(compiled_msg, "text/html")
+    return msg
+
+
+def send_digest_mails(messages):
+    """
+    Sends all the digests of a run over one SMTP connection.
+    """
+    if len(messages) == 0:
+        return 0
+    mail_connection = get_connection()
+    return mail_connection.send_messages(messages) or 0
+
+
+@contextmanager
+def digest_run(name):
+    """
+    Records the duration, query count and number of mails of a scheduled
+    mail job. The stats are logged and returned by the celery task.
+    """
+    stats = {"name": name, "mails": 0, "queries": 0}
+
+    def count_queries(execute, sql, params, many, context):
+        stats["queries"] += 1
+        return execute(sql, params, many, context)
+
+    start_time = time.monotonic()
+    try:
+        with connection.execute_wrapper(count_queries):
+            yield stats
+    finally:
+        stats["duration"] = round(time.monotonic() - start_time, 3)
+        logging.info(
+            "%s digest sent %s mails in %ss with %s queries",
+            name,
+            stats["mails"],
+            stats["duration"],
+            stats["queries"],
+        )
+
+
+def get_manager_task_digests(statuses, start_time, end_time):
+    """
+    Returns the active tasks with one of the statuses updated in the window,
+    grouped by the managers of their projects who have mails enabled.
+    """
+    tasks = (
+        Task.objects.filter(status__in=statuses)
+        .filter(is_active=True)
+        .filter(updated_at__range=(start_time, end_time))
+        .select_related("video", "video__project_id", "user")
+        .order_by("video__project_id", "id")
+    )
+    tasks_by_project = defaultdict(list)
+    for task in tasks:
+        tasks_by_project[task.video.project_id_id].append(
+            {
+                "Project Name": task.video.project_id.title,
+                "Task ID": task.id,
+                "Task Type": task.get_task_type_label,
+                "Video Name": task.video.name,
+                "Video Url": task.video.url,
+                "Task Assignee": task.user,
+            }
+        )
+    if len(tasks_by_project) == 0:
+        return {}
+
+    project_managers = (
+        Project.managers.through.objects.filter(project_id__in=tasks_by_project)
+        .filter(user__enable_mail=True)
+        .select_related("user")
+        .order_by("project_id", "user_id")
+    )
+    digests = {}
+    for project_manager in project_managers:
+        digests.setdefault(project_manager.user, []).extend(
+            tasks_by_project[project_manager.project_id]
+        )
+    return digests
+
+
 def get_completed_tasks():
     logging.info("Calculate Reports...")
-    current_time = localtime(now())
-    logging.info("current_time %s", str(current_time))
-    three_hours_earlier = current_time - timedelta(hours=6)
-    projects = Project.objects.all()
-    project_managers = {}
-    for project in list(projects):
-        project_managers[project.id] = list(project.managers.all())
-
-    for project, managers in project_managers.items():
-        for manager in managers:
-            if not manager.enable_mail:
-                continue
-            tasks_managed = []
-            videos = Video.objects.filter(project_id=project)
-            tasks_in_project = (
-                Task.objects.filter(video__in=videos)
-                .filter(status__in=["COMPLETE"])
-                .filter(is_active=True)
-                .filter(updated_at__range=(three_hours_earlier, current_time))
+    with digest_run("Completed tasks") as stats:
+        current_time = localtime(now())
+        logging.info("current_time %s", str(current_time))
+        three_hours_earlier = current_time - timedelta(hours=6)
+        digests = get_manager_task_digests(
+            ["COMPLETE"], three_hours_earlier, current_time
+        )
+
+        messages = []
+        for manager, tasks_managed in digests.items():
+            message = (
+                "Hope you are doing great  "
+                + str(manager.first_name + " " + manager.last_name)
+                + ",\n Following tasks are completed now."
             )
-            for task in tasks_in_project:
-                logging.info("Task ID %s", str(task.id))
-                tasks_managed.append(
-                    {
-                        "Project Name": task.video.project_id.title,
-                        "Task ID": task.id,
-                        "Task Type": task.get_task_type_label,
-                        "Video Name": task.video.name,
-                        "Video Url": task.video.url,
-                        "Task Assignee": task.user,
-                    }
-                )
-            if len(tasks_managed) > 0:
-                df = pd.DataFrame.from_records(tasks_managed)
-                blankIndex = [""] * len(df)
-                df.index = blankIndex
-                html_table_df_tasks = build_table(
-                    df,
-                    "blue_dark",
-                    font_size="medium",
-                    text_align="left",
-                    width="auto",
-                    padding="5px 5px 5px 5px",
-                    index=False,
-                )
-                centered_html_table = f"""
-                    <style>
-                  @media only screen and (max-width: 600px) {{
-                 .responsive-table-container {{
-                  width: 100%;
-                overflow-x: scroll;
-                 }}
-                }}
-                </style>
-                     <div class="responsive-table-container" style="overflow-x: auto; width: 100%; ">
-                            <div style="display: inline-block; min-width: 800px;">
-                                     {html_table_df_tasks}
-                            </div>
-                      </div>
-                """
-                message = (
-                    "Hope you are doing great  "
-                    + str(manager.first_name + " " + manager.last_name)
-                    + ",\n Following tasks are completed now."
-                )
 
-                email_to_send = (
-                    '<p style="font-size:14px;">'
-                    + message
-                    + "</p><br><h3><b>Tasks Reports</b></h3>"
-                    + centered_html_table
-                )
-                logging.info("Sending Mail to %s", manager.email)
+            email_to_send = (
+                '<p style="font-size:14px;">'
+                + message
+                + "</p><br><h3><b>Tasks Reports</b></h3>"
+                + render_digest_table(tasks_managed)
+            )
+            logging.info("Sending Mail to %s", manager.email)
 
-                compiled_msg = complete_email_template_with_attachment(
-                    subject=f"{app_name} - Completed Tasks Report",
-                    username=manager["email"].split("@")[0],
-                    message=email_to_send,
-                )
-                msg = EmailMultiAlternatives(
-                    f"{app_name} - Completed Tasks Report",
-                    compiled_msg,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [manager.email],
+            compiled_msg = complete_email_template_with_attachment(
+                subject=f"{app_name} - Completed Tasks Report",
+                username=manager.email.split("@")[0],
+                message=email_to_send,
+            )
+            messages.append(
+                build_digest_mail(
+                    f"{app_name} - Completed Tasks Report", manager.email, compiled_msg
                 )
-                email_content = compiled_msg
-                msg.attach_alternative(email_content, "text/html")
-                msg.send()
-                # send_mail(
-                #     f"{app_name} - Completed Tasks Report",
-                #     message,
-                #     settings.DEFAULT_FROM_EMAIL,
-                #     [manager.email],
-                #     html_message=email_to_send,
-                # )
-            else:
-                html_table_df_tasks = ""
+            )
+        stats["mails"] = send_digest_mails(messages)
+    return stats
+
 
 def get_active_tasks():
     users = User.objects.filter(id__in=[2248, 2252, 2253, 2254, 2255, 2256, 2257, 2259, 2263, 2264, 2266, 2268, 2273, 2278, 2281, 2282, 2283, 2286, 2289, 2291, 2293, 2296, 2299, 2300, 2320, 2322, 2326, 2328, 2329, 2336, 2337, 2338, 2339, 2340, 2343, 2344, 2345, 2351, 2353, 2360, 2361, 2365, 2374, 2376, 2379, 2390, 2395, 2402, 2405, 2459, 2461, 2471, 2472, 2480, 2485, 2486, 2487, 2550, 2559, 64])
@@ -203,123 +261,60 @@ def get_active_tasks():
 
 def get_new_tasks():
     logging.info("Calculate Reports...")
-    current_time = localtime(now())
-    logging.info("current_time %s", str(current_time))
-    three_hours_earlier = current_time - timedelta(hours=24)
-    projects = Project.objects.all()
-    project_managers = {}
-    for project in list(projects):
-        project_managers[project.id] = list(project.managers.all())
-
-    for project, managers in project_managers.items():
-        for manager in managers:
-            if not manager.enable_mail:
-                continue
-            tasks_managed = []
-            videos = Video.objects.filter(project_id=project)
-            tasks_in_project = (
-                Task.objects.filter(video__in=videos)
-                .filter(status__in=["SELECTED_SOURCE", "NEW"])
-                .filter(is_active=True)
-                .filter(updated_at__range=(three_hours_earlier, current_time))
-            )
-            for task in tasks_in_project:
-                logging.info("Task ID %s", str(task.id))
-                tasks_managed.append(
-                    {
-                        "Project Name": task.video.project_id.title,
-                        "Task ID": task.id,
-                        "Task Type": task.get_task_type_label,
-                        "Video Name": task.video.name,
-                        "Video Url": task.video.url,
-                        "Task Assignee": task.user,
-                    }
-                )
-            if len(tasks_managed) > 0:
-                df = pd.DataFrame.from_records(tasks_managed)
-                blankIndex = [""] * len(df)
-                df.index = blankIndex
-                html_table_df_tasks = build_table(
-                    df,
-                    "blue_dark",
-                    font_size="medium",
-                    text_align="left",
-                    width="auto",
-                    padding="5px 5px 5px 5px",
-                    index=False,
-                )
-                centered_html_table = f"""
-<style>
-  @media only screen and (max-width: 600px) {{
-      .responsive-table-container {{
-          width: 100%;
-          overflow-x: scroll;
-      }}
-  }}
-</style>
-<div class="responsive-table-container" style="overflow-x: auto; width: 100%; ">
-    <div style="display: inline-block; min-width: 800px;">
-        {html_table_df_tasks}
-    </div>
-</div>
-"""
+    with digest_run("New tasks") as stats:
+        current_time = localtime(now())
+        logging.info("current_time %s", str(current_time))
+        three_hours_earlier = current_time - timedelta(hours=24)
+        digests = get_manager_task_digests(
+            ["SELECTED_SOURCE", "NEW"], three_hours_earlier, current_time
+        )
 
-                message = (
-                    "Hope you were doing great  "
-                    + str(manager.first_name + " " + manager.last_name)
-                    + ",\n Following tasks are active now."
-                )
+        messages = []
+        for manager, tasks_managed in digests.items():
+            message = (
+                "Hope you were doing great  "
+                + str(manager.first_name + " " + manager.last_name)
+                + ",\n Following tasks are active now."
+            )
 
-                email_to_send = (
-                    '<p style="font-size:14px;">'
-                    + message
-                    + "</p><br><h3><b>Tasks Reports</b></h3>"
-                    + centered_html_table
-                )
-                logging.info("Sending Mail to %s", manager.email)
+            email_to_send = (
+                '<p style="font-size:14px;">'
+                + message
+                + "</p><br><h3><b>Tasks Reports</b></h3>"
+                + render_digest_table(tasks_managed)
+            )
+            logging.info("Sending Mail to %s", manager.email)
 
-                compiled_msg = send_email_template_with_attachment(
-                    subject=f"{app_name} - Tasks Assignment Status Report",
-                    username=manager["email"].split("@")[0],
-                    message=email_to_send,
-                )
-                msg = EmailMultiAlternatives(
+            compiled_msg = send_email_template_with_attachment(
+                subject=f"{app_name} - Tasks Assignment Status Report",
+                username=manager.email.split("@")[0],
+                message=email_to_send,
+            )
+            messages.append(
+                build_digest_mail(
                     f"{app_name} - Tasks Assignment Status Report",
+                    manager.email,
                     compiled_msg,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [manager.email],
                 )
-                email_content = compiled_msg
-                msg.attach_alternative(email_content, "text/html")
-                msg.send()
-
-                # send_mail(
-                #     f"{app_name} - Tasks Assignment Status Report",
-                #     message,
-                #     settings.DEFAULT_FROM_EMAIL,
-                #     [manager.email],
-                #     html_message=email_to_send,
-                # )
-            else:
-                html_table_df_tasks = ""
+            )
+        stats["mails"] = send_digest_mails(messages)
+    return stats
 
 
 def get_eta_reminders():
-    users = User.objects.filter(enable_mail=True).filter(has_accepted_invite=True).all()
-    now = timezone.now()
-    eta_today = now + timezone.timedelta(hours=1)
-
-    # Get all objects created in the past 24 hours
-    for user in users:
+    with digest_run("ETA reminders") as stats:
+        eta_today = timezone.now() + timezone.timedelta(hours=1)
         tasks_assigned = (
-            Task.objects.filter(user=user)
+            Task.objects.filter(user__enable_mail=True)
+            .filter(user__has_accepted_invite=True)
             .filter(eta__date=eta_today)
             .filter(is_active=True)
-            .all()
+            .select_related("video", "user")
+            .order_by("user_id", "id")
         )
-        task_assigned_info = []
+        task_assigned_info = {}
         for task in tasks_assigned:
-            task_assigned_info.append(
+            task_assigned_info.setdefault(task.user, []).append(
                 {
                     "Task ID": task.id,
                     "Task Type": task.get_task_type_label,
@@ -327,34 +322,9 @@ def get_eta_reminders():
                     "Video Url": task.video.url,
                 }
             )
-        if len(task_assigned_info) > 0:
-            df = pd.DataFrame.from_records(task_assigned_info)
-            blankIndex = [""] * len(df)
-            df.index = blankIndex
-            html_table_df_tasks = build_table(
-                df,
-                "blue_dark",
-                font_size="medium",
-                text_align="left",
-                width="auto",
-                padding="5px 5px 5px 5px",
-                index=False,
-            )
-            centered_html_table = f"""
-<style>
-  @media only screen and (max-width: 600px) {{
-      .responsive-table-container {{
-          width: 100%;
-          overflow-x: scroll;
-      }}
-  }}
-</style>
-<div class="responsive-table-container" style="overflow-x: auto; width: 100%; ">
-    <div style="display: inline-block; min-width: 800px;">
-        {html_table_df_tasks}
-    </div>
-</div>
-"""
+
+        messages = []
+        for user, user_tasks in task_assigned_info.items():
             message = (
                 "Hope you are doing great  "
                 + str(user.first_name + " " + user.last_name)
@@ -365,54 +335,32 @@ def get_eta_reminders():
                 '<p style="font-size:14px;">'
                 + message
                 + "</p><br><h3><b>Due Tasks For Today</b></h3>"
-                + centered_html_table
+                + render_digest_table(user_tasks)
             )
             logging.info("Sending Mail to %s", user.email)
 
             compiled_msg = send_email_template_with_attachment(
                 subject=f"{app_name} - Tasks Assignment Status Report",
-                username=user["email"].split("@")[0],
+                username=user.email.split("@")[0],
                 message=email_to_send,
             )
-            msg = EmailMultiAlternatives(
-                f"{app_name} - Tasks Assignment Status Report",
-                compiled_msg,
-                settings.DEFAULT_FROM_EMAIL,
-                [user.email],
+            messages.append(
+                build_digest_mail(
+                    f"{app_name} - Tasks Assignment Status Report",
+                    user.email,
+                    compiled_msg,
+                )
             )
-            msg.attach_alternative(compiled_msg, "text/html")
-            msg.send()
-            # send_mail(
-            #     f"{app_name} - Due Tasks",
-            #     message,
-            #     settings.DEFAULT_FROM_EMAIL,
-            #     [user.email],
-            #     html_message=email_to_send,
-            # )
-        else:
-            html_table_df_tasks = ""
+        stats["mails"] = send_digest_mails(messages)
+    return stats
 
 
 def get_new_users():
-    organization_owners = list(
-        set(
-            chain.from_iterable(
-                organization.organization_owners.all()
-                for organization in Organization.objects.all()
-            )
-        )
-    )
-
-    now = timezone.now()
-    past_24_hours = now - timezone.timedelta(hours=24)
-    users = User.objects.filter(date_joined__gte=past_24_hours)
-
-    # Get all objects created in the past 24 hours
-    for org_owner in organization_owners:
-        users_in_org = users.filter(organization=org_owner.organization)
-        new_users = []
-        for user in users_in_org:
-            new_users.append(
+    with digest_run("New users") as stats:
+        past_24_hours = timezone.now() - timezone.timedelta(hours=24)
+        new_users = defaultdict(list)
+        for user in User.objects.filter(date_joined__gte=past_24_hours).order_by("id"):
+            new_users[user.organization_id].append(
                 {
                     "Email": user.email,
                     "Role": user.get_role_label,
@@ -420,34 +368,13 @@ def get_new_users():
                     "Languages": ", ".join(user.languages),
                 }
             )
-        if len(new_users) > 0:
-            df = pd.DataFrame.from_records(new_users)
-            blankIndex = [""] * len(df)
-            df.index = blankIndex
-            html_table_df_tasks = build_table(
-                df,
-                "blue_dark",
-                font_size="medium",
-                text_align="left",
-                width="auto",
-                padding="5px 5px 5px 5px",
-                index=False,
-            )
-            centered_html_table = f"""
-<style>
-  @media only screen and (max-width: 600px) {{
-      .responsive-table-container {{
-          width: 100%;
-          overflow-x: scroll;
-      }}
-  }}
-</style>
-<div class="responsive-table-container" style="overflow-x: auto; width: 100%; ">
-    <div style="display: inline-block; min-width: 800px;">
-        {html_table_df_tasks}
-    </div>
-</div>
-"""
+        organization_owners = User.objects.filter(
+            organizations_owned__isnull=False,
+            organization_id__in=[org_id for org_id in new_users if org_id],
+        ).distinct()
+
+        messages = []
+        for org_owner in organization_owners:
             message = (
                 "Dear "
                 + str(org_owner.first_name + " " + org_owner.last_name)
@@ -457,29 +384,18 @@ def get_new_users():
                 '<p style="font-size:14px;">'
                 + message
                 + "</p><br><h3><b>New Users</b></h3>"
-                + centered_html_table
+                + render_digest_table(new_users[org_owner.organization_id])
             )
             logging.info("Sending Mail to %s", org_owner.email)
             compiled_msg = send_email_template_with_attachment(
                 subject=f"{app_name} - New Users",
-                username=user["email"].split("@")[0],
+                username=org_owner.email.split("@")[0],
                 message=email_to_send,
             )
-            msg = EmailMultiAlternatives(
-                f"{app_name} - New Users",
-                compiled_msg,
-                settings.DEFAULT_FROM_EMAIL,
-                [user.email],
+            messages.append(
+                build_digest_mail(
+                    f"{app_name} - New Users", org_owner.email, compiled_msg
+                )
             )
-            msg.attach_alternative(compiled_msg, "text/html")
-            # msg.attach_alternative(html_table_df_tasks, "text/html")
-            msg.send()
-            # send_mail(
-            #     f"{app_name} - New Users",
-            #     message,
-            #     settings.DEFAULT_FROM_EMAIL,
-            #     [org_owner.email],
-            #     html_message=email_to_send,
-            # )
-        else:
-            html_table_df_tasks = ""
\ No newline at end of file
+        stats["mails"] = send_digest_mails(messages)
+    return stats
@@ -10,7 +10,7 @@ from .models import User
 
 @shared_task(name="send_completed_tasks_mail")
 def send_completed_tasks_mail():
-    get_completed_tasks()
+    return get_completed_tasks()
 
 @shared_task(name="send_active_tasks_mail")
 def send_active_tasks_mail():
@@ -18,14 +18,14 @@ def send_active_tasks_mail():
 
 @shared_task(name="send_new_tasks_mail")
 def send_new_tasks_mail():
-    get_new_tasks()
+    return get_new_tasks()
 
 
 @shared_task(name="send_new_users_to_org_owner")
 def send_new_users_to_org_owner():
-    get_new_users()
+    return get_new_users()
 
 
 @shared_task(name="send_eta_reminders")
 def send_eta_reminders():
-    get_eta_reminders()
+    return get_eta_reminders()
@@ -0,0 +1,135 @@
+"""
+Segment level reads and writes of transcript, translation and voice over
+payloads.
+
+An autosave from the editor only replaces the page of segments it sent, but
+saving the model rewrites the whole payload JSON. save_changed_segments
+patches just the replaced segments with jsonb_set, so the payload stays the
+only copy of the segments and every reader of payload["payload"] keeps
+working unchanged. In the same way get_segments_page and get_keyed_segments
+slice the page an editor asks for out of the payload in the database.
+"""
+
+from django.db.models import F, Func, IntegerField, JSONField, Value
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+
+def get_segments_snapshot(obj):
+    """
+    Returns the segments of obj.payload before an edit, for
+    save_changed_segments to find the ones the edit replaced.
+    """
+    return list(obj.payload["payload"])
+
+
+def get_changed_segment_indices(segments, snapshot):
+    """
+    Returns the indices of the segments replaced since the snapshot, or None
+    when segments were inserted or removed.
+
+    Segments are compared by identity, so an edit has to put a new dict in
+    the list. A segment dict changed in place is not reported.
+    """
+    if len(segments) != len(snapshot):
+        return None
+    return [
+        index
+        for index, segment in enumerate(segments)
+        if segment is not snapshot[index]
+    ]
+
+
+def save_changed_segments(obj, snapshot, fields=()):
+    """
+    Writes the segments of obj.payload replaced since the snapshot, and the
+    given model fields, in a single UPDATE. Falls back to a full save when
+    segments were inserted or removed.
+    """
+    segments = obj.payload["payload"]
+    changed_indices = get_changed_segment_indices(segments, snapshot)
+    if changed_indices is None:
+        obj.save()
+        return
+
+    payload = F("payload")
+    for index in changed_indices:
+        payload = Func(
+            payload,
+            Value("{payload,%d}" % index),
+            Value(segments[index], output_field=JSONField()),
+            function="jsonb_set",
+            output_field=JSONField(),
+        )
+    obj.updated_at = timezone.now()
+    type(obj).objects.filter(pk=obj.pk).update(
+        payload=payload,
+        updated_at=obj.updated_at,
+        **{field: getattr(obj, field) for field in fields},
+    )
+
+
+def get_payload_column(queryset):
+    return '"{}"."payload"'.format(queryset.model._meta.db_table)
+
+
+def get_segments_page(queryset, start, end):
+    """
+    Returns segments start to end - 1 of the payload of the object in
+    queryset and its total number of segments. The page is sliced in the
+    database, so reading it doesn't fetch and decode the whole payload.
+    """
+    payload = get_payload_column(queryset)
+    row = (
+        queryset.annotate(
+            segments_page=RawSQL(
+                "CASE WHEN jsonb_typeof({0} -> 'payload') = 'array' "
+                "THEN jsonb_path_query_array({0}, %s) END".format(payload),
+                ("$.payload[{} to {}]".format(max(start, 0), end - 1),),
+                output_field=JSONField(),
+            ),
+            segments_count=RawSQL(
+                "CASE WHEN jsonb_typeof({0} -> 'payload') = 'array' "
+                "THEN jsonb_array_length({0} -> 'payload') ELSE 0 END".format(payload),
+                (),
+                output_field=IntegerField(),
+            ),
+        )
+        .values_list("segments_page", "segments_count")
+        .first()
+    )
+    if row is None:
+        return [], 0
+    return row[0] or [], row[1]
+
+
+def get_keyed_segments(queryset, keys):
+    """
+    Returns the segments with the given keys of a payload keyed by segment
+    index, as voice overs store it, and the total number of keys.
+    """
+    payload = get_payload_column(queryset)
+    row = (
+        queryset.annotate(
+            keyed_segments=RawSQL(
+                "CASE WHEN jsonb_typeof({0} -> 'payload') = 'object' "
+                "THEN (SELECT jsonb_object_agg(key, value) "
+                "FROM jsonb_each({0} -> 'payload') WHERE key = ANY(%s::text[])) "
+                "END".format(payload),
+                ([str(key) for key in keys],),
+                output_field=JSONField(),
+            ),
+            keys_count=RawSQL(
+                "CASE WHEN jsonb_typeof({0} -> 'payload') = 'object' "
+                "THEN (SELECT count(*) FROM jsonb_object_keys({0} -> 'payload')) "
+                "ELSE 0 END".format(payload),
+                (),
+                output_field=IntegerField(),
+            ),
+        )
+        .values_list("keyed_segments", "keys_count")
+        .first()
+    )
+    if row is None:
+        return {}, 0
+    return row[0] or {}, row[1]
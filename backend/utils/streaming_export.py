@@ -0,0 +1,82 @@
+"""
+Streaming exports.
+
+Report emails and task downloads used to build a pandas DataFrame or an
+in-memory zip of the whole export before sending anything. These helpers
+write CSV rows and zip entries as they are produced, so the memory an export
+needs is bounded by one row or one file instead of the number of tasks.
+"""
+
+import csv
+import zipfile
+
+
+class StreamBuffer:
+    """
+    Write only file object that keeps what was written until it is drained.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def get_report_row_values(row):
+    return [field["value"] for field in row.values()]
+
+
+def write_report_csv(file_path, rows):
+    """
+    Writes report rows ({key: {"value", "label"}} dicts) to a CSV file one at
+    a time, using the labels of the first row as the header.
+    """
+    with open(file_path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        for index, row in enumerate(rows):
+            if index == 0:
+                writer.writerow([field["label"] for field in row.values()])
+            writer.writerow(get_report_row_values(row))
+    return file_path
+
+
+def write_records_csv(file_path, records, fieldnames=None):
+    """
+    Writes flat dicts to a CSV file one at a time. The header is fieldnames,
+    and a record with any other key raises ValueError. Without fieldnames it
+    is every key of the records in the order they appear, as the pandas
+    export had, which reads all the records first.
+    """
+    if fieldnames is None:
+        records = list(records)
+        fieldnames = list(dict.fromkeys(key for record in records for key in record))
+    with open(file_path, "w", newline="") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
+        if fieldnames:
+            writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+    return file_path
+
+
+def iter_zip_stream(entries):
+    """
+    Yields the bytes of a zip archive of (file_name, content) entries while
+    the entries are produced, for use as a StreamingHttpResponse body.
+    """
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for file_name, content in entries:
+            zf.writestr(file_name, content)
+            yield buffer.drain()
+    yield buffer.drain()
@@ -22,6 +22,7 @@ from django.http import HttpResponse
 import io
 import zipfile
 from project.models import Project
+from project.utils import select_task_list_related
 import logging
 import datetime
 from datetime import timedelta
@@ -458,7 +459,7 @@ def list_tasks(request):
         )
 
     # Get the tasks for the video
-    tasks = Task.objects.filter(video=video)
+    tasks = select_task_list_related(Task.objects.filter(video=video))
 
     # Return the tasks
     serializer = TaskSerializer(tasks, many=True)
@@ -0,0 +1,239 @@
+"""
+Segment audio store for voice overs.
+
+VoiceOver.payload used to keep the base64 ogg of every segment inline. With a
+store configured, the audio of each segment is uploaded once, keyed by the
+voice over and the segment index, and the payload only keeps a reference:
+
+    "audio": {"audioUri": ..., "duration": 3.2, "size": 51234, "checksum": "<sha256>"}
+
+Readers go through load_segment_audio/get_audio_content, which understand
+both the inline and the reference format. Blobs a save replaces are deleted
+once no voice over payload refers to them anymore, since payloads are copied
+between the edit and review voice overs of a task. VoiceOverAudioReference
+indexes the uris of every payload for that check.
+"""
+
+import base64
+import hashlib
+import io
+import logging
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import mutagen
+from azure.storage.blob import BlobServiceClient
+from django.conf import settings
+from config import connection_string, container_name, voice_over_audio_store
+
+
+class AzureSegmentAudioStore:
+    def __init__(self):
+        self.blob_service_client = BlobServiceClient.from_connection_string(
+            connection_string
+        )
+
+    def put(self, blob_name, data):
+        blob_client = self.blob_service_client.get_blob_client(
+            container=container_name, blob=blob_name
+        )
+        blob_client.upload_blob(data, overwrite=True)
+        return blob_client.url
+
+    def get(self, uri):
+        path = urllib.parse.unquote(urllib.parse.urlparse(uri).path)
+        blob_name = path.split("/" + container_name + "/", 1)[-1]
+        blob_client = self.blob_service_client.get_blob_client(
+            container=container_name, blob=blob_name
+        )
+        return blob_client.download_blob().readall()
+
+    def delete(self, uri):
+        path = urllib.parse.unquote(urllib.parse.urlparse(uri).path)
+        blob_name = path.split("/" + container_name + "/", 1)[-1]
+        blob_client = self.blob_service_client.get_blob_client(
+            container=container_name, blob=blob_name
+        )
+        blob_client.delete_blob()
+
+
+class LocalSegmentAudioStore:
+    def __init__(self):
+        self.root = Path(settings.BASE_DIR) / "voiceover_audio_store"
+
+    def put(self, blob_name, data):
+        path = self.root / blob_name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        return path.as_uri()
+
+    def get(self, uri):
+        return Path(urllib.parse.unquote(urllib.parse.urlparse(uri).path)).read_bytes()
+
+    def delete(self, uri):
+        Path(urllib.parse.unquote(urllib.parse.urlparse(uri).path)).unlink(
+            missing_ok=True
+        )
+
+
+segment_audio_store = None
+
+
+def get_segment_audio_store():
+    """
+    Returns the store new audio is written to, None when audio is kept inline.
+    """
+    global segment_audio_store
+    if segment_audio_store is None:
+        if voice_over_audio_store == "azure":
+            segment_audio_store = AzureSegmentAudioStore()
+        elif voice_over_audio_store == "local":
+            segment_audio_store = LocalSegmentAudioStore()
+    return segment_audio_store
+
+
+def get_store_for_uri(uri):
+    if urllib.parse.urlparse(uri).scheme == "file":
+        return LocalSegmentAudioStore()
+    return AzureSegmentAudioStore()
+
+
+def is_audio_reference(audio):
+    return type(audio) == dict and "audioUri" in audio and "audioContent" not in audio
+
+
+def get_audio_duration(data):
+    try:
+        return mutagen.File(io.BytesIO(data)).info.length
+    except Exception:
+        return None
+
+
+def offload_payload_audio(voice_over_uuid, payload):
+    """
+    Moves the inline audio of every segment of a voice over payload to the
+    segment store and replaces it with a reference. Segments whose audio did
+    not change keep their existing blob.
+    """
+    store = get_segment_audio_store()
+    if store is None or type(payload) != dict or type(payload.get("payload")) != dict:
+        return payload
+    for segment_index, segment in payload["payload"].items():
+        if type(segment) != dict:
+            continue
+        audio = segment.get("audio")
+        if type(audio) != dict:
+            continue
+        if not audio.get("audioContent"):
+            if audio.get("audioUri"):
+                # Audio that could not be fetched for the editor is sent back
+                # empty, the reference is kept.
+                segment["audio"] = {
+                    key: value for key, value in audio.items() if key != "audioContent"
+                }
+            continue
+        data = base64.b64decode(audio["audioContent"])
+        checksum = hashlib.sha256(data).hexdigest()
+        if audio.get("audioUri") and audio.get("checksum") == checksum:
+            # Audio loaded from the store and sent back unchanged.
+            audio_uri = audio["audioUri"]
+        else:
+            blob_name = "voiceover_{}/{}_{}.ogg".format(
+                voice_over_uuid, segment_index, checksum[:16]
+            )
+            audio_uri = store.put(blob_name, data)
+        segment["audio"] = {
+            "audioUri": audio_uri,
+            "duration": get_audio_duration(data),
+            "size": len(data),
+            "checksum": checksum,
+        }
+    return payload
+
+
+def load_segment_audio(audio):
+    """
+    Returns the audio of a segment with its base64 "audioContent", fetching
+    it from the segment store when the payload holds a reference. The
+    reference is kept so unchanged audio is not uploaded again on save.
+    """
+    if not is_audio_reference(audio):
+        return audio
+    try:
+        data = get_store_for_uri(audio["audioUri"]).get(audio["audioUri"])
+    except Exception as e:
+        logging.info("Error in fetching segment audio %s", str(e))
+        return {**audio, "audioContent": ""}
+    return {**audio, "audioContent": base64.b64encode(data).decode()}
+
+
+def load_segments_audio(segments):
+    """
+    Fetches the audio of a page of segments from the store concurrently.
+    """
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        audios = list(
+            executor.map(
+                load_segment_audio, [segment.get("audio") for segment in segments]
+            )
+        )
+    for segment, audio in zip(segments, audios):
+        segment["audio"] = audio
+    return segments
+
+
+def get_audio_content(audio):
+    """
+    Returns the base64 audio of a segment, or "" if it has none.
+    """
+    audio = load_segment_audio(audio)
+    if type(audio) != dict:
+        return ""
+    return audio.get("audioContent", "")
+
+
+def has_audio(audio):
+    """
+    Checks whether a segment has audio without fetching it from the store.
+    """
+    if is_audio_reference(audio):
+        # Only non empty audio is offloaded, references written before the
+        # size was stored have audio too.
+        return audio.get("size", 1) > 0
+    return type(audio) == dict and len(audio.get("audioContent", "")) > 0
+
+
+def get_payload_audio_uris(payload):
+    if type(payload) != dict or type(payload.get("payload")) != dict:
+        return set()
+    return {
+        segment["audio"]["audioUri"]
+        for segment in payload["payload"].values()
+        if type(segment) == dict
+        and type(segment.get("audio")) == dict
+        and segment["audio"].get("audioUri")
+    }
+
+
+def get_referenced_audio_uris(uris):
+    """
+    Returns the uris still found in the payload of any voice over.
+    """
+    from voiceover.models import VoiceOverAudioReference
+
+    return set(
+        VoiceOverAudioReference.objects.filter(uri__in=list(uris))
+        .values_list("uri", flat=True)
+        .distinct()
+    )
+
+
+def delete_unreferenced_audio(uris):
+    """
+    Deletes the blobs of uris that no voice over refers to anymore.
+    """
+    for uri in set(uris) - get_referenced_audio_uris(uris):
+        try:
+            get_store_for_uri(uri).delete(uri)
+        except Exception as e:
+            logging.info("Error in deleting segment audio %s %s", uri, str(e))
@@ -0,0 +1,127 @@
+"""
+Bulk export of voice over audios.
+
+The audios are fetched from blob storage by a bounded pool of threads and
+written straight into a zip that is uploaded as the staged blocks of a block
+blob. Nothing is written to the local disk, and at most
+bulk_export_download_workers audios and one block are held in memory.
+"""
+
+import base64
+import logging
+import urllib.parse
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from azure.storage.blob import BlobBlock, BlobServiceClient, ContentSettings
+from config import (
+    connection_string,
+    container_name,
+    bulk_export_download_workers,
+    bulk_export_block_size,
+    bulk_export_max_bytes,
+)
+
+
+class BulkExportSizeExceeded(Exception):
+    pass
+
+
+class BlockBlobWriter:
+    """
+    Write only file object that uploads what is written to a block blob in
+    blocks of bulk_export_block_size. The blob is created by commit().
+    """
+
+    def __init__(self, blob_client, block_size=bulk_export_block_size):
+        self.blob_client = blob_client
+        self.block_size = block_size
+        self.buffer = bytearray()
+        self.block_ids = []
+
+    def write(self, data):
+        self.buffer.extend(data)
+        while len(self.buffer) >= self.block_size:
+            self.stage_block(bytes(self.buffer[: self.block_size]))
+            del self.buffer[: self.block_size]
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def stage_block(self, data):
+        # Block ids of a blob must all have the same length.
+        block_id = base64.b64encode(
+            "{:08d}".format(len(self.block_ids)).encode()
+        ).decode()
+        self.blob_client.stage_block(block_id, data)
+        self.block_ids.append(block_id)
+
+    def commit(self):
+        if len(self.buffer) > 0:
+            self.stage_block(bytes(self.buffer))
+            self.buffer = bytearray()
+        self.blob_client.commit_block_list(
+            [BlobBlock(block_id=block_id) for block_id in self.block_ids],
+            content_settings=ContentSettings(content_type="application/zip"),
+        )
+        return self.blob_client.url
+
+
+def get_audio_file_name(azure_url):
+    return azure_url.split("/")[-1]
+
+
+def export_voice_over_audios(azure_urls, zip_blob_name, progress=None):
+    """
+    Zips the audios at azure_urls into the blob zip_blob_name and returns its
+    url. The size limit is checked from the blob properties before anything
+    is downloaded, progress(done, total) is called after every audio.
+    """
+    blob_service_client = BlobServiceClient.from_connection_string(connection_string)
+    audio_clients = [
+        blob_service_client.get_blob_client(
+            container=container_name,
+            blob=urllib.parse.unquote(get_audio_file_name(azure_url)),
+        )
+        for azure_url in azure_urls
+    ]
+
+    with ThreadPoolExecutor(max_workers=bulk_export_download_workers) as executor:
+        total_size = sum(
+            executor.map(
+                lambda audio_client: audio_client.get_blob_properties().size,
+                audio_clients,
+            )
+        )
+        if total_size > bulk_export_max_bytes:
+            raise BulkExportSizeExceeded(
+                "Audios add up to {} bytes, more than {}".format(
+                    total_size, bulk_export_max_bytes
+                )
+            )
+
+        def download(index):
+            return audio_clients[index].download_blob().readall()
+
+        # Audios are written in order while the next ones download, with at
+        # most bulk_export_download_workers downloads in flight.
+        downloads = {
+            index: executor.submit(download, index)
+            for index in range(min(bulk_export_download_workers, len(azure_urls)))
+        }
+        zip_writer = BlockBlobWriter(
+            blob_service_client.get_blob_client(
+                container=container_name, blob=zip_blob_name
+            )
+        )
+        with zipfile.ZipFile(zip_writer, "w") as zf:
+            for index, azure_url in enumerate(azure_urls):
+                data = downloads.pop(index).result()
+                next_index = index + bulk_export_download_workers
+                if next_index < len(azure_urls):
+                    downloads[next_index] = executor.submit(download, next_index)
+                zf.writestr(get_audio_file_name(azure_url), data)
+                logging.info("Added audio %s to %s", azure_url, zip_blob_name)
+                if progress is not None:
+                    progress(index + 1, len(azure_urls))
+    return zip_writer.commit()
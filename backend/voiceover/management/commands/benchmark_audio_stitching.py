@@ -0,0 +1,124 @@
+import base64
+import io
+import math
+import os
+import tempfile
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from moviepy.editor import AudioFileClip, concatenate_audioclips
+from pydub import AudioSegment
+from pydub.generators import Sine
+from voiceover.utils import adjust_audio, get_original_duration, integrate_all_audios
+
+
+def format_time(seconds):
+    return (
+        f"{int(seconds // 3600):02d}:{int(seconds % 3600 // 60):02d}:"
+        f"{seconds % 60:06.3f}"
+    )
+
+
+def get_synthetic_payload(segments, clip_seconds, gap_seconds):
+    """
+    Returns a voice over payload of segments spaced gap_seconds apart. Every
+    other clip is longer than its slot so it gets sped up.
+    """
+    short_clip = Sine(440).to_audio_segment(duration=clip_seconds * 1000)
+    long_clip = Sine(660).to_audio_segment(duration=clip_seconds * 1200)
+    clips = []
+    for clip in [short_clip, long_clip]:
+        buffer = io.BytesIO()
+        clip.export(buffer, format="ogg")
+        clips.append(base64.b64encode(buffer.getvalue()).decode())
+    payload = {}
+    for index in range(segments):
+        start = index * (clip_seconds + gap_seconds) + gap_seconds
+        payload[str(index)] = {
+            "start_time": format_time(start),
+            "end_time": format_time(start + clip_seconds),
+            "time_difference": clip_seconds,
+            "audio": {"audioContent": clips[index % 2]},
+        }
+    duration = timedelta(seconds=segments * (clip_seconds + gap_seconds) + gap_seconds)
+    return {"payload": payload}, duration
+
+
+def stitch_per_segment(file_name, payload):
+    """
+    The stitching before the timeline rewrite: every audio is written to its
+    own ogg file, fitted and padded with silence there, then the files are
+    concatenated by moviepy in batches of 20.
+    """
+    audio_file_paths = []
+    previous_end_time = "00:00:00.000"
+    for key, segment in payload["payload"].items():
+        path = file_name + "_" + key + ".ogg"
+        with open(path, "wb") as out_f:
+            out_f.write(base64.b64decode(segment["audio"]["audioContent"]))
+        adjust_audio(path, segment["time_difference"], -1)
+        difference = get_original_duration(previous_end_time, segment["start_time"])
+        if difference > 0:
+            audio = AudioSegment.silent(duration=difference * 1000)
+            audio += AudioSegment.from_file(path)
+            audio.export(path, format="ogg")
+        audio_file_paths.append(path)
+        previous_end_time = segment["end_time"]
+
+    final_paths = []
+    for i in range(math.ceil(len(audio_file_paths) / 20)):
+        clips = [AudioFileClip(c) for c in audio_file_paths[i * 20 : (i + 1) * 20]]
+        concatenate_audioclips(clips).write_audiofile(
+            file_name + str(i) + ".wav", logger=None
+        )
+        final_paths.append(file_name + str(i) + ".wav")
+    clips = [AudioFileClip(c) for c in final_paths]
+    concatenate_audioclips(clips).write_audiofile(file_name + "final.wav", logger=None)
+    for fname in audio_file_paths + final_paths:
+        if os.path.isfile(fname):
+            os.remove(fname)
+
+
+class Command(BaseCommand):
+    help = "Reports voice over audio segments stitched per second, per segment file and on a single timeline."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--segments",
+            type=int,
+            default=100,
+            help="Number of synthetic segments stitched.",
+        )
+        parser.add_argument(
+            "--clip-seconds",
+            type=float,
+            default=2.0,
+            help="Length of the slot of every segment in seconds.",
+        )
+
+    def handle(self, *args, **options):
+        segments = options["segments"]
+        with tempfile.TemporaryDirectory() as work_dir:
+            payload, duration = get_synthetic_payload(
+                segments, options["clip_seconds"], 0.5
+            )
+            file_name = os.path.join(work_dir, "per_segment")
+            start = time.time()
+            stitch_per_segment(file_name, payload)
+            per_segment = time.time() - start
+
+            payload, duration = get_synthetic_payload(
+                segments, options["clip_seconds"], 0.5
+            )
+            file_name = os.path.join(work_dir, "timeline")
+            start = time.time()
+            integrate_all_audios(file_name, payload, duration)
+            timeline = time.time() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Stitched {segments} segments: "
+                f"{segments / per_segment:.1f} segments/s per segment file, "
+                f"{segments / timeline:.1f} segments/s on a single timeline"
+            )
+        )
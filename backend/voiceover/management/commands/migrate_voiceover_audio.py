@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from voiceover.audio_store import get_segment_audio_store
+from voiceover.models import VoiceOver
+
+
+def has_inline_audio(payload):
+    if type(payload) != dict or type(payload.get("payload")) != dict:
+        return False
+    for segment in payload["payload"].values():
+        if (
+            type(segment) == dict
+            and type(segment.get("audio")) == dict
+            and segment["audio"].get("audioContent")
+        ):
+            return True
+    return False
+
+
+class Command(BaseCommand):
+    help = "Moves inline base64 voice over audio from VoiceOver.payload to the segment audio store."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=20,
+            help="Number of voice overs loaded from the database at a time.",
+        )
+
+    def handle(self, *args, **options):
+        if get_segment_audio_store() is None:
+            self.stderr.write(
+                "VOICEOVER_AUDIO_STORE is not set to a store, nothing to migrate."
+            )
+            return
+        migrated = 0
+        voice_overs = VoiceOver.objects.exclude(payload__isnull=True).iterator(
+            chunk_size=options["batch_size"]
+        )
+        for voice_over in voice_overs:
+            if not has_inline_audio(voice_over.payload):
+                continue
+            # save() offloads every inline audio of the payload to the store.
+            voice_over.save(update_fields=["payload"])
+            migrated += 1
+            if migrated % 100 == 0:
+                self.stdout.write(f"Migrated {migrated} voice overs")
+        self.stdout.write(self.style.SUCCESS(f"Migrated {migrated} voice overs"))
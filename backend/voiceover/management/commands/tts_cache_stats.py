@@ -0,0 +1,16 @@
+import json
+from django.core.management.base import BaseCommand
+from voiceover.tts_cache import TTSCache
+
+
+class Command(BaseCommand):
+    help = "Prints the hit and miss counters and the size of the TTS cache as JSON."
+
+    def handle(self, *args, **options):
+        stats = TTSCache().get_stats()
+        if stats is None:
+            self.stderr.write(self.style.ERROR("Unable to read the TTS cache stats"))
+            return
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else None
+        self.stdout.write(json.dumps(stats))
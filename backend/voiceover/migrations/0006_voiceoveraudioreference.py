@@ -0,0 +1,66 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Indexes the segment audio references already stored in voice over payloads.
+BACKFILL_AUDIO_REFERENCES = """
+INSERT INTO voiceover_voiceoveraudioreference (voice_over_id, uri)
+SELECT DISTINCT voiceover.id, segment.value -> 'audio' ->> 'audioUri'
+FROM voiceover_voiceover AS voiceover,
+    jsonb_each(
+        CASE
+            WHEN jsonb_typeof(voiceover.payload -> 'payload') = 'object'
+            THEN voiceover.payload -> 'payload'
+            ELSE '{}'::jsonb
+        END
+    ) AS segment
+WHERE jsonb_typeof(segment.value -> 'audio') = 'object'
+    AND segment.value -> 'audio' ->> 'audioUri' IS NOT NULL
+ON CONFLICT DO NOTHING
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("voiceover", "0005_voiceover_azure_url_audio"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VoiceOverAudioReference",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "uri",
+                    models.CharField(
+                        db_index=True, max_length=1000, verbose_name="Audio URI"
+                    ),
+                ),
+                (
+                    "voice_over",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="audio_references",
+                        to="voiceover.voiceover",
+                        verbose_name="Voice Over",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("voice_over", "uri"),
+                        name="voiceover_audio_reference_unique",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_AUDIO_REFERENCES, migrations.RunSQL.noop),
+    ]
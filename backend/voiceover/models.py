@@ -1,10 +1,15 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
 from translation.models import Translation
 from task.models import Task
 from .metadata import VOICEOVER_LANGUAGE_CHOICES
 from video.models import Video
 from users.models import User
+from .audio_store import (
+    get_payload_audio_uris,
+    get_segment_audio_store,
+    offload_payload_audio,
+)
 
 
 MACHINE_GENERATED = "MACHINE_GENERATED"
@@ -109,5 +114,58 @@ class VoiceOver(models.Model):
         null=True,
     )
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "payload" not in update_fields:
+            return super().save(*args, **kwargs)
+        offload_payload_audio(self.voice_over_uuid, self.payload)
+        uris = get_payload_audio_uris(self.payload)
+        previous_uris = set()
+        if self.pk and (uris or get_segment_audio_store() is not None):
+            previous_uris = set(self.audio_references.values_list("uri", flat=True))
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.audio_references.filter(uri__in=previous_uris - uris).delete()
+            VoiceOverAudioReference.objects.bulk_create(
+                [
+                    VoiceOverAudioReference(voice_over=self, uri=uri)
+                    for uri in uris - previous_uris
+                ],
+                ignore_conflicts=True,
+            )
+        replaced_uris = previous_uris - uris
+        if replaced_uris:
+            from .tasks import delete_replaced_segment_audio
+
+            transaction.on_commit(
+                lambda: delete_replaced_segment_audio.delay(sorted(replaced_uris))
+            )
+
     def __str__(self):
         return "Voice Over: " + str(self.voice_over_uuid)
+
+
+class VoiceOverAudioReference(models.Model):
+    """
+    Segment audio uri found in the payload of a voice over, kept in sync by
+    VoiceOver.save, so checking whether a blob is still in use is an index
+    lookup.
+    """
+
+    voice_over = models.ForeignKey(
+        VoiceOver,
+        on_delete=models.CASCADE,
+        related_name="audio_references",
+        verbose_name="Voice Over",
+    )
+    uri = models.CharField(max_length=1000, db_index=True, verbose_name="Audio URI")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["voice_over", "uri"], name="voiceover_audio_reference_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return "Voice Over Audio Reference: " + self.uri
@@ -12,11 +12,12 @@ from .utils import (
     download_from_azure_blob,
     upload_audio_to_azure_blob,
     send_audio_mail_to_user,
-    upload_zip_to_azure,
     send_audio_zip_mail_to_user,
     send_task_status_notification,
 )
 from voiceover.models import VoiceOver
+from .bulk_export import BulkExportSizeExceeded, export_voice_over_audios
+from .audio_store import delete_unreferenced_audio
 from task.models import Task, TRANSLATION_VOICEOVER_EDIT
 from users.models import User
 import os
@@ -34,7 +35,6 @@ from moviepy.editor import VideoFileClip, AudioFileClip, concatenate_audioclips
 import re
 import json
 import requests
-import zipfile
 from translation.models import Translation, TRANSLATION_EDIT_COMPLETE
 from transcript.models import Transcript
     
@@ -190,48 +190,47 @@ def export_voiceover_async(task_id, export_type, user_id, bg_music):
 
 
 @shared_task()
-def bulk_export_voiceover_async(task_ids, user_id):
-    downloaded_files = []
+def delete_replaced_segment_audio(uris):
+    delete_unreferenced_audio(uris)
+
+
+@shared_task(bind=True)
+def bulk_export_voiceover_async(self, task_ids, user_id):
     user = User.objects.get(pk=user_id)
-    for task_id in task_ids:
-        task = Task.objects.get(pk=task_id)
-        voice_over = VoiceOver.objects.filter(
-            task=task, status="VOICEOVER_EDIT_COMPLETE"
-        ).first()
+    voice_overs = {}
+    for voice_over in (
+        VoiceOver.objects.filter(task_id__in=task_ids, status="VOICEOVER_EDIT_COMPLETE")
+        .select_related("task", "task__user", "task__video")
+        .order_by("id")
+    ):
+        voice_overs.setdefault(voice_over.task_id, voice_over)
 
-        if voice_over is not None:
-            download_from_azure_blob(str(voice_over.azure_url_audio))
-            logging.info(
-                "Downloaded audio from Azure Blob %s", voice_over.azure_url_audio
-            )
-            file_path = voice_over.azure_url_audio.split("/")[-1]
-            downloaded_files.append(file_path)
+    azure_urls = []
+    task = None
+    for task_id in task_ids:
+        voice_over = voice_overs.get(int(task_id))
+        if voice_over is not None and voice_over.azure_url_audio:
+            azure_urls.append(str(voice_over.azure_url_audio))
+            task = voice_over.task
         else:
             logging.info("Error in exporting %s", str(task_id))
+    if len(azure_urls) == 0:
+        return
+
+    def report_progress(done, total):
+        logging.info("Exported %s of %s voice over audios", done, total)
+        self.update_state(state="PROGRESS", meta={"done": done, "total": total})
 
-    time_now = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    time_now = datetime.now().strftime("%Y%m%d_%H%M%S")
     zip_file_name = f"Chitralekha_VO_Tasks_{time_now}.zip"
-    with zipfile.ZipFile(zip_file_name, "w") as zf:
-        for file_name in downloaded_files:
-            zf.write(file_name)
-    zip_file_size = os.path.getsize(zip_file_name)
-    if zip_file_size > (1024**3):
-        logging.info("Error: Zip file size exceeds 1 GB. Skipping upload to Azure.")
-        try:
-            os.remove(zip_file_name)
-            for f in downloaded_files:
-                os.remove(f)
-        except:
-            logging.info("Error in removing files")
+    try:
+        azure_zip_url = export_voice_over_audios(
+            azure_urls, zip_file_name, report_progress
+        )
+    except BulkExportSizeExceeded as e:
+        logging.info("Error: %s. Skipping upload to Azure.", str(e))
         return
-    azure_zip_url = upload_zip_to_azure(zip_file_name)
     logging.info("Uploading audio_zip to Azure Blob %s", azure_zip_url)
-    try:
-        os.remove(zip_file_name)
-        for f in downloaded_files:
-            os.remove(f)
-    except:
-        logging.info("Error in removing files")
 
     send_audio_zip_mail_to_user(task, azure_zip_url, user)
 
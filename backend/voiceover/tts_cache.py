@@ -0,0 +1,126 @@
+import hashlib
+import json
+import logging
+import time
+import redis
+from config import (
+    redis_host,
+    redis_port,
+    tts_cache_redis_db,
+    tts_cache_max_bytes,
+)
+
+tts_cache_redis_client = None
+
+TTS_CACHE_KEY_PREFIX = "tts:"
+TTS_CACHE_LRU_KEY = "tts_cache:lru"
+TTS_CACHE_SIZES_KEY = "tts_cache:sizes"
+TTS_CACHE_TOTAL_SIZE_KEY = "tts_cache:total_size"
+TTS_CACHE_HITS_KEY = "tts_cache:hits"
+TTS_CACHE_MISSES_KEY = "tts_cache:misses"
+
+
+class TTSCache:
+    """
+    Content addressed cache of TTS outputs stored in Redis.
+
+    Entries are keyed by a hash of the normalized text, language, gender and
+    TTS service. A sorted set of last access times and a hash of entry sizes
+    keep the cache under tts_cache_max_bytes by evicting the least recently
+    used entries. Every method swallows Redis errors, a cache failure only
+    means the TTS API gets called.
+    """
+
+    def __init__(self):
+        pass
+
+    def get_redis_instance(self):
+        global tts_cache_redis_client
+        if not tts_cache_redis_client:
+            tts_cache_redis_client = redis.Redis(
+                host=redis_host, port=redis_port, db=tts_cache_redis_db
+            )
+        return tts_cache_redis_client
+
+    def make_key(self, text, language, gender, service_id):
+        normalized_text = " ".join(text.split())
+        key_input = json.dumps(
+            [normalized_text, language, gender.lower(), service_id],
+            ensure_ascii=False,
+        )
+        return (
+            TTS_CACHE_KEY_PREFIX + hashlib.sha256(key_input.encode("utf-8")).hexdigest()
+        )
+
+    def get_many(self, keys):
+        """
+        Returns the cached outputs for keys, None for every miss.
+        """
+        if not keys:
+            return []
+        try:
+            client = self.get_redis_instance()
+            values = client.mget(keys)
+            hits = {key: time.time() for key, val in zip(keys, values) if val}
+            pipe = client.pipeline(transaction=False)
+            if hits:
+                pipe.zadd(TTS_CACHE_LRU_KEY, hits, xx=True)
+                pipe.incrby(TTS_CACHE_HITS_KEY, len(hits))
+            if len(hits) < len(keys):
+                pipe.incrby(TTS_CACHE_MISSES_KEY, len(keys) - len(hits))
+            pipe.execute()
+            logging.info(
+                "TTS cache hits %s, misses %s", len(hits), len(keys) - len(hits)
+            )
+            return [json.loads(val) if val else None for val in values]
+        except Exception as e:
+            logging.info("Exception in TTSCache: get_many | Cause: " + str(e))
+            return [None] * len(keys)
+
+    def set(self, key, value):
+        try:
+            client = self.get_redis_instance()
+            data = json.dumps(value)
+            # Identical audio is already cached when the key exists.
+            if not client.hsetnx(TTS_CACHE_SIZES_KEY, key, len(data)):
+                return
+            pipe = client.pipeline(transaction=False)
+            pipe.set(key, data)
+            pipe.zadd(TTS_CACHE_LRU_KEY, {key: time.time()})
+            pipe.incrby(TTS_CACHE_TOTAL_SIZE_KEY, len(data))
+            pipe.execute()
+            self.evict()
+        except Exception as e:
+            logging.info("Exception in TTSCache: set | Cause: " + str(e))
+
+    def evict(self):
+        client = self.get_redis_instance()
+        while int(client.get(TTS_CACHE_TOTAL_SIZE_KEY) or 0) > tts_cache_max_bytes:
+            oldest = client.zpopmin(TTS_CACHE_LRU_KEY, 50)
+            if not oldest:
+                break
+            keys = [key for key, _ in oldest]
+            sizes = client.hmget(TTS_CACHE_SIZES_KEY, keys)
+            pipe = client.pipeline(transaction=False)
+            pipe.delete(*keys)
+            pipe.hdel(TTS_CACHE_SIZES_KEY, *keys)
+            pipe.decrby(TTS_CACHE_TOTAL_SIZE_KEY, sum(int(s or 0) for s in sizes))
+            pipe.execute()
+            logging.info("Evicted %s entries from TTS cache", len(keys))
+
+    def get_stats(self):
+        try:
+            client = self.get_redis_instance()
+            hits, misses, total_size = client.mget(
+                TTS_CACHE_HITS_KEY, TTS_CACHE_MISSES_KEY, TTS_CACHE_TOTAL_SIZE_KEY
+            )
+            return {
+                "hits": int(hits or 0),
+                "misses": int(misses or 0),
+                "entries": client.zcard(TTS_CACHE_LRU_KEY),
+                "size_bytes": int(total_size or 0),
+                "max_size_bytes": tts_cache_max_bytes,
+            }
+        except Exception as e:
+            logging.info("Exception in TTSCache: get_stats | Cause: " + str(e))
+            return None
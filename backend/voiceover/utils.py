@@ -1,6 +1,5 @@
 import requests
 from uuid import UUID
-import uuid
 import json
 from azure.storage.blob import BlobServiceClient
 import logging
@@ -15,6 +14,13 @@ from config import (
     dravidian_tts_url,
     DEFAULT_SPEAKER,
     app_name,
+    voice_over_stitch_sample_rate,
+    tts_max_workers,
+    tts_timeout,
+    tts_max_retries,
+    voice_over_audio_workers,
+    media_cache_dir,
+    media_cache_max_bytes,
 )
 from pydub import AudioSegment
 import io
@@ -26,18 +32,16 @@ import base64
 from datetime import timedelta
 import webvtt
 from io import StringIO
-from yt_dlp import YoutubeDL
 from yt_dlp.utils import DownloadError
 from yt_dlp.extractor import get_info_extractor
 from django.http import HttpRequest
 from moviepy.video.io.ffmpeg_tools import ffmpeg_extract_subclip
-from moviepy.editor import VideoFileClip, AudioFileClip, concatenate_audioclips
+from moviepy.editor import VideoFileClip, AudioFileClip
 from mutagen.wave import WAVE
 import numpy
 import sys
 from mutagen.mp3 import MP3
 import numpy as np
-from pympler.asizeof import asizeof
 from rest_framework import status
 import math
 from pydub.effects import speedup
@@ -49,7 +53,13 @@ import operator
 import urllib.parse
 import shutil
 from utils.email_template import send_email_template
+from utils.media_cache import MediaCache
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .tts_cache import TTSCache
+from .audio_store import has_audio, is_audio_reference, get_audio_content
 
 
 def get_tts_url(language):
@@ -224,6 +234,54 @@ def upload_zip_to_azure(zip_file_path):
     return blob_client_zip.url
 
 
+def get_tts_session():
+    """
+    Keep-alive session shared by all TTS calls of a process. The connection
+    pool blocks when exhausted, which bounds the number of concurrent
+    requests per TTS host to tts_max_workers.
+    """
+    session = requests.Session()
+    retries = Retry(
+        total=tts_max_retries,
+        backoff_factor=0.5,
+        status_forcelist=[500, 502, 503, 504],
+        allowed_methods=["POST"],
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_maxsize=tts_max_workers, pool_block=True, max_retries=retries
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"authorization": dhruva_key})
+    return session
+
+
+tts_session = get_tts_session()
+tts_cache = TTSCache()
+
+
+def get_sentence_tts_output(tts_url, sentence, target_language, gender):
+    sentence_json_data = {
+        "input": [sentence],
+        "config": {
+            "language": {"sourceLanguage": target_language},
+            "gender": gender.lower(),
+        },
+    }
+    try:
+        sentence_response = tts_session.post(
+            tts_url, json=sentence_json_data, timeout=tts_timeout
+        )
+    except requests.exceptions.RequestException as e:
+        logging.info("Error in TTS API %s", str(e))
+        return None
+    if sentence_response.status_code != 200:
+        logging.info("Error in TTS API %s", str(sentence_response.status_code))
+        return None
+    return sentence_response.json()["audio"][0]
+
+
 def get_tts_output(tts_input, target_language, multiple_speaker, gender, id):
     logging.info("Calling TTS API for %s task in %s language", str(id), str(target_language))
     tts_url = get_tts_url(target_language)
@@ -232,30 +290,32 @@ def get_tts_output(tts_input, target_language, multiple_speaker, gender, id):
             "message": "Error in TTS API. Target Language is not supported.",
             "status": status.HTTP_400_BAD_REQUEST,
         }
-    tts_output = {}
-    tts_output["audio"] = []
-    count_errors = 0
-    for sentence in tts_input:
-        sentence_json_data = {
-            "input": [sentence],
-            "config": {
-                "language": {"sourceLanguage": target_language},
-                "gender": gender.lower(),
-            },
-        }
-        sentence_response = requests.post(
-            tts_url,
-            headers={"authorization": dhruva_key},
-            json=sentence_json_data,
+    cache_keys = [
+        tts_cache.make_key(sentence["source"], target_language, gender, tts_url)
+        for sentence in tts_input
+    ]
+    sentence_outputs = tts_cache.get_many(cache_keys)
+    missed_indices = [
+        ind for ind, output in enumerate(sentence_outputs) if output is None
+    ]
+    with ThreadPoolExecutor(max_workers=tts_max_workers) as executor:
+        missed_outputs = executor.map(
+            lambda ind: get_sentence_tts_output(
+                tts_url, tts_input[ind], target_language, gender
+            ),
+            missed_indices,
         )
-        if sentence_response.status_code != 200:
-            logging.info("Error in TTS API %s", str(sentence_response.status_code))
-            sentence_tts_output = {"audioContent": "", "audioUri": None}
+        for ind, sentence_tts_output in zip(missed_indices, missed_outputs):
+            sentence_outputs[ind] = sentence_tts_output
+            if sentence_tts_output is not None:
+                tts_cache.set(cache_keys[ind], sentence_tts_output)
+    tts_output = {"audio": []}
+    count_errors = 0
+    for sentence_tts_output in sentence_outputs:
+        if sentence_tts_output is None:
             count_errors += 1
-            tts_output["audio"].append(sentence_tts_output)
-        else:
-            sentence_tts_output = sentence_response.json()
-            tts_output["audio"].append(sentence_tts_output["audio"][0])
+            sentence_tts_output = {"audioContent": "", "audioUri": None}
+        tts_output["audio"].append(sentence_tts_output)
     if count_errors == len(tts_input):
         return {
             "message": "Error in TTS API.",
@@ -264,6 +324,17 @@ def get_tts_output(tts_input, target_language, multiple_speaker, gender, id):
     return tts_output
 
 
+def encode_tts_audio(audio_content, time_difference):
+    """
+    Convert a base64 TTS output to a base64 ogg fitted to time_difference,
+    decoding and encoding the audio once, without touching the disk.
+    """
+    fitted_audio = fit_audio_to_duration(
+        base64.b64decode(audio_content), time_difference
+    )
+    return base64.b64encode(fitted_audio).decode()
+
+
 def generate_tts_output(
     tts_input,
     target_language,
@@ -300,30 +371,42 @@ def generate_tts_output(
         }
         merged_tts_output = {"audio": []}
         list_indices = []
-        for speaker_id, speaker_tts_input in speakers_tts_input.items():
+        for speaker_tts_input in speakers_tts_input.values():
             for ind in speaker_tts_input:
                 list_indices.append(ind["index"])
-            if generate_audio:
-                speaker_tts_output = get_tts_output(
-                    speaker_tts_input,
-                    target_language,
-                    translation_obj.video.multiple_speaker,
-                    speaker_info[speaker_id],
-                    translation_obj.id,
-                )
+
+        if generate_audio:
+            # Speakers are synthesized in parallel, the shared TTS session
+            # still bounds the number of requests in flight.
+            with ThreadPoolExecutor(
+                max_workers=max(1, len(speakers_tts_input))
+            ) as executor:
+                speaker_futures = [
+                    executor.submit(
+                        get_tts_output,
+                        speaker_tts_input,
+                        target_language,
+                        translation_obj.video.multiple_speaker,
+                        speaker_info[speaker_id],
+                        translation_obj.id,
+                    )
+                    for speaker_id, speaker_tts_input in speakers_tts_input.items()
+                ]
+                speakers_tts_output = [future.result() for future in speaker_futures]
+            for speaker_tts_output in speakers_tts_output:
                 if (
                     type(speaker_tts_output) != dict
                     or "audio" not in speaker_tts_output.keys()
                 ):
                     return speaker_tts_output
                 merged_tts_output["audio"].extend(speaker_tts_output["audio"])
-            else:
+        else:
+            for speaker_tts_input in speakers_tts_input.values():
                 merged_tts_output["audio"].extend(
                     [{"audioContent": ""} for _ in speaker_tts_input]
                 )
 
         if generate_audio:
-            merged_tts_output["config"] = speaker_tts_output["config"]
             for input, output in zip(list_indices, merged_tts_output["audio"]):
                 output["index"] = input
             tts_output = {
@@ -338,12 +421,12 @@ def generate_tts_output(
 
     if type(tts_output) != dict or "audio" not in tts_output.keys():
         return tts_output
-    logging.info("Size of TTS output %s", str(asizeof(tts_output)))
     logging.info("Output from TTS generated")
 
     voiceover_payload = {"payload": {}}
     count = 0
     audio_not_generated = []
+    audio_jobs = []
 
     for ind, text in enumerate(translation["payload"]):
         start_time = text["start_time"]
@@ -392,36 +475,20 @@ def generate_tts_output(
             logging.info("Count of audios saved %s", str(count))
 
             if generate_audio:
-                wave_audio = "temp_" + str(ind) + ".wav"
-                audio_decoded = base64.b64decode(
-                    tts_output["audio"][count]["audioContent"]
-                )
                 if len(tts_output["audio"][count]["audioContent"]) > 100:
-                    with open(wave_audio, "wb") as output_f:
-                        output_f.write(audio_decoded)
                     logging.info(
                         "Length of received content %s",
                         str(len(tts_output["audio"][count]["audioContent"])),
                     )
-                    audio = AudioFileClip(wave_audio)
-                    wav_seconds = audio.duration
-                    ogg_audio = "temp_" + str(ind) + ".ogg"
-                    AudioSegment.from_wav(wave_audio).export(ogg_audio, format="ogg")
-                    logging.info("Seconds of wave audio %s", str(wav_seconds))
-                    audio = AudioFileClip(ogg_audio)
-                    seconds = audio.duration
-                    logging.info("Seconds of ogg audio %s", str(seconds))
-                    adjust_audio(ogg_audio, t_d, -1)
-                    encoded_audio = base64.b64encode(open(ogg_audio, "rb").read())
-                    decoded_audio = encoded_audio.decode()
-                    os.remove(ogg_audio)
-                    os.remove(wave_audio)
+                    audio_jobs.append(
+                        (count, tts_output["audio"][count]["audioContent"], t_d)
+                    )
                     voiceover_payload["payload"][str(count)] = {
                         "time_difference": t_d,
                         "start_time": start_time,
                         "end_time": end_time,
                         "text": text["target_text"],
-                        "audio": {"audioContent": decoded_audio},
+                        "audio": {"audioContent": ""},
                         "audio_speed": 1,
                         "audio_generated": True,
                         "index": tts_output["audio"][count].get("index", 0),
@@ -468,8 +535,16 @@ def generate_tts_output(
         else:
             pass
 
-    logging.info("Size of voiceover payload %s", str(asizeof(voiceover_payload)))
-    logging.info("Size of combined audios %s", str(asizeof(voiceover_payload)))
+    # ffmpeg does the heavy lifting in subprocesses, so threads are enough to
+    # use every core, and Celery's daemonic workers cannot fork a process pool.
+    with ThreadPoolExecutor(max_workers=voice_over_audio_workers) as executor:
+        encoded_audios = executor.map(
+            lambda job: encode_tts_audio(job[1], job[2]), audio_jobs
+        )
+        for (payload_index, _, _), encoded_audio in zip(audio_jobs, encoded_audios):
+            audio = voiceover_payload["payload"][str(payload_index)]["audio"]
+            audio["audioContent"] = encoded_audio
+
     voiceover_payload["audio_not_generated"] = audio_not_generated
     voiceover_payload["empty_sentences"] = empty_sentences
 
@@ -994,29 +1069,13 @@ def adjust_voiceover(translation_payload):
     for index, (translation_text, audio, duration) in enumerate(translation_payload):
         if type(audio) == dict and "audioContent" in audio.keys():
             if len(audio["audioContent"]) > 400:
-                uuid_num = str(uuid.uuid4())
-                audio_file = "temp_" + uuid_num + ".wav"
-                first_audio_decoded = base64.b64decode(audio["audioContent"])
-                with open(audio_file, "wb") as output_f:
-                    output_f.write(first_audio_decoded)
-                try:
-                    AudioSegment.from_file(audio_file).export(
-                        "temp_" + uuid_num + ".ogg", format="ogg"
-                    )
-                except:
-                    audio_file = "temp_" + uuid_num + ".ogg"
-                    first_audio_decoded = base64.b64decode(audio["audioContent"])
-                    with open(audio_file, "wb") as output_f:
-                        output_f.write(first_audio_decoded)
-                adjust_audio(
-                    "temp_" + uuid_num + ".ogg", translation_payload[index][2], -1
-                )
-                encoded_audio = base64.b64encode(
-                    open("temp_" + uuid_num + ".ogg", "rb").read()
+                fitted_audio = fit_audio_to_duration(
+                    base64.b64decode(audio["audioContent"]),
+                    translation_payload[index][2],
                 )
                 output[index] = (
                     translation_payload[index][0],
-                    {"audioContent": encoded_audio.decode()},
+                    {"audioContent": base64.b64encode(fitted_audio).decode()},
                 )
             else:
                 logging.info("Recieved wrong input for %s", translation_text)
@@ -1068,26 +1127,14 @@ def generate_voiceover_payload(translation_payload, target_language, task):
                     and len(voice_over["audioContent"]) > 100
                 ):
                     ind = post_generated_audio_indices.pop(0)
-                    uuid_num = str(uuid.uuid4())
-                    audio_file = "temp_" + uuid_num + ".wav"
-                    first_audio_decoded = base64.b64decode(voice_over["audioContent"])
-                    with open(audio_file, "wb") as output_f:
-                        output_f.write(first_audio_decoded)
-                    AudioSegment.from_wav(audio_file).export(
-                        "temp_" + uuid_num + ".ogg", format="ogg"
-                    )
-                    adjust_audio(
-                        "temp_" + uuid_num + ".ogg", translation_payload[ind][3], -1
-                    )
-                    encoded_audio = base64.b64encode(
-                        open("temp_" + uuid_num + ".ogg", "rb").read()
+                    fitted_audio = fit_audio_to_duration(
+                        base64.b64decode(voice_over["audioContent"]),
+                        translation_payload[ind][3],
                     )
                     output[ind] = (
                         translation_payload[ind][0],
-                        {"audioContent": encoded_audio.decode()},
+                        {"audioContent": base64.b64encode(fitted_audio).decode()},
                     )
-                    os.remove(audio_file)
-                    os.remove("temp_" + uuid_num + ".ogg")
                 else:
                     ind = post_generated_audio_indices.pop(0)
                     output[ind] = (
@@ -1103,18 +1150,25 @@ def generate_voiceover_payload(translation_payload, target_language, task):
     return output
 
 
+media_cache = None
+
+
+def get_media_cache():
+    global media_cache
+    if not media_cache:
+        media_cache = MediaCache(media_cache_dir, media_cache_max_bytes)
+    return media_cache
+
+
 def download_video(url, file_name):
     logging.info("Downloading video %s", url)
-    ydl = YoutubeDL({"format": "best"})
     """
     Get video details from Google's platforms:
     YouTube and Drive
     """
     try:
-        with YoutubeDL(
-            {"format": "best", "outtmpl": "{}.%(ext)s".format(file_name)}
-        ) as ydl:
-            ydl.download([url])
+        # A copy, the integration removes and replaces the video file
+        get_media_cache().copy(url, "video", file_name + ".mp4")
     except DownloadError:
         return {"message": "Error in downloading video"}
     logging.info("Downloaded video")
@@ -1173,17 +1227,9 @@ def check_audio_completion(voice_over_obj):
                         "message": "Duration is 0 for this card.",
                     }
                 )
-            if (
-                "audio" in voice_over_obj.payload["payload"][str(index)].keys()
-                and type(voice_over_obj.payload["payload"][str(index)]["audio"]) == dict
-                and "audioContent"
-                in voice_over_obj.payload["payload"][str(index)]["audio"].keys()
-                and len(
-                    voice_over_obj.payload["payload"][str(index)]["audio"][
-                        "audioContent"
-                    ]
-                )
-                > 0 and not is_empty_audio(voice_over_obj.payload["payload"][str(index)]["audio"]["audioContent"])
+            audio = voice_over_obj.payload["payload"][str(index)].get("audio")
+            if has_audio(audio) and (
+                is_audio_reference(audio) or not is_empty_audio(audio["audioContent"])
             ):
                 continue
             else:
@@ -1240,58 +1286,73 @@ def adjust_audio_wav(audio_file, original_time, audio_speed):
 """
 
 
-def adjust_audio(audio_file, original_time, audio_speed):
-    audio = AudioFileClip(audio_file)
-    seconds = audio.duration
-    audio = AudioSegment.from_file(audio_file)
-    audio_time_difference = (original_time * 1000 - len(audio)) / 1000
+def ffmpeg_pcm_filter(pcm_data, sample_rate, channels, audio_filter, output_format):
+    """
+    Run raw 16-bit PCM through an ffmpeg filter graph over pipes and return
+    the output as bytes, either encoded ogg or raw s16le PCM.
+    """
+    command = [
+        "ffmpeg",
+        "-loglevel",
+        "error",
+        "-f",
+        "s16le",
+        "-ar",
+        str(sample_rate),
+        "-ac",
+        str(channels),
+        "-i",
+        "pipe:0",
+        "-filter:a",
+        audio_filter,
+    ]
+    if output_format == "ogg":
+        command.extend(["-acodec", "libvorbis"])
+    command.extend(["-f", output_format, "pipe:1"])
+    process = subprocess.run(
+        command, input=pcm_data, stdout=subprocess.PIPE, check=True
+    )
+    return process.stdout
+
+
+def fit_audio_to_duration(audio_bytes, original_time):
+    """
+    Fit an encoded audio to original_time seconds and return it as ogg bytes.
+
+    The audio is decoded once, then shorter audios are padded with silence
+    and longer ones are sped up and trimmed in a single ffmpeg filter graph.
+    Ogg audios which already fit are returned untouched.
+    """
+    audio = AudioSegment.from_file(io.BytesIO(audio_bytes)).set_sample_width(2)
+    seconds = len(audio) / 1000
+    audio_time_difference = original_time - seconds
+    audio_filter = None
     if audio_time_difference > 0:
         logging.info("Add silence in the audio of %s", str(audio_time_difference))
-        # duration in millisecond
-        silence_segment = AudioSegment.silent(duration=audio_time_difference * 1000)
-        orig_seg = AudioSegment.from_file(audio_file)
-        # for adding silence at the end of audio
-        combined_audio = orig_seg + silence_segment
-        combined_audio.export(audio_file, format="ogg")
-    elif audio_time_difference == 0:
-        logging.info("No time difference")
+        audio_filter = f"apad=whole_dur={original_time}"
     elif audio_time_difference < -0.001:
         if original_time == 0:
             raise ZeroDivisionError
-        logging.info("Speed up the audio by %s", str(seconds / original_time))
         speedup_factor = seconds / original_time
         if speedup_factor > 1.009:
-            output_file = "temp_output.ogg"
-            subprocess.run(
-                [
-                    "ffmpeg",
-                    "-y",
-                    "-i",
-                    audio_file,
-                    "-filter:a",
-                    f"atempo={speedup_factor}",
-                    output_file,
-                ]
-            )
-            # Trim the audio to the original length
-            subprocess.run(
-                [
-                    "ffmpeg",
-                    "-y",
-                    "-i",
-                    output_file,
-                    "-t",
-                    str(original_time),
-                    audio_file,
-                ]
-            )
-            subprocess.run(["rm", output_file])
-            audio = AudioFileClip(audio_file)
-            seconds = audio.duration
-            logging.info("Seconds of adjusted ogg audio %s", str(seconds))
+            logging.info("Speed up the audio by %s", str(speedup_factor))
+            audio_filter = f"atempo={speedup_factor},atrim=end={original_time}"
+    if audio_filter is None:
+        if audio_bytes[:4] == b"OggS":
+            return audio_bytes
+        audio_filter = "anull"
+    return ffmpeg_pcm_filter(
+        audio.raw_data, audio.frame_rate, audio.channels, audio_filter, "ogg"
+    )
 
-    else:
-        pass
+
+def adjust_audio(audio_file, original_time, audio_speed):
+    with open(audio_file, "rb") as f:
+        audio_bytes = f.read()
+    fitted_audio = fit_audio_to_duration(audio_bytes, original_time)
+    if fitted_audio is not audio_bytes:
+        with open(audio_file, "wb") as f:
+            f.write(fitted_audio)
 
 
 def compare_time(original_time, end_time):
@@ -1330,180 +1391,96 @@ def get_original_duration_neg(start_time, end_time):
     return time_difference
 
 
-def integrate_all_audios(file_name, payload, video_duration):
-    length_payload = len(payload["payload"])
-    first_audio = payload["payload"]["0"]["audio"]["audioContent"]
-    first_audio_decoded = base64.b64decode(first_audio)
-    logging.info("Index of Audio : #%s", str(0))
-    audio_file_paths = []
-    with open(file_name + "_" + str(0) + ".ogg", "wb") as out_f23:
-        out_f23.write(first_audio_decoded)
-    adjust_audio(
-        file_name + "_" + str(0) + ".ogg",
-        payload["payload"][str(0)]["time_difference"],
-        -1,
-    )
-    first_start_time = payload["payload"]["0"]["start_time"]
-    difference_between_payloads = get_original_duration(
-        "00:00:00.000", first_start_time
+def decode_audio_to_pcm(audio_bytes, sample_rate):
+    """
+    Decode an encoded audio clip (ogg/wav) into mono 16-bit PCM samples.
+    """
+    segment = AudioSegment.from_file(io.BytesIO(audio_bytes))
+    segment = segment.set_channels(1).set_frame_rate(sample_rate).set_sample_width(2)
+    return np.frombuffer(segment.raw_data, dtype=np.int16)
+
+
+def speedup_pcm(samples, sample_rate, speedup_factor):
+    """
+    Run ffmpeg's atempo filter over mono PCM samples.
+    """
+    pcm_data = ffmpeg_pcm_filter(
+        samples.tobytes(), sample_rate, 1, f"atempo={speedup_factor}", "s16le"
     )
-    if difference_between_payloads > 0:
-        silence_segment = AudioSegment.silent(
-            duration=difference_between_payloads * 1000
-        )
-        # read wav file to an audio segment
-        audio = AudioSegment.from_file(file_name + "_" + str(0) + ".ogg")
-        # Add above two audio segments
-        final_audio = silence_segment + audio
-        final_audio.export(file_name + "_" + str(0) + ".ogg", format="ogg")
-
-    sorted_keys = list(payload["payload"].keys())
-    audio_file_paths.append(file_name + "_" + str(0) + ".ogg")
-    empty_audios = []
-    last_valid_index = 0
-    for key in sorted_keys:
-        index = int(key)
-        if str(index) in payload["payload"].keys() and index > 0:
-            if str(index - 1) in payload["payload"].keys():
-                current_payload = payload["payload"][str(index)]["start_time"]
-                previous_payload = payload["payload"][str(last_valid_index)]["end_time"]
-                difference_between_payloads = get_original_duration(
-                    previous_payload, current_payload
-                )
-                if difference_between_payloads > 3600 or (
-                    current_payload
-                    == payload["payload"][str(last_valid_index)]["start_time"]
-                ):
-                    empty_audios.append(index)
-                    continue
-                else:
-                    previous_index = last_valid_index
-                    last_valid_index = index
+    return np.frombuffer(pcm_data, dtype=np.int16)
 
-                if (
-                    difference_between_payloads > 0
-                    and difference_between_payloads < 3600
-                ):
-                    silence_segment = AudioSegment.silent(
-                        duration=difference_between_payloads * 1000
-                    )
-                    # duration in milliseconds
-                    # read wav file to an audio segment
-                    audio = AudioSegment.from_file(
-                        file_name + "_" + str(previous_index) + ".ogg"
-                    )
-                    # Add above two audio segments
-                    final_audio = audio + silence_segment
-                    final_audio.export(
-                        file_name + "_" + str(previous_index) + ".ogg", format="ogg"
-                    )
-            if "time_difference" not in payload["payload"][str(index)]:
-                start_time = payload["payload"][str(index)]["start_time"]
-                end_time = payload["payload"][str(index)]["end_time"]
-                time_difference = (
-                    datetime.strptime(end_time, "%H:%M:%S.%f")
-                    - timedelta(
-                        hours=float(start_time.split(":")[0]),
-                        minutes=float(start_time.split(":")[1]),
-                        seconds=float(start_time.split(":")[-1]),
-                    )
-                ).strftime("%H:%M:%S.%f")
-                t_d = (
-                    int(time_difference.split(":")[0]) * 3600
-                    + int(time_difference.split(":")[1]) * 60
-                    + float(time_difference.split(":")[2])
-                )
-                payload["payload"][str(index)]["time_difference"] = t_d
-            if index == length_payload - 1:
-                original_time = payload["payload"][str(index)]["time_difference"]
-                end_time = payload["payload"][str(index)]["end_time"]
-                audio_2_decoded = base64.b64decode(
-                    payload["payload"][str(index)]["audio"]["audioContent"]
-                )
-                if compare_time(str(video_duration) + str(".000"), end_time)[0]:
-                    last_segment_difference = get_original_duration(
-                        end_time, str(video_duration) + str(".000")
-                    )
-                    if last_segment_difference > 0:
-                        with open(
-                            file_name + "_" + str(index) + ".ogg", "wb"
-                        ) as out_f23:
-                            out_f23.write(audio_2_decoded)
-                        adjust_audio(
-                            file_name + "_" + str(index) + ".ogg", original_time, -1
-                        )
-                        silence_segment = AudioSegment.silent(
-                            duration=last_segment_difference * 1000
-                        )
-                        # duration in milliseconds
-                        # read wav file to an audio segment
-                        audio = AudioSegment.from_file(
-                            file_name + "_" + str(index) + ".ogg"
-                        )
-                        # Add above two audio segments
-                        final_audio = audio + silence_segment
-                        final_audio.export(
-                            file_name + "_" + str(index) + ".ogg", format="ogg"
-                        )
-                        audio_file_paths.append(file_name + "_" + str(index) + ".ogg")
-                else:
-                    with open(file_name + "_" + str(index) + ".ogg", "wb") as out_f23:
-                        out_f23.write(audio_2_decoded)
-                    adjust_audio(
-                        file_name + "_" + str(index) + ".ogg", original_time, -1
-                    )
-                    audio_file_paths.append(file_name + "_" + str(index) + ".ogg")
 
-            else:
-                logging.info("Index of Audio : #%s", str(index))
-                original_time = payload["payload"][str(index)]["time_difference"]
-                if len(payload["payload"][str(index)]["audio"]["audioContent"]) < 100:
-                    silence_audio = AudioSegment.silent(duration=original_time * 1000)
-                    silence_audio.export(
-                        file_name + "_" + str(index) + ".ogg", format="ogg"
-                    )
-                    audio_file_paths.append(file_name + "_" + str(index) + ".ogg")
-                elif str(index) in empty_audios:
-                    continue
-                else:
-                    audio_2_decoded = base64.b64decode(
-                        payload["payload"][str(index)]["audio"]["audioContent"]
-                    )
-                    with open(file_name + "_" + str(index) + ".ogg", "wb") as out_f23:
-                        out_f23.write(audio_2_decoded)
-                    adjust_audio(
-                        file_name + "_" + str(index) + ".ogg", original_time, -1
-                    )
-                    audio_file_paths.append(file_name + "_" + str(index) + ".ogg")
-
-    final_paths = []
-    batch_size = math.ceil(len(audio_file_paths) / 20)
-    for i in range(batch_size):
-        if i == 0:
-            audio_batch_paths = audio_file_paths[: (i + 1) * 20]
-            clips = [AudioFileClip(c) for c in audio_batch_paths]
-            final_clip = concatenate_audioclips(clips)
-            final_clip.write_audiofile(file_name + str(i) + ".wav")
-            final_paths.append(file_name + str(i) + ".wav")
-        elif i == batch_size - 1:
-            audio_batch_paths = audio_file_paths[(i * 20) : len(audio_file_paths)]
-            clips = [AudioFileClip(c) for c in audio_batch_paths]
-            final_clip = concatenate_audioclips(clips)
-            final_clip.write_audiofile(file_name + str(i) + ".wav")
-            final_paths.append(file_name + str(i) + ".wav")
-        else:
-            audio_batch_paths = audio_file_paths[(i * 20) : ((i + 1) * 20)]
-            clips = [AudioFileClip(c) for c in audio_batch_paths]
-            final_clip = concatenate_audioclips(clips)
-            final_clip.write_audiofile(file_name + str(i) + ".wav")
-            final_paths.append(file_name + str(i) + ".wav")
-
-    clips = [AudioFileClip(c) for c in final_paths]
-    final_clip_1 = concatenate_audioclips(clips)
-    final_clip_1.write_audiofile(file_name + "final.wav")
-    for fname in audio_file_paths + final_paths:
-        if os.path.isfile(fname):
-            os.remove(fname)
+def fit_pcm_to_duration(samples, sample_rate, original_time):
+    """
+    Speed up and trim PCM samples so that they fit in original_time seconds.
+    Shorter audios are left untouched, the timeline is already silent.
+    """
+    seconds = len(samples) / sample_rate
+    if original_time - seconds < -0.001:
+        if original_time == 0:
+            raise ZeroDivisionError
+        speedup_factor = seconds / original_time
+        if speedup_factor > 1.009:
+            logging.info("Speed up the audio by %s", str(speedup_factor))
+            samples = speedup_pcm(samples, sample_rate, speedup_factor)
+            samples = samples[: int(original_time * sample_rate)]
+    return samples
+
+
+def integrate_all_audios(file_name, payload, video_duration):
+    """
+    Stitch the voice over audios into a single <file_name>final.wav.
+
+    Every audio is decoded once and written at the sample offset of its
+    start time in a silent timeline sized from the video duration, which
+    is then encoded a single time.
+    """
+    sample_rate = voice_over_stitch_sample_rate
+    video_seconds = video_duration.total_seconds()
+    placements = []
+    last_valid_index = None
+    for key in payload["payload"].keys():
+        index = int(key)
+        segment = payload["payload"][key]
+        if last_valid_index is not None:
+            previous_segment = payload["payload"][str(last_valid_index)]
+            difference_between_payloads = get_original_duration(
+                previous_segment["end_time"], segment["start_time"]
+            )
+            if (
+                difference_between_payloads > 3600
+                or segment["start_time"] == previous_segment["start_time"]
+            ):
+                continue
+        last_valid_index = index
+        if "time_difference" not in segment:
+            segment["time_difference"] = get_original_duration(
+                segment["start_time"], segment["end_time"]
+            )
+        offset = get_original_duration("00:00:00.000", segment["start_time"])
+        placements.append((index, offset, segment))
+
+    timeline_seconds = video_seconds
+    for index, offset, segment in placements:
+        timeline_seconds = max(timeline_seconds, offset + segment["time_difference"])
+    timeline = np.zeros(int(math.ceil(timeline_seconds * sample_rate)), dtype=np.int16)
+
+    for index, offset, segment in placements:
+        logging.info("Index of Audio : #%s", str(index))
+        audio_content = get_audio_content(segment["audio"])
+        if len(audio_content) < 100:
+            continue
+        samples = decode_audio_to_pcm(base64.b64decode(audio_content), sample_rate)
+        samples = fit_pcm_to_duration(samples, sample_rate, segment["time_difference"])
+        start = int(offset * sample_rate)
+        end = min(start + len(samples), len(timeline))
+        timeline[start:end] = samples[: end - start]
+
+    with wave.open(file_name + "final.wav", "wb") as final_wav:
+        final_wav.setnchannels(1)
+        final_wav.setsampwidth(2)
+        final_wav.setframerate(sample_rate)
+        final_wav.writeframes(timeline.tobytes())
 
 
 def send_audio_mail_to_user(task, azure_url, user):
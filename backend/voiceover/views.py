@@ -18,6 +18,7 @@ from translation.models import (
     Translation,
     TRANSLATION_EDIT_COMPLETE,
     TRANSLATION_EDIT_INPROGRESS,
+    remove_empty_segments,
 )
 from .metadata import (
     VOICEOVER_SUPPORTED_LANGUAGES,
@@ -36,6 +37,8 @@ from .models import (
 from django.utils import timezone
 from datetime import datetime, timedelta
 from .utils import *
+from .audio_store import has_audio, is_audio_reference, load_segments_audio
+from utils.segment_store import get_keyed_segments, get_segments_page
 from config import voice_over_payload_offset_size, app_name
 from .tasks import (
     celery_integration,
@@ -46,6 +49,7 @@ from django.db.models import Count, F, Sum
 from operator import itemgetter
 from itertools import groupby
 from pydub import AudioSegment
+from pympler.asizeof import asizeof
 import copy
 import uuid
 import regex
@@ -63,8 +67,10 @@ def get_voice_over_export_types(request):
     )
 
 
-def get_voice_over_id(task):
+def get_voice_over_id(task, defer_payload=False):
     voice_over = VoiceOver.objects.filter(task=task)
+    if defer_payload:
+        voice_over = voice_over.defer("payload")
     if "EDIT" in task.task_type:
         if task.status == "NEW":
             voice_over_id = None
@@ -187,7 +193,7 @@ def get_empty_audios(request):
             if sentence.get("audio", "") == "":
                 empty_audios.append(data_dict)
                 continue
-            if sentence["audio"]["audioContent"] == "":
+            if not has_audio(sentence["audio"]):
                 print(
                     "Empty audio with dict found",
                     sentence.get("audio", {}).get("audioContent", {}),
@@ -322,10 +328,8 @@ def get_payload(request):
             status=status.HTTP_404_NOT_FOUND,
         )
 
-    voice_over = get_voice_over_id(task)
-    if voice_over is not None:
-        voice_over_id = voice_over.id
-    else:
+    voice_over = get_voice_over_id(task, defer_payload=True)
+    if voice_over is None:
         if task.status == "POST_PROCESS":
             return Response(
                 {"message": "VoiceOver is in Post Process stage."},
@@ -336,49 +340,41 @@ def get_payload(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    # Retrieve the voice over object
-    try:
-        voice_over = VoiceOver.objects.get(pk=voice_over_id)
-    except VoiceOver.DoesNotExist:
-        return Response(
-            {"message": "VoiceOver doesn't exist."},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
-
     sentences_list = []
     current_offset = offset - 1
     translation_payload = []
     completed_count = 0
-    if voice_over.translation:
-        if voice_over.voice_over_type == "MACHINE_GENERATED":
-            count_cards = len(list(voice_over.payload["payload"].keys())) - 1
-        else:
-            count_cards = len(voice_over.translation.payload["payload"]) - 1
+    if voice_over.translation_id:
         start_offset = current_offset
         end_offset = start_offset + voice_over_payload_offset_size - 1
+        # Only the segments of the requested cards are read from the payloads.
+        translation_segments, sentences_count = get_segments_page(
+            Translation.objects.filter(pk=voice_over.translation_id),
+            start_offset,
+            end_offset + 1,
+        )
+        voice_over_segments, payload_keys_count = get_keyed_segments(
+            VoiceOver.objects.filter(pk=voice_over.id),
+            [str(i) for i in range(start_offset, end_offset + 1)]
+            + ["completed_count"],
+        )
+        if voice_over.voice_over_type == "MACHINE_GENERATED":
+            count_cards = payload_keys_count - 1
+        else:
+            count_cards = sentences_count - 1
 
         generate_voice_over = True
         if end_offset >= count_cards:
             next = None
             previous = offset - voice_over_payload_offset_size
         elif offset == 1:
-            delete_indices = []
-            for index, sentence in enumerate(voice_over.translation.payload["payload"]):
-                if "text" not in sentence.keys():
-                    delete_indices.append(index)
-            delete_indices.reverse()
-            for ind in delete_indices:
-                voice_over.translation.payload["payload"].pop(ind)
-            voice_over.translation.save()
             previous = None
             next = offset + voice_over_payload_offset_size
         else:
             next = offset + voice_over_payload_offset_size
             previous = offset - voice_over_payload_offset_size
 
-        for index, translation_text in enumerate(
-            voice_over.translation.payload["payload"][start_offset : end_offset + 1]
-        ):
+        for index, translation_text in enumerate(translation_segments):
             translation_payload.append((translation_text, index))
     else:
         return Response(
@@ -391,16 +387,16 @@ def get_payload(request):
         moderate_audio_threshold = 16 if task.target_language != "sa" else 12
         for text, index in translation_payload:
             audio_index = str(start_offset + index)
-            if audio_index in voice_over.payload["payload"].keys():
-                start_time = voice_over.payload["payload"][str(audio_index)][
+            if audio_index in voice_over_segments.keys():
+                start_time = voice_over_segments[str(audio_index)][
                     "start_time"
                 ]
-                end_time = voice_over.payload["payload"][str(audio_index)]["end_time"]
+                end_time = voice_over_segments[str(audio_index)]["end_time"]
                 if (
                     "transcription_text"
-                    in voice_over.payload["payload"][str(audio_index)].keys()
+                    in voice_over_segments[str(audio_index)].keys()
                 ):
-                    transcription_text = voice_over.payload["payload"][
+                    transcription_text = voice_over_segments[
                         str(audio_index)
                     ]["transcription_text"]
                 else:
@@ -428,27 +424,27 @@ def get_payload(request):
                         "time_difference": "{:.3f}".format(t_d),
                         "start_time": start_time,
                         "end_time": end_time,
-                        "text": voice_over.payload["payload"][str(audio_index)]["text"],
+                        "text": voice_over_segments[str(audio_index)]["text"],
                         "transcription_text": transcription_text,
-                        "audio": voice_over.payload["payload"][str(audio_index)][
+                        "audio": voice_over_segments[str(audio_index)][
                             "audio"
                         ],
                         "audio_speed": 1,
                         "fast_audio": 0 if text_length_per_second < moderate_audio_threshold else 1 if text_length_per_second < fast_audio_threshold else 2,
-                        "image_url": voice_over.payload["payload"][str(audio_index)].get("image_url")
+                        "image_url": voice_over_segments[str(audio_index)].get("image_url")
                     }
                 )
-        payload = {"payload": sentences_list}
+        payload = {"payload": load_segments_audio(sentences_list)}
     elif voice_over.voice_over_type == "MANUALLY_CREATED":
         if end_offset > count_cards:
             end_offset = end_offset - 1
-        if voice_over.payload and "payload" in voice_over.payload:
+        if payload_keys_count > 0:
             count = 0
 
             for i in range(start_offset, end_offset + 1):
-                if str(i) in voice_over.payload["payload"].keys():
-                    start_time = voice_over.payload["payload"][str(i)]["start_time"]
-                    end_time = voice_over.payload["payload"][str(i)]["end_time"]
+                if str(i) in voice_over_segments.keys():
+                    start_time = voice_over_segments[str(i)]["start_time"]
+                    end_time = voice_over_segments[str(i)]["end_time"]
                     time_difference = (
                         datetime.strptime(end_time, "%H:%M:%S.%f")
                         - timedelta(
@@ -462,29 +458,29 @@ def get_payload(request):
                         + int(time_difference.split(":")[1]) * 60
                         + float(time_difference.split(":")[2])
                     )
-                    # if "audioContent" in voice_over.payload["payload"][str(i)]["audio"].keys():
+                    # if "audioContent" in voice_over_segments[str(i)]["audio"].keys():
                     #     completed_count += 1
                     sentences_list.append(
                         {
-                            "audio": voice_over.payload["payload"][str(i)]["audio"],
-                            "text": voice_over.payload["payload"][str(i)]["text"],
-                            "start_time": voice_over.payload["payload"][str(i)][
+                            "audio": voice_over_segments[str(i)]["audio"],
+                            "text": voice_over_segments[str(i)]["text"],
+                            "start_time": voice_over_segments[str(i)][
                                 "start_time"
                             ],
-                            "end_time": voice_over.payload["payload"][str(i)][
+                            "end_time": voice_over_segments[str(i)][
                                 "end_time"
                             ],
                             "time_difference": t_d,
                             "id": i + 1,
                             "audio_speed": 1,
-                            "image_url": voice_over.payload["payload"][str(i)].get("image_url")
+                            "image_url": voice_over_segments[str(i)].get("image_url")
                         }
                     )
                 else:
-                    start_time = voice_over.translation.payload["payload"][i][
+                    start_time = translation_segments[i - start_offset][
                         "start_time"
                     ]
-                    end_time = voice_over.translation.payload["payload"][i]["end_time"]
+                    end_time = translation_segments[i - start_offset]["end_time"]
                     time_difference = (
                         datetime.strptime(end_time, "%H:%M:%S.%f")
                         - timedelta(
@@ -503,17 +499,19 @@ def get_payload(request):
                             "time_difference": t_d,
                             "start_time": start_time,
                             "end_time": end_time,
-                            "text": voice_over.translation.payload["payload"][i][
+                            "text": translation_segments[i - start_offset][
                                 "target_text"
                             ],
                             "audio": "",
                             "id": i + 1,
                             "audio_speed": 1,
-                            "image_url": voice_over.payload["payload"][i].get("image_url")
+                            "image_url": translation_segments[i - start_offset].get(
+                                "image_url"
+                            )
                         }
                     )
                     count += 1
-        payload = {"payload": sentences_list}
+        payload = {"payload": load_segments_audio(sentences_list)}
     else:
         return Response(
             {"message": "Payload not generated for voice over"},
@@ -523,8 +521,8 @@ def get_payload(request):
     if voice_over.voice_over_type == "MANUALLY_CREATED":
         return Response(
             {
-                "completed_count": voice_over.payload["payload"]["completed_count"],
-                "sentences_count": len(voice_over.translation.payload["payload"]),
+                "completed_count": voice_over_segments["completed_count"],
+                "sentences_count": sentences_count,
                 "count": count_cards + 1,
                 "next": next,
                 "current": offset,
@@ -1044,6 +1042,7 @@ def save_voice_over(request):
                     None  # Reset the ID to create a new instance
                 )
                 inprogress_translation.parent = translation
+                remove_empty_segments(inprogress_translation)
                 inprogress_translation.save()
                 voice_over.translation = inprogress_translation
                 voice_over.save()
@@ -1295,6 +1294,11 @@ def save_voice_over(request):
                                             not in voice_over_obj.payload["payload"][
                                                 str(start_offset + i)
                                             ]["audio"]
+                                            and not is_audio_reference(
+                                                voice_over_obj.payload["payload"][
+                                                    str(start_offset + i)
+                                                ]["audio"]
+                                            )
                                         ):
                                             voice_over_obj.payload["payload"][
                                                 "completed_count"
@@ -1500,6 +1504,11 @@ def save_voice_over(request):
                                         not in voice_over_obj.payload["payload"][
                                             str(start_offset + i)
                                         ]["audio"]
+                                        and not is_audio_reference(
+                                            voice_over_obj.payload["payload"][
+                                                str(start_offset + i)
+                                            ]["audio"]
+                                        )
                                     ):
                                         voice_over_obj.payload["payload"][
                                             "completed_count"
@@ -1649,6 +1658,11 @@ def save_voice_over(request):
                                         not in voice_over_obj.payload["payload"][
                                             str(start_offset + i)
                                         ]["audio"]
+                                        and not is_audio_reference(
+                                            voice_over_obj.payload["payload"][
+                                                str(start_offset + i)
+                                            ]["audio"]
+                                        )
                                     ):
                                         voice_over_obj.payload["payload"][
                                             "completed_count"
@@ -1818,6 +1832,7 @@ def save_voice_over(request):
                         None  # Reset the ID to create a new instance
                     )
                     inprogress_translation.parent = translation
+                    remove_empty_segments(inprogress_translation)
                     inprogress_translation.save()
                     voice_over_obj.translation = inprogress_translation
                     voice_over_obj.save()